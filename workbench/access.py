@@ -0,0 +1,203 @@
+"""Workspace and page visibility rules, resolved with a fixed number of queries.
+
+``get_access`` loads everything needed to judge one user against one workspace
+(company, workspace role, page-collaborator memberships) and caches it for the
+rest of the request, so visibility for a whole page list is decided in memory.
+The per-user workspace list is cached in Redis and invalidated by doc hooks.
+"""
+
+import frappe
+from frappe.utils.caching import request_cache
+
+
+class WorkspaceAccess:
+	def __init__(self, workspace, user):
+		self.user = user
+		self.workspace = frappe.db.get_value(
+			"Workbench Workspace", workspace, ["name", "owner_user", "visibility", "company"], as_dict=True
+		)
+		if not self.workspace:
+			frappe.throw(f"Workspace {workspace} not found", frappe.DoesNotExistError)
+
+		self.default_company = frappe.db.get_default("company")
+		self.company = frappe.db.get_value("User", user, "company") or self.default_company
+		self.role = frappe.db.get_value(
+			"Workbench Workspace Collaborator", {"parent": workspace, "user": user}, "access"
+		)
+		self.page_roles = dict(
+			frappe.db.sql(
+				"""
+				SELECT c.parent, c.access
+				FROM `tabWorkbench Page Collaborator` c
+				JOIN `tabNotion Page` p ON p.name = c.parent
+				WHERE c.user = %s AND p.workspace = %s
+				""",
+				(user, workspace),
+			)
+		)
+
+	def can_access_workspace(self, write=False):
+		if self.workspace.owner_user == self.user:
+			return True
+		if self.role and (not write or self.role == "Editor"):
+			return True
+		if self.workspace.visibility == "Company":
+			return bool(self.company and self.company == self.workspace.company)
+		return False
+
+	def can_view_page(self, page):
+		"""``page`` needs ``name``, ``visibility``, ``company`` and ``created_by``."""
+		if page.visibility == "Use Workspace":
+			return self.can_access_workspace()
+		if page.visibility == "Private":
+			return page.created_by == self.user
+		if page.visibility == "Company":
+			return bool(self.company and self.company == (page.company or self.default_company))
+		if page.visibility == "Specific Users":
+			return page.name in self.page_roles
+		return False
+
+	def can_edit_page(self, page):
+		if page.created_by == self.user:
+			return True
+		if page.visibility == "Private":
+			return False
+		if page.visibility == "Specific Users":
+			return self.page_roles.get(page.name) == "Editor"
+		return self.can_access_workspace(write=True)
+
+
+def get_access(workspace, user=None):
+	"""Request-scoped ``WorkspaceAccess`` for ``user`` (defaults to the session user)."""
+	return _get_access(workspace, user or frappe.session.user)
+
+
+@request_cache
+def _get_access(workspace, user):
+	return WorkspaceAccess(workspace, user)
+
+
+WORKSPACE_FIELDS = ("name", "title", "description", "visibility", "company", "creation", "modified")
+
+
+def user_company(user):
+	return frappe.db.get_value("User", user, "company") or frappe.db.get_default("company")
+
+
+def query_user_workspaces(user):
+	"""Owned, collaborating and company workspaces in one statement, deduplicated in SQL.
+
+	Owned workspaces come first, then shared ones, then company ones, each newest first.
+	"""
+	fields = ", ".join(f"w.{f}" for f in WORKSPACE_FIELDS)
+	outer = ", ".join(WORKSPACE_FIELDS)
+	return frappe.db.sql(
+		f"""
+		SELECT {outer}
+		FROM (
+			SELECT {fields}, 0 AS source
+			FROM `tabWorkbench Workspace` w
+			WHERE w.owner_user = %(user)s
+			UNION ALL
+			SELECT {fields}, 1 AS source
+			FROM `tabWorkbench Workspace` w
+			JOIN `tabWorkbench Workspace Collaborator` c
+				ON c.parent = w.name AND c.parenttype = 'Workbench Workspace'
+			WHERE c.user = %(user)s
+			UNION ALL
+			SELECT {fields}, 2 AS source
+			FROM `tabWorkbench Workspace` w
+			WHERE w.visibility = 'Company'
+				-- Empty companies fall back like ``user_company`` does with ``or``
+				AND w.company = COALESCE(
+					NULLIF((SELECT company FROM `tabUser` WHERE name = %(user)s), ''),
+					NULLIF(%(default_company)s, '')
+				)
+		) accessible
+		GROUP BY {outer}
+		ORDER BY MIN(source), modified DESC
+		""",
+		{"user": user, "default_company": frappe.db.get_default("company")},
+		as_dict=True,
+	)
+
+
+# Cached workspace lists are keyed by a per-user and a per-company version token,
+# so a workspace change only invalidates the users (or company) it touches.
+USER_VERSION_KEY = "workbench:workspaces_version:user:{}"
+COMPANY_VERSION_KEY = "workbench:workspaces_version:company:{}"
+WORKSPACES_KEY = "workbench:user_workspaces:{}:{}:{}"
+WORKSPACES_TTL = 6 * 60 * 60
+
+
+def cache_version(key):
+	version = frappe.cache().get_value(key)
+	if not version:
+		version = bump_version(key)
+	return version
+
+
+def bump_version(key):
+	version = frappe.generate_hash(length=8)
+	frappe.cache().set_value(key, version)
+	return version
+
+
+def get_cached_user_workspaces(user):
+	company = user_company(user)
+	key = WORKSPACES_KEY.format(
+		user,
+		cache_version(USER_VERSION_KEY.format(user)),
+		cache_version(COMPANY_VERSION_KEY.format(company)) if company else "",
+	)
+	workspaces = frappe.cache().get_value(key)
+	if workspaces is None:
+		workspaces = query_user_workspaces(user)
+		frappe.cache().set_value(key, workspaces, expires_in_sec=WORKSPACES_TTL)
+	return workspaces
+
+
+def invalidate_user_workspaces(users=(), companies=()):
+	for user in {u for u in users if u}:
+		bump_version(USER_VERSION_KEY.format(user))
+	for company in {c for c in companies if c}:
+		bump_version(COMPANY_VERSION_KEY.format(company))
+
+
+def workspace_audience(doc):
+	"""Users and companies whose workspace list depends on ``doc``."""
+	users = {doc.owner_user, *(c.user for c in doc.get("collaborators") or [])}
+	companies = {doc.company} if doc.visibility == "Company" else set()
+	return users, companies
+
+
+def on_workspace_change(doc, method=None):
+	users, companies = workspace_audience(doc)
+	before = doc.get_doc_before_save() if method == "on_update" else None
+	if before:
+		old_users, old_companies = workspace_audience(before)
+		users |= old_users
+		companies |= old_companies
+	invalidate_user_workspaces(users, companies)
+
+
+# Company directories change rarely and have no doc hooks here; a short TTL keeps them fresh
+COMPANY_USERS_KEY = "workbench:company_users:{}"
+COMPANY_USERS_TTL = 5 * 60
+
+
+def get_cached_company_users(company):
+	"""Enabled users of ``company`` (name, full_name, email, user_image), by full name."""
+	if not company:
+		return []
+	key = COMPANY_USERS_KEY.format(company)
+	users = frappe.cache().get_value(key)
+	if users is None:
+		users = frappe.get_all(
+			"User",
+			filters={"company": company, "enabled": 1},
+			fields=["name", "full_name", "email", "user_image"],
+			order_by="full_name asc",
+		)
+		frappe.cache().set_value(key, users, expires_in_sec=COMPANY_USERS_TTL)
+	return users
@@ -2,7 +2,15 @@ import uuid
 import json
 import time
 import frappe
-from frappe.utils import now
+from frappe.utils import cint, now
+
+from workbench import codec, cursors, history, links, oplog, ordering, responses, search
+from workbench import cascade as delete_cascade
+from workbench.access import get_access, get_cached_company_users, get_cached_user_workspaces, user_company
+from workbench.blocks import apply_ops, load_content, touched_blocks
+from workbench.titles import allocate_title, allocate_titles
+from workbench.workbench.inline_api.inline_collection import inline_page_collections
+from workbench.workbench.inline_api.resolver import invalidate_page
 
 @frappe.whitelist()
 def get_company_users():
@@ -25,56 +33,7 @@ def get_company_users():
 @frappe.whitelist()
 def get_user_workspaces():
     """Get all workspaces accessible to the current user."""
-    user = frappe.session.user
-    
-    # Get workspaces where user is owner
-    owned_workspaces = frappe.get_all(
-        "Workbench Workspace",
-        filters={"owner_user": user},
-        fields=["name", "title", "description", "visibility", "company", "creation", "modified"],
-        order_by="modified desc",
-    )
-    
-    # Get workspaces where user is collaborator
-    collaborator_workspaces = frappe.get_all(
-        "Workbench Workspace Collaborator",
-        filters={"user": user},
-        fields=["parent as name"],
-    )
-    
-    if collaborator_workspaces:
-        collab_names = [c.name for c in collaborator_workspaces]
-        collab_workspaces = frappe.get_all(
-            "Workbench Workspace",
-            filters={"name": ["in", collab_names]},
-            fields=["name", "title", "description", "visibility", "company", "creation", "modified"],
-            order_by="modified desc",
-        )
-    else:
-        collab_workspaces = []
-    
-    # Get company workspaces (if user has company)
-    company_workspaces = []
-    user_company = frappe.db.get_value("User", user, "company") or frappe.db.get_default("company")
-    if user_company:
-        company_workspaces = frappe.get_all(
-            "Workbench Workspace",
-            filters={"visibility": "Company", "company": user_company},
-            fields=["name", "title", "description", "visibility", "company", "creation", "modified"],
-            order_by="modified desc",
-        )
-    
-    # Combine and deduplicate
-    all_workspaces = owned_workspaces + collab_workspaces + company_workspaces
-    seen = set()
-    result = []
-    
-    for ws in all_workspaces:
-        if ws.name not in seen:
-            seen.add(ws.name)
-            result.append(ws)
-    
-    return result
+    return get_cached_user_workspaces(frappe.session.user)
 
 @frappe.whitelist()
 def create_workspace(title: str = "New Workspace", description: str = "", visibility: str = "Private", company: str = None, collaborators=None):
@@ -154,39 +113,90 @@ def get_default_page_content():
         ]
     }
 
+# Keyset order of a workspace's page list; ``name`` makes it total
+PAGE_ORDER = [("sort_key", [], "ASC"), ("page_order", [], "ASC"), ("creation", [], "ASC"), ("name", [], "ASC")]
+
 @frappe.whitelist()
-def get_workspace_pages(workspace):
-    """Get all pages for a workspace with proper visibility filtering."""
-    user = frappe.session.user
-    
-    # Filter pages based on per-page visibility logic
-    all_pages = frappe.get_all(
-        "Notion Page",
-        filters={"workspace": workspace, "is_archived": 0},
-        fields=["name", "title", "page_order", "last_edited_date", "last_edited_by", "visibility", "company", "created_by"],
-        order_by="page_order asc, creation asc",
-    )
-    
+def get_workspace_pages(workspace, limit=None, cursor=None):
+    """Get all pages for a workspace with proper visibility filtering.
+
+    With ``limit`` the list comes in pages of that many visible pages, as
+    ``{"pages": [...], "next_cursor": token}``; pass the token back as ``cursor``
+    for the next one (None means the end). Without it every page is returned.
+    """
+    access = get_access(workspace)
+    fields = ["name", "title", "page_order", "last_edited_date", "last_edited_by", "visibility"]
+
+    if limit is None:
+        # Filter pages based on per-page visibility logic
+        all_pages = frappe.get_all(
+            "Notion Page",
+            filters={"workspace": workspace, "is_archived": 0},
+            fields=[*fields, "company", "created_by"],
+            order_by="sort_key asc, page_order asc, creation asc",
+        )
+        return [{k: p.get(k) for k in fields} for p in all_pages if access.can_view_page(p)]
+
+    limit = cint(limit) or 50
+    scope = cursors.fingerprint("Notion Page", workspace)
+    after = cursors.decode_cursor(cursor, scope) if cursor else None
+
+    # Scan in keyset batches until enough visible pages are found; the cursor points
+    # at the last row scanned, so hidden pages are never scanned twice
+    pages, has_more = [], False
+    while True:
+        conditions, values = ["workspace = %s", "is_archived = 0"], [workspace]
+        if after is not None:
+            keyset_sql, keyset_values = cursors.keyset_condition(PAGE_ORDER, after)
+            conditions.append(keyset_sql)
+            values.extend(keyset_values)
+        batch = frappe.db.sql(
+            f"""
+            SELECT name, title, page_order, last_edited_date, last_edited_by, visibility,
+                company, created_by, sort_key, creation
+            FROM `tabNotion Page`
+            WHERE {" AND ".join(conditions)}
+            ORDER BY sort_key ASC, page_order ASC, creation ASC, name ASC
+            LIMIT %s
+            """,
+            [*values, limit],
+            as_dict=True,
+        )
+        for row in batch:
+            if len(pages) == limit:
+                has_more = True
+                break
+            after = [row.sort_key, row.page_order, row.creation, row.name]
+            if access.can_view_page(row):
+                pages.append({k: row.get(k) for k in fields})
+        if has_more or len(batch) < limit:
+            break
+
+    return {
+        "pages": pages,
+        "next_cursor": cursors.encode_cursor(after, scope) if has_more else None,
+    }
+
+@frappe.whitelist()
+def list_pages(search: str = "", workspace: str = None, limit: int = 50):
+    """List the pages the user can see, or search them when ``search`` is given."""
+    if search:
+        return [
+            {"name": r["page"], "title": r["title"], "workspace": r["workspace"]}
+            for r in search_content(search, workspace=workspace, limit=limit)
+            if r["type"] == "page"
+        ]
+
+    workspaces = [workspace] if workspace else [w.name for w in get_user_workspaces()]
     pages = []
-    ws = frappe.get_doc("Workbench Workspace", workspace)
-    
-    for p in all_pages:
-        if p.visibility == "Use Workspace":
-            if has_workspace_access(ws, user, write=False):
-                pages.append({k: p.get(k) for k in ["name", "title", "page_order", "last_edited_date", "last_edited_by", "visibility"]})
-        elif p.visibility == "Private":
-            if p.created_by == user:
-                pages.append({k: p.get(k) for k in ["name", "title", "page_order", "last_edited_date", "last_edited_by", "visibility"]})
-        elif p.visibility == "Company":
-            user_company = frappe.db.get_value("User", user, "company") or frappe.db.get_default("company")
-            if user_company and user_company == (p.company or frappe.db.get_default("company")):
-                pages.append({k: p.get(k) for k in ["name", "title", "page_order", "last_edited_date", "last_edited_by", "visibility"]})
-        elif p.visibility == "Specific Users":
-            is_collab = frappe.db.exists("Workbench Page Collaborator", {"parent": p.name, "user": user})
-            if is_collab:
-                pages.append({k: p.get(k) for k in ["name", "title", "page_order", "last_edited_date", "last_edited_by", "visibility"]})
-    
-    return pages
+    for ws in workspaces:
+        pages.extend(get_workspace_pages(ws))
+    return pages[: cint(limit)]
+
+@frappe.whitelist()
+def search_content(query: str, workspace: str = None, limit: int = 20, start: int = 0):
+    """Ranked full-text search over page blocks and inline item properties."""
+    return search.search(query, workspace=workspace, limit=limit, start=start)
 
 @frappe.whitelist()
 def get_all_workspace_pages(workspace):
@@ -205,38 +215,38 @@ def get_all_workspace_pages(workspace):
 
 def has_workspace_access(workspace, user, write=False):
     """Check if user has access to workspace."""
-    # Owner always has access
-    if workspace.owner_user == user:
-        return True
-    
-    # Check if user is collaborator
-    if write:
-        collab = frappe.db.exists("Workbench Workspace Collaborator", {"parent": workspace.name, "user": user, "access": "Editor"})
-    else:
-        collab = frappe.db.exists("Workbench Workspace Collaborator", {"parent": workspace.name, "user": user})
-    
-    if collab:
-        return True
-    
-    # Check company access
-    if workspace.visibility == "Company":
-        user_company = frappe.db.get_value("User", user, "company") or frappe.db.get_default("company")
-        if user_company and user_company == workspace.company:
-            return True
-    
-    return False
+    return get_access(workspace.name, user).can_access_workspace(write=write)
+
+def has_page_access(page, user, write=False):
+    """Check if user can view (or edit) a page under its visibility rules."""
+    access = get_access(page.workspace, user)
+    return access.can_edit_page(page) if write else access.can_view_page(page)
 
 @frappe.whitelist()
-def get_page(name: str):
-    doc = frappe.get_doc("Notion Page", name)
+def get_page(name: str, etag: str = None):
+    """The page with its content; ``{"not_modified": True}`` when ``etag`` is still current.
+
+    The tag comes from a primary-key read of ``modified`` and ``content_version``;
+    full payloads are served from the response cache when already built for it.
+    """
     frappe.only_for(["System Manager", "All"])  # simplistic demo
-    return {
-        "name": doc.name,
-        "title": doc.title,
-        "content_json": doc.content_json or "",
-        "is_archived": doc.is_archived,
-        "modified": doc.modified,
-    }
+    version = frappe.db.get_value("Notion Page", name, ["modified", "content_version"], as_dict=True)
+    if not version:
+        frappe.throw(f"Page {name} not found", frappe.DoesNotExistError)
+
+    def build():
+        doc = frappe.get_doc("Notion Page", name)
+        return {
+            "name": doc.name,
+            "title": doc.title,
+            "content_json": doc.content_json or "",
+            "content_version": doc.content_version,
+            "is_archived": doc.is_archived,
+            "modified": doc.modified,
+        }
+
+    tag = responses.make_etag("page", name, version.modified, version.content_version)
+    return responses.conditional_response("page", tag, build, etag)
 
 @frappe.whitelist()
 def create_page(workspace: str, title: str = "Untitled", content_json=None, visibility: str = "Use Workspace", company: str = None, collaborators=None):
@@ -252,17 +262,8 @@ def create_page(workspace: str, title: str = "Untitled", content_json=None, visi
         except Exception:
             collaborators = None
     
-    # Ensure unique title within workspace
-    base_title = title or "Untitled"
-    final_title = base_title
-    counter = 1
-    
-    while frappe.db.exists("Notion Page", {"title": final_title, "workspace": workspace}):
-        final_title = f"{base_title} {counter}"
-        counter += 1
-        if counter > 1000:
-            final_title = f"{base_title} {int(time.time())}"
-            break
+    # Ensure unique title within workspace (locks the workspace until commit)
+    final_title = allocate_title(workspace, title)
     
     # Get next page order
     max_order = frappe.db.sql("SELECT MAX(page_order) FROM `tabNotion Page` WHERE workspace = %s", (workspace,))
@@ -324,14 +325,9 @@ def update_page_settings(name: str, title: str = None, visibility: str = None, c
     # Update title if provided
     if title is not None:
         new_title = title or "Untitled"
-        # Check if title is changing and if new title already exists in the same workspace
-        if new_title != page.title and frappe.db.exists("Notion Page", {"title": new_title, "workspace": page.workspace}):
-            # Make title unique
-            base_title = new_title
-            counter = 1
-            while frappe.db.exists("Notion Page", {"title": f"{base_title} {counter}", "workspace": page.workspace}):
-                counter += 1
-            new_title = f"{base_title} {counter}"
+        # Make the title unique in the workspace if it is changing
+        if new_title != page.title:
+            new_title = allocate_title(page.workspace, new_title, exclude=page.name)
         page.title = new_title
     
     # Update visibility if provided
@@ -456,14 +452,9 @@ def update_page(name: str, title: str = None, content_json: str = None):
     
     if title is not None:
         new_title = title or "Untitled"
-        # Check if title is changing and if new title already exists
-        if new_title != doc.title and frappe.db.exists("Notion Page", new_title):
-            # Make title unique
-            base_title = new_title
-            counter = 1
-            while frappe.db.exists("Notion Page", f"{base_title} {counter}"):
-                counter += 1
-            new_title = f"{base_title} {counter}"
+        # Make the title unique in the workspace if it is changing
+        if new_title != doc.title:
+            new_title = allocate_title(doc.workspace, new_title, exclude=doc.name)
         doc.title = new_title
     
     if content_json is not None:
@@ -481,50 +472,100 @@ def update_page(name: str, title: str = None, content_json: str = None):
     
     doc.save()
     frappe.db.commit()
-    return {"ok": True, "modified": now()}
+    return {"ok": True, "modified": now(), "version": doc.content_version}
+
+def check_page_read_access(name):
+    page = frappe.db.get_value(
+        "Notion Page", name, ["name", "workspace", "visibility", "company", "created_by"], as_dict=True
+    )
+    if not page:
+        frappe.throw(f"Page {name} not found", frappe.DoesNotExistError)
+    if not has_page_access(page, frappe.session.user):
+        frappe.throw("You don't have permission to view this page")
 
 @frappe.whitelist()
-def delete_page(name: str, hard: int = 0):
+def patch_page(name: str, base_version, ops, client_id: str = None):
+    """Apply block-level operations (insert/update/move/delete) to a page's content.
+
+    When the page has moved past ``base_version``, the operations are still applied
+    if the changes made since (read from the op log) touch none of the blocks they
+    change or anchor to; ``missed`` then carries those changes for the client to
+    apply. Otherwise the patch is rejected with ``conflict`` (and ``missed`` when the
+    log reaches back far enough); the client catches up and retries.
+    """
     frappe.only_for(["System Manager", "All"])  # demo
-    if int(hard):
-        frappe.delete_doc("Notion Page", name)
-    else:
-        frappe.db.set_value("Notion Page", name, "is_archived", 1)
+
+    if isinstance(ops, str):
+        ops = frappe.parse_json(ops)
+
+    current = frappe.db.get_value(
+        "Notion Page", name, ["title", "workspace", "content_json", "content_version"], as_dict=True, for_update=True
+    )
+    if not current:
+        frappe.throw(f"Page {name} not found", frappe.DoesNotExistError)
+
+    version = cint(current.content_version)
+    missed = []
+    if cint(base_version) != version:
+        missed = oplog.ops_since(name, base_version, version) if cint(base_version) < version else None
+        if missed is None:
+            return {"ok": False, "conflict": True, "version": version, "missed": None}
+        changed = set().union(*(touched_blocks(e["ops"]) for e in missed))
+        if changed & touched_blocks(ops, anchors=True):
+            return {"ok": False, "conflict": True, "version": version, "missed": missed}
+
+    content = apply_ops(load_content(current.content_json), ops)
+    modified = now()
+
+    # Skip doc.save(): only the content columns change on a keystroke save
+    frappe.db.sql("""
+        UPDATE `tabNotion Page`
+        SET content_json = %s, content_version = %s, last_edited_by = %s,
+            last_edited_date = %s, modified = %s, modified_by = %s
+        WHERE name = %s
+    """, (codec.encode(json.dumps(content)), version + 1, frappe.session.user, modified, modified, frappe.session.user, name))
+    links.sync_page_links(name, content)
+    # Re-tokenizing the whole page on every keystroke is left to a deduplicated job
+    search.enqueue_reindex_page(name)
+    history.record_revision(name, current.content_json, content, version + 1)
+    oplog.append(name, version + 1, ops, client_id=client_id)
     frappe.db.commit()
-    return {"ok": True}
+
+    return {"ok": True, "modified": modified, "version": version + 1, "missed": missed}
+
+@frappe.whitelist()
+def get_page_ops(name: str, since: int):
+    """Logged operations of a page after version ``since``; ``reset`` when the client must reload."""
+    check_page_read_access(name)
+    version = cint(frappe.db.get_value("Notion Page", name, "content_version"))
+    entries = oplog.ops_since(name, since, version)
+    if entries is None:
+        return {"reset": True, "version": version}
+    return {"reset": False, "version": version, "ops": entries}
+
+@frappe.whitelist()
+def get_page_revisions(name: str, limit: int = 50, before: int = None):
+    """Revisions of a page, newest first; pass the last ``revision`` as ``before`` for older ones."""
+    check_page_read_access(name)
+    return history.list_revisions(name, limit=min(cint(limit) or 50, 200), before=before)
+
+@frappe.whitelist()
+def get_page_revision(name: str, revision: int):
+    """Content of a page as it was at ``revision``."""
+    check_page_read_access(name)
+    return {"name": name, "revision": cint(revision), "content": history.materialize(name, revision)}
 
 @frappe.whitelist()
 def get_backlinks(name: str):
     """Get pages that link to this page."""
     frappe.only_for(["System Manager", "All"])
-    
-    # Get all pages
-    pages = frappe.get_all(
-        "Notion Page",
-        filters={"is_archived": 0},
-        fields=["name", "title", "content_json"],
-    )
-    
-    backlinks = []
-    for page in pages:
-        try:
-            if page.content_json:
-                content = json.loads(page.content_json)
-                if isinstance(content, dict) and "blocks" in content:
-                    for block in content["blocks"]:
-                        text = block.get("text", "") or ""
-                        # Simple backlink detection - look for page name in content
-                        if name in text or page.name in text:
-                            backlinks.append({
-                                "name": page.name,
-                                "title": page.title,
-                                "modified": page.modified
-                            })
-                            break
-        except:
-            pass
-    
-    return backlinks
+    return links.get_backlinks(name)
+
+@frappe.whitelist()
+def get_forward_links(name: str):
+    """Get pages this page links to."""
+    frappe.only_for(["System Manager", "All"])
+    return links.get_forward_links(name)
 
 @frappe.whitelist()
 def get_comments(page_name: str):
@@ -567,92 +608,330 @@ def resolve_comment(comment_name: str):
 
 @frappe.whitelist()
 def delete_page(name: str, hard: int = 0):
-    """Delete a page (soft delete by default)."""
+    """Delete a page (soft delete by default).
+
+    A hard delete archives the page at once and removes it, with its comments,
+    collections, items and index rows, in a background job (see ``workbench.cascade``).
+    """
     frappe.only_for(["System Manager", "All"])
     
     if int(hard):
-        frappe.delete_doc("Notion Page", name)
+        frappe.has_permission("Notion Page", "delete", name, throw=True)
+        delete_cascade.enqueue_delete("page", name)
     else:
         frappe.db.set_value("Notion Page", name, "is_archived", 1)
+        search.remove_page(name)
     frappe.db.commit()
     return {"ok": True}
 
+@frappe.whitelist()
+def move_page(name: str, after: str = None, before: str = None):
+    """Place a page between two sidebar siblings; only the moved page is written."""
+    page = frappe.get_doc("Notion Page", name)
+    if not has_page_access(page, frappe.session.user, write=True):
+        frappe.throw("You don't have permission to move this page")
+
+    sort_key = ordering.move_key("Notion Page", page.workspace, after=after, before=before)
+    frappe.db.set_value("Notion Page", name, "sort_key", sort_key, update_modified=False)
+    frappe.db.commit()
+    return {"ok": True, "sort_key": sort_key}
+
 @frappe.whitelist()
 def move_page_to_workspace(page_name: str, workspace_name: str):
     """Move a page to a different workspace."""
     frappe.only_for(["System Manager", "All"])
     
     try:
-        # Update the page's workspace field
-        frappe.db.set_value("Notion Page", page_name, "workspace", workspace_name)
-        frappe.db.commit()
+        # Same path as bulk moves, so the page gets a title, order and sort key in the target
+        bulk_page_action([page_name], "move", workspace_name)
         return {"ok": True, "message": f"Page moved to workspace {workspace_name}"}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+BULK_PAGE_ACTIONS = ("archive", "restore", "move")
+
+@frappe.whitelist()
+def bulk_page_action(pages, action: str, workspace: str = None):
+    """Archive, restore or move (to ``workspace``) several pages in one transaction.
+
+    Every page must be editable by the user, else nothing changes. Each action is a
+    few set-based UPDATEs; restored and moved pages are appended to the end of their
+    workspace, with titles, ``page_order`` and sort keys assigned in one pass. All
+    pages get a new ``modified``, so cached reads of them are refreshed.
+    """
+    if isinstance(pages, str):
+        pages = frappe.parse_json(pages)
+    names = list(dict.fromkeys(pages or []))
+    if action not in BULK_PAGE_ACTIONS:
+        frappe.throw(f"Unsupported page action '{action}'")
+    if not names:
+        return {"ok": True, "updated": 0, "pages": []}
+
+    rows = frappe.db.sql(
+        """
+        SELECT name, title, workspace, visibility, company, created_by, sort_key, page_order, creation
+        FROM `tabNotion Page`
+        WHERE name IN %s
+        FOR UPDATE
+        """,
+        (names,),
+        as_dict=True,
+    )
+    missing = set(names) - {row.name for row in rows}
+    if missing:
+        frappe.throw(f"Pages not found: {', '.join(sorted(missing))}", frappe.DoesNotExistError)
+    denied = [row.name for row in rows if not has_page_access(row, frappe.session.user, write=True)]
+    if denied:
+        frappe.throw(f"You don't have permission to edit pages: {', '.join(sorted(denied))}", frappe.PermissionError)
+
+    user, timestamp = frappe.session.user, now()
+    if action == "archive":
+        frappe.db.sql(
+            """
+            UPDATE `tabNotion Page` SET is_archived = 1, modified = %s, modified_by = %s
+            WHERE name IN %s
+            """,
+            (timestamp, user, names),
+        )
+        frappe.db.delete("WB Search Token", {"page": ["in", names]})
+        updates = {row.name: {"workspace": row.workspace} for row in rows}
+    else:
+        if action == "move":
+            if not workspace:
+                frappe.throw("Target workspace is required")
+            ws = frappe.get_doc("Workbench Workspace", workspace)
+            if not has_workspace_access(ws, user, write=True):
+                frappe.throw("You don't have permission to create pages in this workspace")
+        # In sidebar order, so moved pages keep their relative order at the end of the target
+        rows.sort(key=lambda row: (row.workspace, row.sort_key or "", row.page_order or 0, row.creation, row.name))
+        updates = append_pages(rows, workspace if action == "move" else None)
+
+        cases, values = [], []
+        for field in ("workspace", "title", "page_order", "sort_key"):
+            cases.append(f"`{field}` = CASE name {' '.join(['WHEN %s THEN %s'] * len(updates))} END")
+            for name, update in updates.items():
+                values.extend([name, update[field]])
+        frappe.db.sql(
+            f"""
+            UPDATE `tabNotion Page`
+            SET {", ".join(cases)}{", is_archived = 0" if action == "restore" else ""}, modified = %s, modified_by = %s
+            WHERE name IN %s
+            """,
+            [*values, timestamp, user, names],
+        )
+        if action == "move":
+            # Search tokens carry the workspace
+            frappe.db.sql("UPDATE `tabWB Search Token` SET workspace = %s WHERE page IN %s", (workspace, names))
+        else:
+            # Archiving dropped the pages from the index: pages now, their items in the background
+            for page in frappe.db.sql(
+                "SELECT name, title, content_json, workspace FROM `tabNotion Page` WHERE name IN %s",
+                (names,),
+                as_dict=True,
+            ):
+                search.index_page(page.name, page.title, page.content_json, page.workspace)
+            frappe.enqueue(
+                "workbench.search.index_page_items",
+                queue="long",
+                pages=names,
+                enqueue_after_commit=True,
+            )
+
+    frappe.db.commit()
+    for name in names:
+        invalidate_page(name)
+    return {"ok": True, "updated": len(names), "pages": [{"name": name, **update} for name, update in updates.items()]}
+
+def append_pages(rows, target=None):
+    """New workspace, title, ``page_order`` and ``sort_key`` of pages appended to ``target`` (or their own workspace)."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(target or row.workspace, []).append(row)
+
+    updates = {}
+    for workspace, group in groups.items():
+        # Pages staying in their workspace keep their titles
+        moving = [row for row in group if row.workspace != workspace]
+        titles = dict(zip([row.name for row in moving], allocate_titles(workspace, [row.title for row in moving]), strict=True))
+        next_order = (frappe.db.sql(
+            "SELECT MAX(page_order) FROM `tabNotion Page` WHERE workspace = %s", (workspace,)
+        )[0][0] or 0) + 1
+        keys = ordering.keys_after(ordering.last_key("Notion Page", workspace), len(group))
+        for i, row in enumerate(group):
+            updates[row.name] = {
+                "workspace": workspace,
+                "title": titles.get(row.name, row.title),
+                "page_order": next_order + i,
+                "sort_key": keys[i],
+            }
+    return updates
+
 @frappe.whitelist()
-def delete_workspace(workspace_name: str):
-    """Delete a workspace (only if empty)."""
+def delete_workspace(workspace_name: str, cascade: int = 0):
+    """Delete a workspace in a background job (only if empty, unless ``cascade`` is set).
+
+    With ``cascade`` its pages go too, with everything that belongs to them. Follow
+    the job with ``get_delete_status("workspace", workspace_name)``.
+    """
     frappe.only_for(["System Manager", "All"])
     
     try:
+        # Permission first, so the emptiness check tells nothing to callers who may not delete
+        frappe.has_permission("Workbench Workspace", "delete", workspace_name, throw=True)
+        
         # Check if workspace has non-archived pages (same logic as get_workspace_pages)
-        pages = frappe.get_all("Notion Page", filters={"workspace": workspace_name, "is_archived": 0})
-        if pages:
+        if not cint(cascade) and frappe.db.exists("Notion Page", {"workspace": workspace_name, "is_archived": 0}):
             return {"ok": False, "error": "Cannot delete workspace with pages. Move or delete pages first."}
         
-        # Delete workspace
-        frappe.delete_doc("Workbench Workspace", workspace_name)
+        delete_cascade.enqueue_delete("workspace", workspace_name)
         frappe.db.commit()
-        return {"ok": True, "message": f"Workspace {workspace_name} deleted"}
+        return {"ok": True, "queued": True, "message": f"Workspace {workspace_name} is being deleted"}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+@frappe.whitelist()
+def get_delete_status(kind: str, name: str):
+    """Progress of the delete job of a page or workspace (``kind`` is "page" or "workspace").
+
+    Needs the delete permission that starting the job took; once the record is gone,
+    only the user who started the job can follow it.
+    """
+    doctype = {"page": "Notion Page", "workspace": "Workbench Workspace"}.get(kind)
+    if not doctype:
+        frappe.throw(f"Unsupported delete kind '{kind}'")
+    exists = frappe.db.exists(doctype, name)
+    if exists:
+        frappe.has_permission(doctype, "delete", name, throw=True)
+
+    progress = delete_cascade.get_progress(kind, name)
+    if not progress or (not exists and progress.get("user") != frappe.session.user):
+        return {"kind": kind, "name": name, "status": "Unknown"}
+    return progress
+
 @frappe.whitelist()
 def get_company_users():
     """Get users from the same company for assignees/collaborators."""
-    user_company = frappe.db.get_value("User", frappe.session.user, "company") or frappe.db.get_default("company")
-    
-    if not user_company:
-        return []
-    
-    users = frappe.get_all(
-        "User",
-        filters={"company": user_company, "enabled": 1},
-        fields=["name", "full_name", "email", "user_image"],
-        order_by="full_name asc"
-    )
-    
-    return users
+    return get_cached_company_users(user_company(frappe.session.user))
 
 @frappe.whitelist()
 def get_workspace_settings(workspace_name: str):
     """Get workspace settings."""
-    ws = frappe.get_doc("Workbench Workspace", workspace_name)
-    
+    ws = frappe.db.get_value(
+        "Workbench Workspace", workspace_name, ["name", "title", "description", "visibility", "company"], as_dict=True
+    )
+    if not ws:
+        frappe.throw(f"Workspace {workspace_name} not found", frappe.DoesNotExistError)
+
     # Check access
     if not has_workspace_access(ws, frappe.session.user, write=False):
         frappe.throw("You don't have access to this workspace")
-    
-    return {
-        "name": ws.name,
-        "title": ws.title,
-        "description": ws.description,
-        "visibility": ws.visibility,
-        "company": ws.company,
-        "collaborators": [
-            {
-                "user": c.user,
-                "access": c.access,
-                "user_name": frappe.db.get_value("User", c.user, "full_name")
-            }
-            for c in ws.collaborators
-        ]
+
+    ws["collaborators"] = frappe.db.sql("""
+        SELECT c.user, c.access, u.full_name AS user_name
+        FROM `tabWorkbench Workspace Collaborator` c
+        LEFT JOIN `tabUser` u ON u.name = c.user
+        WHERE c.parent = %s AND c.parenttype = 'Workbench Workspace'
+        ORDER BY c.idx
+    """, (workspace_name,), as_dict=True)
+    return ws
+
+BOOTSTRAP_PAGE_LIMIT = 50
+
+@frappe.whitelist()
+def get_bootstrap(workspace: str = None, page: str = None):
+    """Everything /workbench needs to render on open, in one response.
+
+    Returns the user's workspaces, and for the active one (``workspace`` when the
+    user can open it, else the first) its settings, the first ``BOOTSTRAP_PAGE_LIMIT``
+    sidebar pages with their ``next_cursor``, and the open page (``page``, else the
+    first in the sidebar) with the metadata and first items of its collections.
+    Workspaces, company users, the page payload and collections come from caches.
+    """
+    user = frappe.session.user
+    workspaces = get_cached_user_workspaces(user)
+    names = [w["name"] for w in workspaces]
+    if workspace not in names:
+        workspace = names[0] if names else None
+
+    data = {
+        "user": user,
+        "workspaces": workspaces,
+        "workspace": workspace,
+        "settings": None,
+        "pages": [],
+        "next_cursor": None,
+        "page": None,
+        "collections": [],
+        "company_users": get_cached_company_users(user_company(user)),
     }
+    if not workspace:
+        return data
+
+    data["settings"] = get_workspace_settings(workspace)
+    sidebar = get_workspace_pages(workspace, limit=BOOTSTRAP_PAGE_LIMIT)
+    data["pages"], data["next_cursor"] = sidebar["pages"], sidebar["next_cursor"]
+
+    page = page or (sidebar["pages"][0]["name"] if sidebar["pages"] else None)
+    if page:
+        check_page_read_access(page)
+        data["page"] = get_page(page)
+        data["collections"] = inline_page_collections(page)
+    return data
+
+@frappe.whitelist()
+def import_workspace(workspace: str, file_url: str, resume: str = None):
+    """Import a Markdown/CSV export zip (an uploaded File) into a workspace in the background.
+
+    Returns the WB Import to follow; its progress is also published as
+    ``workbench_import_progress``. Passing ``resume`` restarts a failed import from its checkpoint.
+    """
+    from workbench import importer
+
+    ws = frappe.get_doc("Workbench Workspace", workspace)
+    if not has_workspace_access(ws, frappe.session.user, write=True):
+        frappe.throw("You don't have permission to create pages in this workspace")
 
+    if resume:
+        job = frappe.get_doc("WB Import", resume)
+        if job.owner != frappe.session.user or job.workspace != workspace:
+            frappe.throw("You can only resume your own imports", frappe.PermissionError)
+    else:
+        # Only uploaded files the user may read, never arbitrary server paths
+        if not (file_url or "").startswith(("/files/", "/private/files/")):
+            frappe.throw("Upload the export zip first")
+        frappe.get_doc("File", {"file_url": file_url}).check_permission("read")
+        job = importer.create_import(workspace, file_url)
+    importer.enqueue_import(job.name)
+    frappe.db.commit()
+    return {"name": job.name, "status": job.status}
+
+@frappe.whitelist()
+def get_import_status(name: str):
+    """Progress of a WB Import started by the current user."""
+    job = frappe.db.get_value(
+        "WB Import",
+        name,
+        ["name", "owner", "workspace", "status", "phase", "processed", "total", "pages", "items", "error"],
+        as_dict=True,
+    )
+    if not job or job.owner != frappe.session.user:
+        frappe.throw(f"Import {name} not found", frappe.DoesNotExistError)
+    return job
 
-    # helpers
-    import uuid
+@frappe.whitelist()
+def export_workspace(workspace: str, format: str = "ndjson", include_archived: int = 0):
+    """Export a workspace (``ndjson`` or a Markdown/CSV ``zip``) in the background.
+
+    The file is written to a private File attached to the user's User; its URL is
+    published as ``workbench_export_ready`` when done. Only pages the user can see are included.
+    """
+    from workbench import exporter
+
+    ws = frappe.get_doc("Workbench Workspace", workspace)
+    if not has_workspace_access(ws, frappe.session.user):
+        frappe.throw("You don't have access to this workspace")
+    if format not in exporter.FORMATS:
+        frappe.throw(f"Unsupported export format '{format}'")
 
-    def _uuid():
-        return "b-" + uuid.uuid4().hex
+    exporter.enqueue_export(workspace, format, cint(include_archived))
+    return {"queued": True}
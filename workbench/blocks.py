@@ -0,0 +1,120 @@
+"""Helpers for the block list stored in Notion Page.content_json."""
+
+import json
+
+import frappe
+
+from workbench.codec import decode
+
+PATCH_OPS = ("insert", "update", "move", "delete")
+
+
+def load_content(content_json):
+	"""Parse content_json (plain or as stored) into a ``{"blocks": [...]}`` dict, tolerating empty values."""
+	if not content_json:
+		return {"blocks": []}
+	content = json.loads(decode(content_json)) if isinstance(content_json, str) else content_json
+	if not isinstance(content, dict):
+		frappe.throw("Invalid content_json")
+	content.setdefault("blocks", [])
+	return content
+
+
+def block_index(blocks, block_id):
+	for i, block in enumerate(blocks):
+		if block.get("id") == block_id:
+			return i
+	frappe.throw(f"Block {block_id} not found")
+
+
+def insert_position(blocks, after):
+	"""Index to insert at so the block lands right after ``after`` (``None`` = first)."""
+	if after in (None, ""):
+		return 0
+	return block_index(blocks, after) + 1
+
+
+def apply_ops(content, ops):
+	"""Apply block-level operations keyed by block ``id`` to ``content`` in place.
+
+	Supported operations::
+
+		{"op": "insert", "block": {...}, "after": "<id>" | None}
+		{"op": "update", "id": "<id>", "block": {<the whole new block>}}
+		{"op": "move", "id": "<id>", "after": "<id>" | None}
+		{"op": "delete", "id": "<id>"}
+	"""
+	blocks = content.setdefault("blocks", [])
+
+	for op in ops or []:
+		kind = op.get("op")
+		if kind not in PATCH_OPS:
+			frappe.throw(f"Unsupported block operation '{kind}'")
+
+		if kind == "insert":
+			block = op.get("block") or {}
+			if not block.get("id"):
+				frappe.throw("Inserted blocks need an id")
+			if any(b.get("id") == block["id"] for b in blocks):
+				frappe.throw(f"Block {block['id']} already exists")
+			blocks.insert(insert_position(blocks, op.get("after")), block)
+
+		elif kind == "update":
+			# The op carries the whole block: fields it lacks were removed by the editor
+			blocks[block_index(blocks, op.get("id"))] = {**(op.get("block") or {}), "id": op.get("id")}
+
+		elif kind == "move":
+			if op.get("after") == op.get("id"):
+				frappe.throw("A block cannot be moved after itself")
+			block = blocks.pop(block_index(blocks, op.get("id")))
+			blocks.insert(insert_position(blocks, op.get("after")), block)
+
+		elif kind == "delete":
+			blocks.pop(block_index(blocks, op.get("id")))
+
+	return content
+
+
+def diff_ops(old, new):
+	"""Operations turning the blocks of ``old`` into those of ``new`` (same scheme as the editor's diff).
+
+	Returns None when a block has no id, since such content cannot be addressed by operations.
+	"""
+	old_blocks, new_blocks = load_content(old)["blocks"], load_content(new)["blocks"]
+	if not all(isinstance(b, dict) and b.get("id") for b in old_blocks + new_blocks):
+		return None
+
+	ops = []
+	before = {b["id"]: b for b in old_blocks}
+	kept = {b["id"] for b in new_blocks}
+	order = []
+	for block in old_blocks:
+		if block["id"] in kept:
+			order.append(block["id"])
+		else:
+			ops.append({"op": "delete", "id": block["id"]})
+
+	for i, block in enumerate(new_blocks):
+		anchor = new_blocks[i - 1]["id"] if i else None
+		if block["id"] not in before:
+			ops.append({"op": "insert", "block": block, "after": anchor})
+			order.insert(i, block["id"])
+			continue
+		if order[i] != block["id"]:
+			ops.append({"op": "move", "id": block["id"], "after": anchor})
+			order.remove(block["id"])
+			order.insert(i, block["id"])
+		if before[block["id"]] != block:
+			ops.append({"op": "update", "id": block["id"], "block": block})
+	return ops
+
+
+def touched_blocks(ops, anchors=False):
+	"""Ids of the blocks ``ops`` change; with ``anchors``, also the blocks they position against."""
+	ids = set()
+	for op in ops or []:
+		ids.add(op.get("id") or (op.get("block") or {}).get("id"))
+		if anchors and op.get("after"):
+			ids.add(op["after"])
+	ids.discard(None)
+	return ids
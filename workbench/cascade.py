@@ -0,0 +1,208 @@
+"""Cascade delete of pages and workspaces with set-based statements in bounded batches.
+
+Deleting a page removes its comments, collaborators, collections with their items
+(bodies, typed values and search tokens included), links, search tokens, revisions
+and op log, and drops the references to it from the blocks of other pages.
+Deleting a workspace does that for every page of it, then removes its imports and
+the workspace itself.
+
+Rows are taken ``DELETE_BATCH_SIZE`` at a time in key order and each batch is removed
+with one statement per table, so a page with a 50k-item collection costs a few dozen
+short statements instead of one document delete per item. Running as a job
+(``enqueue_delete``), every batch is committed and the progress published as
+``workbench_delete_progress``; pages are archived right away so they leave the
+sidebar before the job runs.
+"""
+
+import frappe
+
+from workbench import links, search
+from workbench.workbench.inline_api.resolver import invalidate_items, invalidate_page
+
+DELETE_EVENT = "workbench_delete_progress"
+DELETE_BATCH_SIZE = 5000
+PAGE_BATCH_SIZE = 100
+PROGRESS_KEY = "workbench:delete:{}:{}"
+PROGRESS_TTL = 24 * 60 * 60
+
+# (doctype, column holding the page) of the rows that belong to a page
+PAGE_ROWS = (
+	("Notion Comment", "page_name"),
+	("WB Page Link", "source_page"),
+	("WB Page Link", "target_page"),
+	("WB Search Token", "page"),
+	("WB Page Revision", "page"),
+	("WB Page Op", "page"),
+)
+
+
+def batches(doctype, column, values, batch_size=DELETE_BATCH_SIZE, condition=""):
+	"""Names of the ``doctype`` rows with ``column`` in ``values``, ``batch_size`` at a time.
+
+	Walks the (column, name) index in name order; callers delete each batch before
+	asking for the next.
+	"""
+	after = ""
+	while names := frappe.db.sql_list(
+		f"""
+		SELECT name FROM `tab{doctype}`
+		WHERE `{column}` IN %s AND name > %s {condition}
+		ORDER BY name
+		LIMIT %s
+		""",
+		(list(values), after, batch_size),
+	):
+		yield names
+		after = names[-1]
+
+
+class Cascade:
+	"""Deletes rows batch by batch; ``on_batch(counts)`` runs after each one (to commit and report)."""
+
+	def __init__(self, on_batch=None):
+		self.on_batch = on_batch
+		self.counts = {"pages": 0, "collections": 0, "items": 0, "rows": 0}
+		# Set while a whole workspace goes, so its own pages are not unlinked one by one
+		self.workspace = None
+
+	def batch_done(self, kind, count):
+		self.counts[kind] += count
+		if self.on_batch:
+			self.on_batch(self.counts)
+
+	def delete_rows(self, doctype, column, values, condition=""):
+		for names in batches(doctype, column, values, condition=condition):
+			frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name IN %s", (names,))
+			self.batch_done("rows", len(names))
+
+	def delete_items(self, collections):
+		"""Items of ``collections`` with their bodies, typed values and search tokens."""
+		for names in batches("WB Inline Item", "collection", collections):
+			frappe.db.sql("DELETE FROM `tabWB Inline Item Body` WHERE name IN %s", (names,))
+			frappe.db.sql(
+				"""
+				DELETE v FROM `tabWB Inline Item Value` v
+				JOIN `tabWB Inline Item` i ON i.name = v.item
+				WHERE i.name IN %s
+				""",
+				(names,),
+			)
+			frappe.db.sql(
+				"""
+				DELETE t FROM `tabWB Search Token` t
+				JOIN `tabWB Inline Item` i ON i.name = t.source_name
+				WHERE t.source_type = %s AND i.name IN %s
+				""",
+				(search.ITEM, names),
+			)
+			frappe.db.sql("DELETE FROM `tabWB Inline Item` WHERE name IN %s", (names,))
+			self.batch_done("items", len(names))
+
+	def delete_collections(self, collections):
+		if not collections:
+			return
+		self.delete_items(collections)
+		# Values of items deleted before this service existed
+		self.delete_rows("WB Inline Item Value", "collection", collections)
+		frappe.db.sql("DELETE FROM `tabWB Inline Collection` WHERE name IN %s", (list(collections),))
+		for collection in collections:
+			frappe.db.after_commit.add(lambda collection=collection: invalidate_items(collection))
+		self.batch_done("collections", len(collections))
+
+	def delete_pages(self, pages):
+		"""Pages with everything that belongs to them, ``PAGE_BATCH_SIZE`` pages at a time."""
+		pages = list(pages)
+		for start in range(0, len(pages), PAGE_BATCH_SIZE):
+			chunk = pages[start : start + PAGE_BATCH_SIZE]
+			self.delete_collections(
+				frappe.get_all("WB Inline Collection", filters={"page": ["in", chunk]}, pluck="name")
+			)
+			# Blocks of other pages must not keep pointing at pages that are gone
+			links.unlink_pages(chunk, self.workspace)
+			for doctype, column in PAGE_ROWS:
+				self.delete_rows(doctype, column, chunk)
+			self.delete_rows(
+				"Workbench Page Collaborator", "parent", chunk, condition="AND parenttype = 'Notion Page'"
+			)
+			frappe.db.sql("DELETE FROM `tabNotion Page` WHERE name IN %s", (chunk,))
+			for page in chunk:
+				frappe.db.after_commit.add(lambda page=page: invalidate_page(page))
+			self.batch_done("pages", len(chunk))
+
+	def delete_workspace(self, workspace):
+		self.workspace = workspace
+		while chunk := frappe.db.sql_list(
+			"SELECT name FROM `tabNotion Page` WHERE workspace = %s ORDER BY name LIMIT %s",
+			(workspace, PAGE_BATCH_SIZE),
+		):
+			self.delete_pages(chunk)
+		self.delete_rows("WB Import", "workspace", [workspace])
+		if frappe.db.exists("Workbench Workspace", workspace):
+			# The document delete clears its collaborators and the access caches
+			frappe.delete_doc("Workbench Workspace", workspace, ignore_permissions=True)
+			self.batch_done("rows", 1)
+
+
+def progress_key(kind, name):
+	return PROGRESS_KEY.format(kind, name)
+
+
+def get_progress(kind, name):
+	return frappe.cache().get_value(progress_key(kind, name))
+
+
+def run_delete(kind, name, user=None):
+	"""Job body: delete page or workspace ``name``, committing and reporting after every batch."""
+	user = user or frappe.session.user
+	key = progress_key(kind, name)
+
+	def report(counts, status="Running"):
+		frappe.db.commit()
+		progress = {"kind": kind, "name": name, "status": status, "user": user, **counts}
+		frappe.cache().set_value(key, progress, expires_in_sec=PROGRESS_TTL)
+		frappe.publish_realtime(DELETE_EVENT, progress, user=user)
+
+	cascade = Cascade(on_batch=report)
+	try:
+		if kind == "page":
+			cascade.delete_pages([name])
+		else:
+			cascade.delete_workspace(name)
+	except Exception:
+		frappe.db.rollback()
+		report(cascade.counts, "Failed")
+		raise
+	report(cascade.counts, "Completed")
+	return cascade.counts
+
+
+def enqueue_delete(kind, name):
+	"""Delete page or workspace ``name`` in the background; a page is archived right away."""
+	if kind == "page":
+		frappe.db.set_value("Notion Page", name, "is_archived", 1)
+		search.remove_page(name)
+	frappe.cache().set_value(
+		progress_key(kind, name),
+		{
+			"kind": kind,
+			"name": name,
+			"status": "Queued",
+			"user": frappe.session.user,
+			"pages": 0,
+			"collections": 0,
+			"items": 0,
+			"rows": 0,
+		},
+		expires_in_sec=PROGRESS_TTL,
+	)
+	frappe.enqueue(
+		"workbench.cascade.run_delete",
+		queue="long",
+		timeout=2 * 60 * 60,
+		kind=kind,
+		name=name,
+		user=frappe.session.user,
+		job_id=f"workbench-delete-{kind}-{name}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
@@ -0,0 +1,153 @@
+"""Storage codec for large JSON payloads (the ``content_json`` columns).
+
+Payloads longer than ``COMPRESS_THRESHOLD`` characters are stored as ``HEADER``
+followed by base64 of their zlib-compressed UTF-8 text; base64 keeps them valid in
+the utf8mb4 Long Text columns. Values without the header are plain text, so rows
+written before the codec, or below the threshold, read unchanged.
+
+Documents get the codec from ``CompressedFieldsMixin``; raw SQL reads go through
+``decode`` (``blocks.load_content`` does this) and raw writes through ``encode``.
+"""
+
+import base64
+import time
+import zlib
+from contextlib import contextmanager
+
+import frappe
+
+HEADER = "wbz1:"
+COMPRESS_THRESHOLD = 8 * 1024
+COMPRESS_LEVEL = 6
+
+# doctype -> columns stored through the codec
+ENCODED_FIELDS = {
+	"Notion Page": ("content_json",),
+	"Notion Record": ("content_json",),
+	"WB Inline Item Body": ("content_json",),
+	"WB Page Revision": ("data_json",),
+}
+
+
+def is_encoded(value):
+	return isinstance(value, str) and value.startswith(HEADER)
+
+
+def encode(value):
+	"""Stored form of ``value``: compressed when large enough to be worth it."""
+	if not isinstance(value, str) or len(value) <= COMPRESS_THRESHOLD or is_encoded(value):
+		return value
+	packed = HEADER + base64.b64encode(zlib.compress(value.encode(), COMPRESS_LEVEL)).decode()
+	return packed if len(packed) < len(value) else value
+
+
+def decode(value):
+	"""Plain text of a stored value; plain values pass through untouched."""
+	if not is_encoded(value):
+		return value
+	return zlib.decompress(base64.b64decode(value[len(HEADER) :])).decode()
+
+
+class CompressedFieldsMixin:
+	"""Keep ``compressed_fields`` encoded in the database and plain on the document."""
+
+	compressed_fields = ("content_json",)
+
+	def load_from_db(self):
+		result = super().load_from_db()
+		for field in self.compressed_fields:
+			self.set(field, decode(self.get(field)))
+		return result
+
+	@contextmanager
+	def encoded_fields(self):
+		plain = {field: self.get(field) for field in self.compressed_fields}
+		for field, value in plain.items():
+			self.set(field, encode(value))
+		try:
+			yield
+		finally:
+			for field, value in plain.items():
+				self.set(field, value)
+
+	def db_insert(self, *args, **kwargs):
+		with self.encoded_fields():
+			return super().db_insert(*args, **kwargs)
+
+	def db_update(self):
+		with self.encoded_fields():
+			return super().db_update()
+
+
+def migrate(doctype, decompress=False, chunk_size=200):
+	"""Re-encode every stored payload of ``doctype`` (or decode them all with ``decompress``).
+
+	Returns ``{"rows", "rewritten", "bytes_before", "bytes_after"}``.
+	"""
+	stats = {"rows": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+	for field in ENCODED_FIELDS[doctype]:
+		last = ""
+		while rows := frappe.db.sql(
+			f"SELECT name, `{field}` AS value FROM `tab{doctype}` WHERE name > %s ORDER BY name LIMIT %s",
+			(last, chunk_size),
+			as_dict=True,
+		):
+			for row in rows:
+				stored = row.value or ""
+				new = decode(stored) if decompress else encode(decode(stored))
+				stats["rows"] += 1
+				stats["bytes_before"] += len(stored)
+				stats["bytes_after"] += len(new)
+				if new != stored:
+					frappe.db.set_value(doctype, row.name, field, new, update_modified=False)
+					stats["rewritten"] += 1
+			last = rows[-1].name
+			frappe.db.commit()
+	return stats
+
+
+def benchmark(doctype, limit=50):
+	"""Size and read latency of the ``limit`` largest payloads of ``doctype``, plain vs encoded.
+
+	Latency covers fetching the value from the database plus decoding it; the encoded
+	side is measured on a temporary table so stored rows are left alone.
+	"""
+	field = ENCODED_FIELDS[doctype][0]
+	rows = frappe.db.sql(
+		f"""SELECT name, `{field}` AS value FROM `tab{doctype}`
+		ORDER BY LENGTH(`{field}`) DESC LIMIT %s""",
+		(int(limit),),
+		as_dict=True,
+	)
+	plain = {row.name: decode(row.value or "") for row in rows}
+
+	frappe.db.sql_ddl("DROP TEMPORARY TABLE IF EXISTS `tmp_codec_benchmark`")
+	frappe.db.sql_ddl(
+		"CREATE TEMPORARY TABLE `tmp_codec_benchmark` (name VARCHAR(140) PRIMARY KEY, plain LONGTEXT, packed LONGTEXT)"
+	)
+	started = time.perf_counter()
+	packed = {name: encode(value) for name, value in plain.items()}
+	encode_seconds = time.perf_counter() - started
+	for name in plain:
+		frappe.db.sql(
+			"INSERT INTO `tmp_codec_benchmark` VALUES (%s, %s, %s)", (name, plain[name], packed[name])
+		)
+
+	def read_seconds(column):
+		started = time.perf_counter()
+		for name in plain:
+			decode(
+				frappe.db.sql(f"SELECT {column} FROM `tmp_codec_benchmark` WHERE name = %s", (name,))[0][0]
+			)
+		return time.perf_counter() - started
+
+	report = {
+		"rows": len(plain),
+		"plain_bytes": sum(len(v) for v in plain.values()),
+		"encoded_bytes": sum(len(v) for v in packed.values()),
+		"encode_seconds": encode_seconds,
+		"plain_read_seconds": read_seconds("plain"),
+		"encoded_read_seconds": read_seconds("packed"),
+	}
+	frappe.db.sql_ddl("DROP TEMPORARY TABLE IF EXISTS `tmp_codec_benchmark`")
+	return report
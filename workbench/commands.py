@@ -0,0 +1,172 @@
+import os
+import sys
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-link-index")
+@pass_context
+def rebuild_link_index(context):
+	"""Rebuild the page backlink index from existing page content."""
+	from workbench.links import rebuild_link_index
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		processed = rebuild_link_index()
+		click.echo(f"Indexed links for {processed} pages")
+	finally:
+		frappe.destroy()
+
+
+@click.command("rebuild-search-index")
+@pass_context
+def rebuild_search_index(context):
+	"""Rebuild the full-text search index for all pages and inline items."""
+	from workbench.search import rebuild_search_index
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		processed = rebuild_search_index()
+		click.echo(f"Indexed {processed} pages and items")
+	finally:
+		frappe.destroy()
+
+
+@click.command("rebuild-item-value-index")
+@click.option("--collection", help="Only rebuild this WB Inline Collection")
+@pass_context
+def rebuild_item_value_index(context, collection=None):
+	"""Rebuild the typed property index of inline items, per collection."""
+	from workbench.workbench.inline_api.prop_index import rebuild_collection
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		collections = [collection] if collection else frappe.get_all("WB Inline Collection", pluck="name")
+		for name in collections:
+			rebuild_collection(name)
+		click.echo(f"Indexed {len(collections)} collections")
+	finally:
+		frappe.destroy()
+
+
+@click.command("compress-content")
+@click.option("--doctype", help="Only this doctype (Notion Page, Notion Record or WB Inline Item Body)")
+@click.option("--decompress", is_flag=True, default=False, help="Store every payload as plain JSON again")
+@pass_context
+def compress_content(context, doctype=None, decompress=False):
+	"""Re-encode stored content_json payloads with the storage codec."""
+	from workbench.codec import ENCODED_FIELDS, migrate
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		for name in [doctype] if doctype else list(ENCODED_FIELDS):
+			stats = migrate(name, decompress=decompress)
+			click.echo(
+				f"{name}: rewrote {stats['rewritten']} of {stats['rows']} rows, "
+				f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+			)
+	finally:
+		frappe.destroy()
+
+
+@click.command("benchmark-content-codec")
+@click.option("--doctype", default="Notion Page", help="Doctype to sample")
+@click.option("--limit", default=50, help="Number of largest payloads to sample")
+@pass_context
+def benchmark_content_codec(context, doctype="Notion Page", limit=50):
+	"""Report payload size and read latency with and without the storage codec."""
+	from workbench.codec import benchmark
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		report = benchmark(doctype, limit=limit)
+		click.echo(f"{report['rows']} largest {doctype} payloads")
+		click.echo(f"size:    {report['plain_bytes']} bytes plain, {report['encoded_bytes']} bytes encoded")
+		click.echo(f"encode:  {report['encode_seconds'] * 1000:.1f} ms")
+		click.echo(
+			f"read:    {report['plain_read_seconds'] * 1000:.1f} ms plain, "
+			f"{report['encoded_read_seconds'] * 1000:.1f} ms encoded (fetch + decode)"
+		)
+	finally:
+		frappe.destroy()
+
+
+@click.command("import-workspace")
+@click.argument("path", required=False)
+@click.option("--workspace", help="Workbench Workspace to import into")
+@click.option("--resume", help="Resume this WB Import from its checkpoint")
+@pass_context
+def import_workspace(context, path=None, workspace=None, resume=None):
+	"""Import a Markdown/CSV export zip (Notion layout) into a workspace."""
+	from workbench.importer import create_import, run_import
+
+	if not resume and not (path and workspace):
+		raise click.UsageError("Pass the zip path and --workspace, or --resume")
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		frappe.set_user("Administrator")
+		name = resume or create_import(workspace, os.path.abspath(path)).name
+		click.echo(f"Import {name}")
+
+		def report(progress):
+			click.echo(
+				f"{progress['phase']}: {progress['processed']}/{progress['total']} "
+				f"({progress['pages']} pages, {progress['items']} items)"
+			)
+
+		job = run_import(name, on_progress=report)
+		click.echo(f"Import {name}: {job.status}")
+	finally:
+		frappe.destroy()
+
+
+@click.command("export-workspace")
+@click.argument("workspace")
+@click.argument("path")
+@click.option("--format", "export_format", type=click.Choice(["ndjson", "zip"]), default="ndjson")
+@click.option("--include-archived", is_flag=True, default=False, help="Also export archived pages and items")
+@pass_context
+def export_workspace(context, workspace, path, export_format="ndjson", include_archived=False):
+	"""Export a workspace to PATH ("-" for stdout) as NDJSON or a Markdown/CSV zip."""
+	from workbench.exporter import export_workspace
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if path == "-":
+			export_workspace(sys.stdout.buffer, workspace, export_format, include_archived)
+			return
+		with open(path, "wb") as out:
+			counts = export_workspace(out, workspace, export_format, include_archived)
+		click.echo(
+			f"Exported {counts['pages']} pages, {counts['collections']} collections, {counts['items']} items"
+		)
+	finally:
+		frappe.destroy()
+
+
+commands = [
+	rebuild_link_index,
+	rebuild_search_index,
+	rebuild_item_value_index,
+	compress_content,
+	benchmark_content_codec,
+	import_workspace,
+	export_workspace,
+]
@@ -0,0 +1,65 @@
+"""Keyset pagination: opaque continuation tokens and the WHERE clause that resumes after one.
+
+A list is ordered by a sequence of columns ending in a unique one (``name``). A token
+carries the order values of the last row returned, plus a fingerprint of the query it
+belongs to, so the next page starts with ``WHERE (order columns) > (those values)``
+and costs the same at row 50,000 as at row 50.
+"""
+
+import base64
+import hashlib
+import json
+
+import frappe
+
+
+def fingerprint(*parts):
+	return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def encode_cursor(values, scope):
+	"""Token for resuming after a row whose order values are ``values``."""
+	payload = json.dumps({"k": values, "s": scope}, default=str, separators=(",", ":"))
+	return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, scope):
+	"""Order values stored in ``token``; it must have been issued for the same ``scope``."""
+	try:
+		payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+		values, token_scope = payload["k"], payload["s"]
+	except Exception:
+		frappe.throw("Invalid pagination cursor")
+	if token_scope != scope or not isinstance(values, list):
+		frappe.throw("Pagination cursor does not belong to this query")
+	return values
+
+
+def keyset_condition(columns, cursor):
+	"""WHERE fragment matching the rows strictly after ``cursor`` in the order of ``columns``.
+
+	``columns`` is a list of ``(expr, expr_values, direction)``; NULLs sort first when
+	ascending and last when descending, as in MariaDB. Built from the last column back:
+	``after_i = gt_i OR (eq_i AND after_{i+1})``.
+	"""
+	if len(cursor) != len(columns):
+		frappe.throw("Pagination cursor does not belong to this query")
+
+	sql, values = None, []
+	for (expr, expr_values, direction), value in reversed(list(zip(columns, cursor, strict=True))):
+		descending = direction == "DESC"
+		if value is None:
+			gt, gt_values = ("1=0", []) if descending else (f"{expr} IS NOT NULL", [*expr_values])
+			eq, eq_values = f"{expr} IS NULL", [*expr_values]
+		else:
+			if descending:
+				gt, gt_values = f"({expr} < %s OR {expr} IS NULL)", [*expr_values, value, *expr_values]
+			else:
+				gt, gt_values = f"{expr} > %s", [*expr_values, value]
+			eq, eq_values = f"{expr} = %s", [*expr_values, value]
+
+		if sql is None:
+			sql, values = gt, gt_values
+		else:
+			sql, values = f"{gt} OR ({eq} AND ({sql}))", [*gt_values, *eq_values, *values]
+	return f"({sql})", values
@@ -0,0 +1,397 @@
+"""Streaming export of a workspace as NDJSON or as a Markdown/CSV zip.
+
+Pages, collections and items are read in keyset chunks (``CHUNK_SIZE`` rows, resuming
+after the last key read), and every chunk is written out before the next is fetched,
+so memory stays flat however large the workspace is. Stored payloads are decoded
+through ``workbench.codec``.
+
+NDJSON has one object per line: the workspace, then each page followed by its
+collections, each followed by its items (with their bodies)::
+
+	{"type": "page", "name": ..., "title": ..., "content": {"blocks": [...]}, ...}
+
+The zip uses the layout ``workbench.importer`` reads: ``<title> <page>.md`` per page,
+``<title> <page>/<collection>.csv`` per collection of the page, and item bodies as
+``<title> <page>/<collection>/<item title>.md``.
+"""
+
+import csv
+import io
+import json
+import os
+import posixpath
+import re
+import zipfile
+from urllib.parse import quote
+
+import frappe
+from frappe.utils import cint, get_files_path, now, strip_html
+
+from workbench import cursors
+from workbench.access import get_access
+from workbench.blocks import load_content
+from workbench.codec import decode
+from workbench.workbench.inline_api.query import parse_spec
+
+CHUNK_SIZE = 200
+ITEM_CHUNK_SIZE = 500
+EXPORT_EVENT = "workbench_export_ready"
+FORMATS = ("ndjson", "zip")
+
+PAGE_FIELDS = (
+	"name",
+	"title",
+	"page_order",
+	"sort_key",
+	"is_archived",
+	"visibility",
+	"company",
+	"created_by",
+	"last_edited_by",
+	"created_date",
+	"last_edited_date",
+	"content_version",
+)
+ITEM_ORDER = [("sort_key", [], "ASC"), ("name", [], "ASC")]
+UNSAFE = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def safe_name(title, fallback="Untitled"):
+	"""``title`` usable as a file name in the zip."""
+	return " ".join(UNSAFE.sub(" ", title or "").split())[:100] or fallback
+
+
+def page_path(page):
+	return f"{safe_name(page.title)} {page.name}"
+
+
+def block_text(block):
+	return strip_html(block.get("text") or block.get("content") or "").strip()
+
+
+def block_markdown(block):
+	block_type = block.get("type") or "paragraph"
+	text = block_text(block)
+	if block_type in ("heading1", "heading2", "heading3"):
+		return f"{'#' * int(block_type[-1])} {text}"
+	if block_type == "bulleted":
+		return f"- {text}"
+	if block_type == "numbered":
+		return f"1. {text}"
+	if block_type == "checklist":
+		return f"- [{'x' if block.get('checked') else ' '}] {text}"
+	if block_type == "quote":
+		return f"> {text}"
+	if block_type == "divider":
+		return "---"
+	if block_type == "code":
+		return f"```\n{block.get('content') or block.get('text') or ''}\n```"
+	if block_type == "image":
+		return f"![]({block.get('url') or block.get('content') or ''})"
+	return text
+
+
+def blocks_markdown(blocks, link=None):
+	"""Markdown for editor blocks; ``link(block)`` may give the line of a page or collection block."""
+	lines = [(link and link(block)) or block_markdown(block) for block in blocks]
+	return "\n\n".join(line for line in lines if line) + "\n"
+
+
+def cell(value):
+	"""CSV cell for a property value."""
+	if value is None:
+		return ""
+	if isinstance(value, list):
+		return ", ".join(str(v) for v in value)
+	if isinstance(value, dict):
+		return json.dumps(value)
+	return str(value)
+
+
+def title_property(schema):
+	for prop, spec in schema.items():
+		if (spec or {}).get("type") == "title":
+			return prop
+	return next(iter(schema), None)
+
+
+def iter_pages(workspace, include_archived=False, user=None):
+	"""Pages of ``workspace`` in name order, ``CHUNK_SIZE`` at a time; ``user`` limits them to what they can see."""
+	access = get_access(workspace, user) if user else None
+	after = ""
+	while True:
+		chunk = frappe.db.sql(
+			f"""
+			SELECT {", ".join(PAGE_FIELDS)}, content_json
+			FROM `tabNotion Page`
+			WHERE workspace = %s AND name > %s {"" if include_archived else "AND is_archived = 0"}
+			ORDER BY name
+			LIMIT %s
+			""",
+			(workspace, after, CHUNK_SIZE),
+			as_dict=True,
+		)
+		if not chunk:
+			return
+		after = chunk[-1].name
+		yield [page for page in chunk if not access or access.can_view_page(page)]
+
+
+def page_collections(pages):
+	"""``{page: [collection, ...]}`` for a chunk of pages."""
+	collections = {}
+	if pages:
+		for row in frappe.db.sql(
+			"""
+			SELECT name, page, block_id, schema_json, config_json, filters_json, sorts_json
+			FROM `tabWB Inline Collection`
+			WHERE page IN %s
+			ORDER BY page, name
+			""",
+			([page.name for page in pages],),
+			as_dict=True,
+		):
+			collections.setdefault(row.page, []).append(row)
+	return collections
+
+
+def iter_items(collection, include_archived=False, with_bodies=False):
+	"""Items of ``collection`` in list order, ``ITEM_CHUNK_SIZE`` at a time."""
+	after = None
+	while True:
+		conditions, values = ["i.collection = %s"], [collection]
+		if not include_archived:
+			conditions.append("i.is_archived = 0")
+		if after is not None:
+			keyset_sql, keyset_values = cursors.keyset_condition(
+				[(f"i.{column}", [], direction) for column, _values, direction in ITEM_ORDER], after
+			)
+			conditions.append(keyset_sql)
+			values.extend(keyset_values)
+		chunk = frappe.db.sql(
+			f"""
+			SELECT i.name, i.props_json, i.position, i.sort_key, i.is_archived,
+				{"b.content_json" if with_bodies else "NULL"} AS content_json
+			FROM `tabWB Inline Item` i
+			{"LEFT JOIN `tabWB Inline Item Body` b ON b.name = i.name" if with_bodies else ""}
+			WHERE {" AND ".join(conditions)}
+			ORDER BY i.sort_key, i.name
+			LIMIT %s
+			""",
+			[*values, ITEM_CHUNK_SIZE],
+			as_dict=True,
+		)
+		if not chunk:
+			return
+		after = [chunk[-1].sort_key, chunk[-1].name]
+		yield chunk
+
+
+def item_body(row):
+	return json.loads(decode(row.content_json)) if row.content_json else None
+
+
+def dump(record):
+	return json.dumps(record, default=str, separators=(",", ":")) + "\n"
+
+
+def write_ndjson(out, workspace, include_archived=False, user=None):
+	"""Write ``workspace`` to the binary file ``out`` as NDJSON; returns the counts written."""
+	counts = {"pages": 0, "collections": 0, "items": 0}
+	ws = frappe.db.get_value(
+		"Workbench Workspace",
+		workspace,
+		["name", "title", "description", "visibility", "company"],
+		as_dict=True,
+	)
+	out.write(dump({"type": "workspace", **ws}).encode())
+
+	for pages in iter_pages(workspace, include_archived, user):
+		collections = page_collections(pages)
+		for page in pages:
+			record = {k: page[k] for k in PAGE_FIELDS}
+			out.write(dump({"type": "page", **record, "content": load_content(page.content_json)}).encode())
+			counts["pages"] += 1
+			for collection in collections.get(page.name, []):
+				out.write(
+					dump(
+						{
+							"type": "collection",
+							"name": collection.name,
+							"page": page.name,
+							"block_id": collection.block_id,
+							"schema": parse_spec(collection.schema_json, {}),
+							"config": parse_spec(collection.config_json, {}),
+							"filters": parse_spec(collection.filters_json, []),
+							"sorts": parse_spec(collection.sorts_json, []),
+						}
+					).encode()
+				)
+				counts["collections"] += 1
+				for items in iter_items(collection.name, include_archived, with_bodies=True):
+					for item in items:
+						out.write(
+							dump(
+								{
+									"type": "item",
+									"name": item.name,
+									"collection": collection.name,
+									"props": parse_spec(item.props_json, {}),
+									"position": item.position,
+									"sort_key": item.sort_key,
+									"is_archived": item.is_archived,
+									"content": item_body(item),
+								}
+							).encode()
+						)
+					counts["items"] += len(items)
+	return counts
+
+
+def write_zip(out, workspace, include_archived=False, user=None):
+	"""Write ``workspace`` to the binary file ``out`` as a Markdown/CSV zip; returns the counts written."""
+	counts = {"pages": 0, "collections": 0, "items": 0}
+	access = get_access(workspace, user) if user else None
+	with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+		for pages in iter_pages(workspace, include_archived, user):
+			collections = page_collections(pages)
+			titles = linked_titles(pages, access)
+			for page in pages:
+				folder = page_path(page)
+				by_block = {}
+				for collection in collections.get(page.name, []):
+					by_block[collection.block_id] = f"{folder}/{collection_path(collection)}.csv"
+
+				def link(block, by_block=by_block):
+					if block.get("type") == "collection" and by_block.get(block.get("blockId")):
+						target = by_block[block["blockId"]]
+						return f"[{posixpath.splitext(posixpath.basename(target))[0]}]({quote(target)})"
+					if block.get("page") in titles:
+						target = f"{safe_name(titles[block['page']])} {block['page']}.md"
+						return f"[{block_text(block) or titles[block['page']]}]({quote(target)})"
+
+				content = load_content(page.content_json)
+				archive.writestr(
+					f"{folder}.md", f"# {page.title}\n\n{blocks_markdown(content['blocks'], link)}"
+				)
+				counts["pages"] += 1
+				for collection in collections.get(page.name, []):
+					counts["items"] += write_collection(
+						archive, by_block[collection.block_id], collection, include_archived
+					)
+					counts["collections"] += 1
+	return counts
+
+
+def collection_path(collection):
+	config = parse_spec(collection.config_json, {})
+	return f"{safe_name(config.get('title'), 'Collection')} {collection.name}"
+
+
+def linked_titles(pages, access=None):
+	"""Titles of the pages referenced from a chunk of pages (that ``access`` lets the user see)."""
+	refs = {
+		block["page"]
+		for page in pages
+		for block in load_content(page.content_json)["blocks"]
+		if isinstance(block.get("page"), str) and block["page"]
+	}
+	if not refs:
+		return {}
+	return {
+		row.name: row.title
+		for row in frappe.db.sql(
+			"""
+			SELECT name, title, visibility, company, created_by
+			FROM `tabNotion Page` WHERE name IN %s
+			""",
+			(list(refs),),
+			as_dict=True,
+		)
+		if not access or access.can_view_page(row)
+	}
+
+
+def write_collection(archive, path, collection, include_archived=False):
+	"""Write a collection's CSV, then the Markdown bodies of its items; returns the item count."""
+	schema = parse_spec(collection.schema_json, {})
+	title_prop = title_property(schema)
+	header = list(schema)
+	count = 0
+	with archive.open(path, "w") as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as text:
+		writer = csv.writer(text)
+		writer.writerow(header)
+		for items in iter_items(collection.name, include_archived):
+			for item in items:
+				props = parse_spec(item.props_json, {})
+				writer.writerow([cell(props.get(prop)) for prop in header])
+			count += len(items)
+
+	# Only one zip entry can be open at a time, so bodies come in a second pass
+	folder, used = posixpath.splitext(path)[0], set()
+	for items in iter_items(collection.name, include_archived, with_bodies=True):
+		for item in items:
+			body = item_body(item)
+			if not body or not body.get("blocks"):
+				continue
+			title = safe_name(cell(parse_spec(item.props_json, {}).get(title_prop)), item.name)
+			if title in used:
+				title = f"{title} {item.name}"
+			used.add(title)
+			archive.writestr(f"{folder}/{title}.md", f"# {title}\n\n{blocks_markdown(body['blocks'])}")
+	return count
+
+
+def export_workspace(out, workspace, format="ndjson", include_archived=False, user=None):
+	"""Write ``workspace`` to the binary file ``out``; ``user`` limits it to the pages they can see."""
+	if format not in FORMATS:
+		frappe.throw(f"Unsupported export format '{format}'")
+	writer = write_zip if format == "zip" else write_ndjson
+	return writer(out, workspace, include_archived=cint(include_archived), user=user)
+
+
+def run_export(workspace, format="ndjson", include_archived=False, user=None):
+	"""Export to a private File of ``user`` and tell them where it is.
+
+	The export holds the pages only ``user`` may see, so the File is owned by and
+	attached to their User rather than to the workspace, whose readers could open it.
+	"""
+	user = user or frappe.session.user
+	stamp = now()[:19].replace(" ", "-").replace(":", "")
+	file_name = f"{safe_name(workspace)}-{stamp}-{frappe.generate_hash(length=8)}.{format}"
+	path = get_files_path(file_name, is_private=True)
+	with open(path, "wb") as out:
+		counts = export_workspace(out, workspace, format, include_archived, user)
+
+	file = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+			"file_size": os.path.getsize(path),
+			"attached_to_doctype": "User",
+			"attached_to_name": user,
+		}
+	)
+	file.owner = user
+	file.insert(ignore_permissions=True)
+	frappe.db.commit()
+	frappe.publish_realtime(
+		EXPORT_EVENT, {"workspace": workspace, "file_url": file.file_url, **counts}, user=user
+	)
+	return file.file_url
+
+
+def enqueue_export(workspace, format="ndjson", include_archived=False):
+	frappe.enqueue(
+		"workbench.exporter.run_export",
+		queue="long",
+		timeout=4 * 60 * 60,
+		workspace=workspace,
+		format=format,
+		include_archived=include_archived,
+		user=frappe.session.user,
+		job_id=f"workbench-export-{workspace}-{frappe.session.user}",
+		deduplicate=True,
+	)
@@ -0,0 +1,296 @@
+"""Page version history (WB Page Revision): periodic full snapshots plus block-level deltas.
+
+Every content change of a Notion Page records a revision. Most revisions are deltas
+against the one before::
+
+	{"set": {key: block}, "drop": [key, ...], "after": {key: previous key or None}, "meta": {...}}
+
+``set`` holds new or changed blocks, ``drop`` removed ones and ``after`` the new
+predecessor of every block whose position changed (keys are block ids), so a delta
+grows with the edit rather than with the page. A full snapshot is written every
+``SNAPSHOT_INTERVAL`` revisions, or sooner once the deltas since the last snapshot
+outweigh it, which bounds the work needed to materialize any revision.
+
+Saves by the same user less than ``COALESCE_WINDOW`` seconds apart are folded into one
+revision (for at most ``MAX_REVISION_SPAN`` seconds), so a burst of autosaves becomes
+a single entry. Revision data is stored through ``workbench.codec``.
+"""
+
+import json
+
+import frappe
+from frappe.utils import cint, get_datetime, now_datetime
+
+from workbench.blocks import load_content
+from workbench.codec import decode, encode
+
+SNAPSHOT_INTERVAL = 50
+COALESCE_WINDOW = 30
+MAX_REVISION_SPAN = 10 * 60
+
+SNAPSHOT, DELTA = "Snapshot", "Delta"
+MISSING = object()
+
+
+def dump(value):
+	return json.dumps(value, separators=(",", ":"))
+
+
+def split_content(content):
+	"""``(blocks, after, meta)``: blocks and predecessors by key, and the non-block keys."""
+	content = load_content(content)
+	blocks, after, previous = {}, {}, None
+	for i, block in enumerate(content["blocks"]):
+		key = block.get("id") if isinstance(block, dict) else None
+		# Blocks without (or with a repeated) id are keyed by position
+		if not key or key in blocks:
+			key = f"#{i}"
+		blocks[key] = block
+		after[key] = previous
+		previous = key
+	meta = {k: v for k, v in content.items() if k != "blocks"}
+	return blocks, after, meta
+
+
+def join_content(blocks, after, meta):
+	"""Inverse of ``split_content``: walk the predecessor chain from the first block."""
+	following = {previous: key for key, previous in after.items()}
+	ordered, seen = [], set()
+	key = following.get(None)
+	while key is not None and key not in seen:
+		seen.add(key)
+		ordered.append(key)
+		key = following.get(key)
+	# A broken chain should not lose blocks
+	ordered.extend(key for key in blocks if key not in seen)
+	return {**meta, "blocks": [blocks[key] for key in ordered if key in blocks]}
+
+
+def diff(old, new):
+	"""Delta turning the split content ``old`` into ``new``."""
+	old_blocks, old_after, old_meta = old
+	new_blocks, new_after, new_meta = new
+	delta = {}
+	changed = {key: block for key, block in new_blocks.items() if old_blocks.get(key, MISSING) != block}
+	dropped = [key for key in old_blocks if key not in new_blocks]
+	moved = {key: previous for key, previous in new_after.items() if old_after.get(key, MISSING) != previous}
+	if changed:
+		delta["set"] = changed
+	if dropped:
+		delta["drop"] = dropped
+	if moved:
+		delta["after"] = moved
+	if new_meta != old_meta:
+		delta["meta"] = new_meta
+	return delta
+
+
+def apply_delta(state, delta):
+	"""Apply ``delta`` to the split content ``state`` in place."""
+	blocks, after, meta = state
+	for key in delta.get("drop", []):
+		blocks.pop(key, None)
+		after.pop(key, None)
+	blocks.update(delta.get("set", {}))
+	after.update(delta.get("after", {}))
+	if "meta" in delta:
+		meta.clear()
+		meta.update(delta["meta"])
+	return state
+
+
+def compose(first, second):
+	"""One delta with the effect of ``first`` followed by ``second``."""
+	dropped = set(second.get("drop", []))
+	blocks = {key: block for key, block in first.get("set", {}).items() if key not in dropped}
+	blocks.update(second.get("set", {}))
+	after = {key: previous for key, previous in first.get("after", {}).items() if key not in dropped}
+	after.update(second.get("after", {}))
+	drop = [key for key in first.get("drop", []) if key not in dropped and key not in blocks]
+	drop.extend(dropped)
+
+	delta = {}
+	if blocks:
+		delta["set"] = blocks
+	if drop:
+		delta["drop"] = drop
+	if after:
+		delta["after"] = after
+	if "meta" in second or "meta" in first:
+		delta["meta"] = second.get("meta", first.get("meta"))
+	return delta
+
+
+def latest_revision(page):
+	rows = frappe.db.sql(
+		"""
+		SELECT name, revision, kind, base_revision, content_version, data_json,
+			size, edited_by, started_at, edited_at
+		FROM `tabWB Page Revision`
+		WHERE page = %s
+		ORDER BY revision DESC
+		LIMIT 1
+		""",
+		(page,),
+		as_dict=True,
+	)
+	return rows[0] if rows else None
+
+
+def needs_snapshot(page, latest, size):
+	"""Whether the next revision should be a snapshot rather than a ``size``-long delta."""
+	count, delta_size, snapshot_size = frappe.db.sql(
+		"""
+		SELECT COUNT(*) - 1, COALESCE(SUM(IF(revision > %(base)s, size, 0)), 0),
+			MAX(IF(revision = %(base)s, size, 0))
+		FROM `tabWB Page Revision`
+		WHERE page = %(page)s AND revision >= %(base)s
+		""",
+		{"page": page, "base": latest.base_revision},
+	)[0]
+	return count + 1 >= SNAPSHOT_INTERVAL or delta_size + size > cint(snapshot_size)
+
+
+def record_revision(page, before, after, version, user=None):
+	"""Record the change of ``page`` content from ``before`` to ``after`` (now at ``version``).
+
+	``before`` and ``after`` may be stored strings or parsed content. Callers hold the
+	page row lock, so revisions of one page are written one at a time.
+	"""
+	user = user or frappe.session.user
+	timestamp = now_datetime()
+	version = cint(version)
+	latest = latest_revision(page)
+
+	# The chain only continues when the latest revision holds the content being replaced
+	if not latest or cint(latest.content_version) != version - 1:
+		return insert_revision(page, latest, SNAPSHOT, dump(load_content(after)), version, user, timestamp)
+
+	delta = diff(split_content(before), split_content(after))
+	if not delta:
+		# Same blocks under a new version: keep the chain continuous
+		frappe.db.set_value(
+			"WB Page Revision", latest.name, "content_version", version, update_modified=False
+		)
+		return latest.revision
+
+	if (
+		latest.edited_by == user
+		and (timestamp - get_datetime(latest.edited_at)).total_seconds() < COALESCE_WINDOW
+		and (timestamp - get_datetime(latest.started_at)).total_seconds() < MAX_REVISION_SPAN
+	):
+		if latest.kind == SNAPSHOT:
+			data = dump(load_content(after))
+		else:
+			data = dump(compose(json.loads(decode(latest.data_json)), delta))
+		stored = encode(data)
+		frappe.db.sql(
+			"""
+			UPDATE `tabWB Page Revision`
+			SET data_json = %s, size = %s, content_version = %s, edited_at = %s, modified = %s
+			WHERE name = %s
+			""",
+			(stored, len(stored), version, timestamp, timestamp, latest.name),
+		)
+		return latest.revision
+
+	data = dump(delta)
+	if needs_snapshot(page, latest, len(encode(data))):
+		return insert_revision(page, latest, SNAPSHOT, dump(load_content(after)), version, user, timestamp)
+	return insert_revision(page, latest, DELTA, data, version, user, timestamp)
+
+
+def insert_revision(page, latest, kind, data, version, user, timestamp):
+	revision = cint(latest.revision) + 1 if latest else 1
+	stored = encode(data)
+	frappe.db.bulk_insert(
+		"WB Page Revision",
+		[
+			"name",
+			"page",
+			"revision",
+			"kind",
+			"base_revision",
+			"content_version",
+			"data_json",
+			"size",
+			"edited_by",
+			"started_at",
+			"edited_at",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+		],
+		[
+			(
+				frappe.generate_hash(length=10),
+				page,
+				revision,
+				kind,
+				revision if kind == SNAPSHOT else latest.base_revision,
+				version,
+				stored,
+				len(stored),
+				user,
+				timestamp,
+				timestamp,
+				timestamp,
+				timestamp,
+				user,
+				user,
+			)
+		],
+	)
+	return revision
+
+
+def list_revisions(page, limit=50, before=None):
+	"""Revisions of ``page``, newest first, without their data; ``before`` pages further back."""
+	return frappe.db.sql(
+		f"""
+		SELECT revision, kind, content_version, size, edited_by, started_at, edited_at
+		FROM `tabWB Page Revision`
+		WHERE page = %s {"AND revision < %s" if before else ""}
+		ORDER BY revision DESC
+		LIMIT %s
+		""",
+		(page, cint(before), cint(limit)) if before else (page, cint(limit)),
+		as_dict=True,
+	)
+
+
+def materialize(page, revision):
+	"""Full content of ``page`` as of ``revision``: its base snapshot plus the deltas after it."""
+	base = frappe.db.get_value(
+		"WB Page Revision", {"page": page, "revision": cint(revision)}, "base_revision"
+	)
+	if base is None:
+		frappe.throw(f"Revision {revision} of page {page} not found", frappe.DoesNotExistError)
+
+	rows = frappe.db.sql(
+		"""
+		SELECT kind, data_json FROM `tabWB Page Revision`
+		WHERE page = %s AND revision BETWEEN %s AND %s
+		ORDER BY revision
+		""",
+		(page, base, cint(revision)),
+		as_dict=True,
+	)
+	state = None
+	for row in rows:
+		data = json.loads(decode(row.data_json))
+		state = split_content(data) if row.kind == SNAPSHOT else apply_delta(state, data)
+	return join_content(*state)
+
+
+def on_page_update(doc, method=None):
+	if doc.has_value_changed("content_json"):
+		previous = doc.get_doc_before_save()
+		record_revision(
+			doc.name, previous.content_json if previous else None, doc.content_json, doc.content_version
+		)
+
+
+def on_page_trash(doc, method=None):
+	frappe.db.delete("WB Page Revision", {"page": doc.name})
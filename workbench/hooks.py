@@ -20,10 +20,44 @@ web_include_css = ["/assets/workbench/css/workbench.css"]
 
 doc_events = {
 	"WB Inline Collection": {
-		"on_trash": "workbench.api.inline_collection.cleanup_collection_items"
-	}
+		"after_insert": "workbench.workbench.inline_api.resolver.on_collection_change",
+		"on_update": "workbench.workbench.inline_api.resolver.on_collection_change",
+		"on_trash": [
+			"workbench.workbench.inline_api.inline_collection.cleanup_collection_items",
+			"workbench.workbench.inline_api.resolver.on_collection_change",
+		],
+	},
+	"WB Inline Item": {
+		"on_update": "workbench.workbench.inline_api.resolver.on_item_change",
+		"on_trash": "workbench.workbench.inline_api.resolver.on_item_change",
+	},
+	"Notion Page": {
+		"on_update": [
+			"workbench.links.on_page_update",
+			"workbench.search.on_page_update",
+			"workbench.history.on_page_update",
+			"workbench.oplog.on_page_update",
+			"workbench.workbench.inline_api.resolver.on_page_update",
+		],
+		"on_trash": [
+			"workbench.links.on_page_trash",
+			"workbench.search.on_page_trash",
+			"workbench.history.on_page_trash",
+			"workbench.oplog.on_page_trash",
+			"workbench.workbench.inline_api.resolver.on_page_trash",
+		],
+	},
+	# Collaborators are child rows without hooks of their own; the parent's cover them
+	"Workbench Workspace": {
+		"after_insert": "workbench.access.on_workspace_change",
+		"on_update": "workbench.access.on_workspace_change",
+		"on_trash": "workbench.access.on_workspace_change",
+	},
 }
 
+# Index rows are cleaned up by the Notion Page on_trash hooks
+ignore_links_on_delete = ["WB Page Link", "WB Search Token", "WB Inline Item Value", "WB Inline Item Body", "WB Page Revision", "WB Page Op"]
+
 # Apps
 # ------------------
 
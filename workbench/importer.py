@@ -0,0 +1,615 @@
+"""Streaming import of Markdown/CSV zip exports (Notion export layout) into a workspace.
+
+Every ``Title <id>.md`` of the zip is a page, with its sub-pages in a ``Title <id>/``
+folder; every ``Name <id>.csv`` is a database, with one Markdown page per row in a
+``Name <id>/`` folder. Pages are flattened into the workspace. A database becomes a
+WB Inline Collection on the page that contains it (or on a page of its own at the top
+level), its rows WB Inline Items and its row pages their bodies. Attachments are not
+imported.
+
+An import (WB Import) runs in three phases over the sorted zip entries, so no more
+than one batch of content is held in memory at a time:
+
+1. ``pages``: create the page rows (title and ``import_key``) in multi-row inserts,
+   with their names reserved from the naming series in one update;
+2. ``content``: write page content in one update per batch, resolving links between
+   pages by ``import_key``;
+3. ``collections``: stream each CSV into items, ``ROW_BATCH_SIZE`` rows at a time.
+
+Every batch is committed together with the import's checkpoint (phase, entry index
+and CSV row), so a failed or interrupted import resumes where it stopped.
+"""
+
+import csv
+import io
+import json
+import posixpath
+import re
+import uuid
+import zipfile
+from itertools import islice
+from urllib.parse import unquote
+
+import frappe
+from frappe.utils import cint, now
+
+from workbench import search
+from workbench.blocks import load_content
+from workbench.codec import encode
+from workbench.links import sync_page_links
+from workbench.ordering import keys_after, last_key
+from workbench.titles import allocate_titles
+from workbench.workbench.inline_api.item_body import save_bodies
+from workbench.workbench.inline_api.prop_index import sync_item_values
+from workbench.workbench.inline_api.resolver import invalidate_items, invalidate_page
+
+IMPORT_EVENT = "workbench_import_progress"
+PAGE_BATCH_SIZE = 200
+ROW_BATCH_SIZE = 500
+PHASES = ("pages", "content", "collections")
+
+NOTION_ID = re.compile(r"^(.*?)\s+([0-9a-f]{32})$")
+LINK = re.compile(r"!?\[([^\]]*)\]\(([^)\s]+)\)")
+LINK_LINE = re.compile(r"^(!?)\[([^\]]*)\]\(([^)\s]+)\)$")
+HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+CHECKLIST = re.compile(r"^[-*+]\s+\[([ xX])\]\s*(.*)$")
+BULLETED = re.compile(r"^[-*+]\s+(.*)$")
+NUMBERED = re.compile(r"^\d+[.)]\s+(.*)$")
+QUOTE = re.compile(r"^>\s?(.*)$")
+DIVIDER = re.compile(r"^(-{3,}|\*{3,}|_{3,})$")
+# "format:PAGE-{#####}": the series key and the digits of its counter
+PAGE_SERIES = re.compile(r"^format:(.*)\{(#+)\}$")
+
+
+def split_stem(path):
+	"""``(title, key)`` of an entry: the Notion id is the key when the file name carries one."""
+	stem = posixpath.splitext(path)[0]
+	name = posixpath.basename(stem)
+	if name.endswith("_all"):
+		# Newer exports add "<name>_all.csv" next to the filtered view of a database
+		stem, name = stem[:-4], name[:-4]
+	match = NOTION_ID.match(name)
+	if match:
+		return match.group(1).strip(), match.group(2)
+	return name.strip(), stem
+
+
+def new_block(block_type, content="", **extra):
+	return {"id": str(uuid.uuid4()), "type": block_type, "content": content, **extra}
+
+
+def collection_block_id(job, key):
+	"""Block id of database ``key``; block ids are unique site-wide, so they carry the import."""
+	return f"import-{job}-{key}"
+
+
+def collection_block(block_id):
+	return {"id": str(uuid.uuid4()), "type": "collection", "blockId": block_id, "viewType": "table"}
+
+
+def inline_text(text):
+	"""Markdown inline text with links reduced to their labels."""
+	return LINK.sub(lambda m: m.group(1), text)
+
+
+def markdown_blocks(text, link=None):
+	"""Editor blocks of a Markdown document.
+
+	``link(href, label)`` may turn a line holding a single link into a block of its
+	own (a page reference or a database); it returns None to keep the line as text.
+	"""
+	blocks, paragraph, code = [], [], None
+
+	def flush():
+		if paragraph:
+			blocks.append(new_block("paragraph", " ".join(paragraph)))
+			paragraph.clear()
+
+	for line in text.splitlines():
+		stripped = line.strip()
+		if code is not None:
+			if stripped.startswith("```"):
+				blocks.append(new_block("code", "\n".join(code)))
+				code = None
+			else:
+				code.append(line)
+			continue
+		if stripped.startswith("```"):
+			flush()
+			code = []
+			continue
+		if not stripped:
+			flush()
+			continue
+
+		only_link = LINK_LINE.match(stripped)
+		if only_link:
+			image, label, href = only_link.groups()
+			block = new_block("image", unquote(href)) if image else (link(href, label) if link else None)
+			if block:
+				flush()
+				blocks.append(block)
+				continue
+
+		if match := HEADING.match(stripped):
+			block = new_block(f"heading{min(len(match.group(1)), 3)}", inline_text(match.group(2)))
+		elif match := CHECKLIST.match(stripped):
+			block = new_block("checklist", inline_text(match.group(2)), checked=match.group(1) != " ")
+		elif DIVIDER.match(stripped):
+			block = new_block("divider")
+		elif match := BULLETED.match(stripped):
+			block = new_block("bulleted", inline_text(match.group(1)))
+		elif match := NUMBERED.match(stripped):
+			block = new_block("numbered", inline_text(match.group(1)))
+		elif match := QUOTE.match(stripped):
+			block = new_block("quote", inline_text(match.group(1)))
+		else:
+			paragraph.append(inline_text(stripped))
+			continue
+		flush()
+		blocks.append(block)
+
+	if code is not None:
+		blocks.append(new_block("code", "\n".join(code)))
+	flush()
+	return blocks
+
+
+def page_blocks(text, title, link=None):
+	"""Blocks of an exported page, without the heading that repeats its title."""
+	blocks = markdown_blocks(text, link)
+	if blocks and blocks[0]["type"] == "heading1" and blocks[0]["content"].strip() == title:
+		blocks = blocks[1:]
+	return blocks
+
+
+def csv_schema(header):
+	"""Collection schema for a CSV header: the first column is the title, the rest text."""
+	schema = {}
+	for i, column in enumerate(header):
+		schema[column] = {"type": "title" if i == 0 else "text"}
+	return schema
+
+
+class ExportLayout:
+	"""Pages and databases of an export zip, from its entry names."""
+
+	def __init__(self, names):
+		self.names = set(names)
+		databases = {}
+		for name in sorted(self.names):
+			if name.endswith(".csv"):
+				# Prefer "<name>_all.csv", which holds every row
+				base = posixpath.splitext(name)[0].removesuffix("_all")
+				if base not in databases or name.endswith("_all.csv"):
+					databases[base] = name
+		self.databases = sorted(databases.values())
+		# Row pages by database folder and row title; everything else is a page
+		self.rows = {folder: {} for folder in databases}
+		markdown = []
+		for name in sorted(self.names):
+			if not name.endswith(".md"):
+				continue
+			folder = posixpath.dirname(name)
+			if folder in self.rows:
+				self.rows[folder][split_stem(name)[0]] = name
+			else:
+				markdown.append(name)
+
+		# (key, title, entry) of every page: exported pages, then a page per top-level database
+		self.pages = [(split_stem(name)[1], split_stem(name)[0], name) for name in markdown]
+		self.pages.extend(
+			(f"db:{split_stem(name)[1]}", split_stem(name)[0], name)
+			for name in self.databases
+			if self.parent_key(name) is None
+		)
+
+	def parent_key(self, path):
+		"""Key of the exported page whose folder holds ``path``, if any."""
+		folder = posixpath.dirname(path)
+		if not folder or f"{folder}.md" not in self.names:
+			return None
+		return split_stem(f"{folder}.md")[1]
+
+	def database_page_key(self, path):
+		return self.parent_key(path) or f"db:{split_stem(path)[1]}"
+
+	def row_pages(self, path):
+		"""``{row title: entry}`` of the row pages of the database at ``path``."""
+		return self.rows.get(posixpath.splitext(path)[0].removesuffix("_all"), {})
+
+	def resolve(self, source, href):
+		"""Entry a relative link of ``source`` points to, or None for links outside the zip."""
+		if "://" in href or href.startswith(("#", "mailto:")):
+			return None
+		target = posixpath.normpath(posixpath.join(posixpath.dirname(source), unquote(href)))
+		return target if target in self.names else None
+
+
+def import_key(job, key):
+	"""Stored ``import_key`` of export key ``key``; it carries the import, as re-imports reuse export ids."""
+	return f"{job}:{key}"
+
+
+def page_names(workspace, job, keys):
+	"""``{key: page}`` of the pages import ``job`` created in ``workspace`` for the export keys ``keys``."""
+	if not keys:
+		return {}
+	scoped = {import_key(job, key): key for key in keys}
+	return {
+		scoped[stored]: name
+		for stored, name in frappe.db.sql(
+			"SELECT import_key, name FROM `tabNotion Page` WHERE workspace = %s AND import_key IN %s",
+			(workspace, list(scoped)),
+		)
+	}
+
+
+def reserve_page_names(count):
+	"""``count`` consecutive Notion Page names, taken from the page naming series in one update."""
+	prefix, digits = PAGE_SERIES.match(frappe.get_meta("Notion Page").autoname).groups()
+	current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE name = %s FOR UPDATE", (prefix,))
+	if current:
+		frappe.db.sql("UPDATE `tabSeries` SET `current` = `current` + %s WHERE name = %s", (count, prefix))
+	else:
+		frappe.db.sql("INSERT INTO `tabSeries` (name, `current`) VALUES (%s, %s)", (prefix, count))
+	start = cint(current[0][0]) if current else 0
+	return [f"{prefix}{number:0{len(digits)}d}" for number in range(start + 1, start + count + 1)]
+
+
+class Importer:
+	def __init__(self, job, archive, on_progress=None):
+		self.job = job
+		self.archive = archive
+		self.layout = ExportLayout(archive.namelist())
+		self.on_progress = on_progress
+		self.user = job.owner
+		self.workspace = job.workspace
+
+	def run(self):
+		if not self.job.total:
+			self.job.total = 2 * len(self.layout.pages) + len(self.layout.databases)
+		phase = self.job.phase or PHASES[0]
+		for name in PHASES[PHASES.index(phase) :]:
+			if self.job.phase != name:
+				self.save_checkpoint(phase=name, checkpoint=0, row_checkpoint=0)
+			getattr(self, f"import_{name}")()
+		self.save_checkpoint(status="Completed")
+
+	def save_checkpoint(self, **values):
+		"""Record progress and commit it together with the batch it covers."""
+		self.job.update(values)
+		frappe.db.set_value(
+			"WB Import",
+			self.job.name,
+			{
+				field: self.job.get(field)
+				for field in (
+					"status",
+					"phase",
+					"checkpoint",
+					"row_checkpoint",
+					"total",
+					"processed",
+					"pages",
+					"items",
+				)
+			},
+		)
+		frappe.db.commit()
+		progress = {
+			field: self.job.get(field)
+			for field in ("status", "phase", "processed", "total", "pages", "items")
+		}
+		frappe.publish_realtime(IMPORT_EVENT, {"import": self.job.name, **progress}, user=self.user)
+		if self.on_progress:
+			self.on_progress(progress)
+
+	def batches(self, entries, size):
+		"""``(end, batch)`` chunks of ``entries`` from the checkpoint on."""
+		for start in range(cint(self.job.checkpoint), len(entries), size):
+			yield min(start + size, len(entries)), entries[start : start + size]
+
+	def read(self, entry):
+		return self.archive.read(entry).decode("utf-8", "replace")
+
+	def import_pages(self):
+		for end, batch in self.batches(self.layout.pages, PAGE_BATCH_SIZE):
+			self.insert_pages(batch)
+			self.save_checkpoint(checkpoint=end, processed=cint(self.job.processed) + len(batch))
+
+	def insert_pages(self, batch):
+		timestamp = now()
+		rows = []
+		titles = allocate_titles(self.workspace, [title for _key, title, _entry in batch])
+		names = reserve_page_names(len(batch))
+		first_order = (
+			frappe.db.sql(
+				"SELECT MAX(page_order) FROM `tabNotion Page` WHERE workspace = %s", (self.workspace,)
+			)[0][0]
+			or 0
+		) + 1
+		sort_keys = keys_after(last_key("Notion Page", self.workspace), len(batch))
+		for i, ((key, _title, _entry), title, name) in enumerate(zip(batch, titles, names, strict=True)):
+			rows.append(
+				(
+					name,
+					self.workspace,
+					title,
+					import_key(self.job.name, key),
+					first_order + i,
+					sort_keys[i],
+					0,
+					"Use Workspace",
+					json.dumps({"blocks": []}),
+					0,
+					self.user,
+					self.user,
+					timestamp,
+					timestamp,
+					timestamp,
+					timestamp,
+					self.user,
+					self.user,
+				)
+			)
+		frappe.db.bulk_insert(
+			"Notion Page",
+			[
+				"name",
+				"workspace",
+				"title",
+				"import_key",
+				"page_order",
+				"sort_key",
+				"is_archived",
+				"visibility",
+				"content_json",
+				"content_version",
+				"created_by",
+				"last_edited_by",
+				"created_date",
+				"last_edited_date",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+			],
+			rows,
+		)
+		self.job.pages = cint(self.job.pages) + len(rows)
+
+	def import_content(self):
+		for end, batch in self.batches(self.layout.pages, PAGE_BATCH_SIZE):
+			self.write_content(batch)
+			self.save_checkpoint(checkpoint=end, processed=cint(self.job.processed) + len(batch))
+
+	def write_content(self, batch):
+		# Parse the batch first so every link target is looked up in one query
+		parsed, targets = [], set()
+		for key, title, entry in batch:
+			if key.startswith("db:"):
+				blocks = [collection_block(collection_block_id(self.job.name, key[3:]))]
+			else:
+				blocks = page_blocks(
+					self.read(entry),
+					title,
+					lambda href, label, entry=entry: self.link_block(entry, href, label),
+				)
+			targets.update(block["page"] for block in blocks if block.get("page"))
+			parsed.append((key, title, blocks))
+
+		names = page_names(self.workspace, self.job.name, {key for key, _title, _blocks in parsed} | targets)
+		contents = {}
+		for key, title, blocks in parsed:
+			for block in blocks:
+				if block.get("page"):
+					block["page"] = names.get(block["page"])
+					if not block["page"]:
+						block.pop("page")
+			if names.get(key):
+				contents[names[key]] = (title, {"blocks": blocks or [new_block("paragraph")]})
+		if not contents:
+			return
+
+		timestamp, values = now(), []
+		for name, (_title, content) in contents.items():
+			values.extend([name, encode(json.dumps(content))])
+		frappe.db.sql(
+			f"""
+			UPDATE `tabNotion Page`
+			SET content_json = CASE name {" ".join(["WHEN %s THEN %s"] * len(contents))} END,
+				last_edited_date = %s, modified = %s
+			WHERE name IN %s
+			""",
+			[*values, timestamp, timestamp, list(contents)],
+		)
+		for name, (title, content) in contents.items():
+			sync_page_links(name, content)
+			search.index_page(name, title, content, self.workspace)
+
+	def link_block(self, source, href, label):
+		"""Block for a line linking to another page or a database of the export."""
+		target = self.layout.resolve(source, href)
+		if not target:
+			return None
+		if target.endswith(".csv"):
+			return collection_block(collection_block_id(self.job.name, split_stem(target)[1]))
+		# Links hold the page's import key until the batch resolves it to a page name
+		return new_block("paragraph", label, page=split_stem(target)[1])
+
+	def import_collections(self):
+		for end, batch in self.batches(self.layout.databases, 1):
+			self.import_database(batch[0])
+			self.save_checkpoint(checkpoint=end, row_checkpoint=0, processed=cint(self.job.processed) + 1)
+
+	def import_database(self, entry):
+		key, page_key = split_stem(entry)[1], self.layout.database_page_key(entry)
+		page = page_names(self.workspace, self.job.name, [page_key]).get(page_key)
+		if not page:
+			return
+
+		with self.archive.open(entry) as raw:
+			reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+			header = next(reader, None)
+			if not header:
+				return
+			schema = csv_schema(header)
+			collection = self.ensure_collection(page, key, schema)
+			row_pages = self.layout.row_pages(entry)
+
+			done = cint(self.job.row_checkpoint)
+			rows = islice(reader, done, None)
+			while batch := list(islice(rows, ROW_BATCH_SIZE)):
+				self.insert_items(page, collection, schema, header, batch, row_pages)
+				done += len(batch)
+				self.job.items = cint(self.job.items) + len(batch)
+				self.save_checkpoint(row_checkpoint=done)
+
+		frappe.db.after_commit.add(lambda: invalidate_items(collection))
+		frappe.db.after_commit.add(lambda: invalidate_page(page))
+
+	def ensure_collection(self, page, key, schema):
+		"""The collection of database ``key`` on ``page``, created (with its block) on first use."""
+		block_id = collection_block_id(self.job.name, key)
+		existing = frappe.db.get_value("WB Inline Collection", {"page": page, "block_id": block_id}, "name")
+		if existing:
+			return existing
+
+		name = frappe.generate_hash(length=10)
+		timestamp = now()
+		schema_json = json.dumps(schema)
+		frappe.db.bulk_insert(
+			"WB Inline Collection",
+			[
+				"name",
+				"page",
+				"block_id",
+				"schema_json",
+				"config_json",
+				"filters_json",
+				"sorts_json",
+				"indexed_schema_json",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+			],
+			[
+				(
+					name,
+					page,
+					block_id,
+					schema_json,
+					"{}",
+					"[]",
+					"[]",
+					schema_json,
+					timestamp,
+					timestamp,
+					self.user,
+					self.user,
+				)
+			],
+		)
+
+		# The page may not link the database from its text; show it at the end then
+		content = load_content(frappe.db.get_value("Notion Page", page, "content_json"))
+		if not any(block.get("blockId") == block_id for block in content["blocks"]):
+			content["blocks"].append(collection_block(block_id))
+			frappe.db.sql(
+				"UPDATE `tabNotion Page` SET content_json = %s, modified = %s WHERE name = %s",
+				(encode(json.dumps(content)), timestamp, page),
+			)
+		return name
+
+	def insert_items(self, page, collection, schema, header, batch, row_pages):
+		timestamp = now()
+		sort_keys = keys_after(last_key("WB Inline Item", collection), len(batch))
+		rows, props_by_item, bodies = [], {}, {}
+		for row, sort_key in zip(batch, sort_keys, strict=True):
+			name = frappe.generate_hash(length=10)
+			# Rows of hand-edited CSVs may be shorter or longer than the header
+			props = dict(zip(header, row, strict=False))
+			rows.append(
+				(
+					name,
+					collection,
+					json.dumps(props),
+					0,
+					sort_key,
+					0,
+					timestamp,
+					timestamp,
+					self.user,
+					self.user,
+				)
+			)
+			props_by_item[name] = props
+			title = row[0].strip() if row else ""
+			if title in row_pages:
+				blocks = page_blocks(self.read(row_pages[title]), title)
+				if blocks:
+					bodies[name] = {"blocks": blocks}
+
+		frappe.db.bulk_insert(
+			"WB Inline Item",
+			[
+				"name",
+				"collection",
+				"props_json",
+				"position",
+				"sort_key",
+				"is_archived",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+			],
+			rows,
+		)
+		save_bodies(bodies, self.user)
+		sync_item_values(collection, schema, props_by_item)
+		search.index_items(page, props_by_item, schema, self.workspace)
+
+
+def source_path(source):
+	"""Filesystem path of an import source: a File URL or a path on the server."""
+	if source.startswith(("/files/", "/private/files/")):
+		return frappe.get_doc("File", {"file_url": source}).get_full_path()
+	return source
+
+
+def create_import(workspace, source):
+	job = frappe.get_doc({"doctype": "WB Import", "workspace": workspace, "source": source})
+	job.insert(ignore_permissions=True)
+	return job
+
+
+def run_import(name, on_progress=None):
+	"""Run (or resume from its checkpoint) the WB Import ``name``."""
+	job = frappe.get_doc("WB Import", name)
+	if job.status == "Completed":
+		return job
+	job.db_set({"status": "Running", "error": None}, commit=True)
+	try:
+		with zipfile.ZipFile(source_path(job.source)) as archive:
+			Importer(job, archive, on_progress).run()
+	except Exception:
+		frappe.db.rollback()
+		job.db_set({"status": "Failed", "error": frappe.get_traceback()}, commit=True)
+		frappe.publish_realtime(IMPORT_EVENT, {"import": job.name, "status": "Failed"}, user=job.owner)
+		raise
+	return job
+
+
+def enqueue_import(name):
+	frappe.enqueue(
+		"workbench.importer.run_import",
+		queue="long",
+		timeout=4 * 60 * 60,
+		name=name,
+		job_id=f"workbench-import-{name}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
@@ -0,0 +1,175 @@
+"""Page-to-page link index (WB Page Link), kept in sync whenever page content is saved."""
+
+import json
+import re
+
+import frappe
+from frappe.utils import now
+
+from workbench.blocks import load_content
+from workbench.codec import encode
+
+PAGE_REF = re.compile(r"\bPAGE-\d+\b")
+
+# Block keys that may carry an explicit page reference (page link / mention blocks)
+REF_KEYS = ("page", "page_name", "pageId", "target")
+
+
+def extract_page_refs(content):
+	"""Names of pages referenced from the blocks of ``content``."""
+	refs = set()
+	for block in load_content(content)["blocks"]:
+		for key in REF_KEYS:
+			if isinstance(block.get(key), str) and block[key]:
+				refs.add(block[key])
+		for key in ("text", "content"):
+			if isinstance(block.get(key), str):
+				refs.update(PAGE_REF.findall(block[key]))
+	return refs
+
+
+def sync_page_links(page, content):
+	"""Diff the references in ``content`` against the index and apply the difference."""
+	refs = extract_page_refs(content)
+	refs.discard(page)
+
+	current = set(frappe.get_all("WB Page Link", filters={"source_page": page}, pluck="target_page"))
+	removed = current - refs
+	added = refs - current
+	if added:
+		# Only index references to pages that exist
+		added = set(frappe.get_all("Notion Page", filters={"name": ["in", list(added)]}, pluck="name"))
+
+	if removed:
+		frappe.db.delete("WB Page Link", {"source_page": page, "target_page": ["in", list(removed)]})
+	if added:
+		timestamp = now()
+		frappe.db.bulk_insert(
+			"WB Page Link",
+			["name", "source_page", "target_page", "creation", "modified", "owner", "modified_by"],
+			[
+				(
+					frappe.generate_hash(length=10),
+					page,
+					target,
+					timestamp,
+					timestamp,
+					"Administrator",
+					"Administrator",
+				)
+				for target in added
+			],
+		)
+
+
+def on_page_update(doc, method=None):
+	if doc.has_value_changed("content_json"):
+		sync_page_links(doc.name, doc.content_json)
+
+
+def on_page_trash(doc, method=None):
+	frappe.db.delete("WB Page Link", {"source_page": doc.name})
+	frappe.db.delete("WB Page Link", {"target_page": doc.name})
+
+
+def unlink_pages(pages, workspace=None):
+	"""Drop the block references to ``pages`` (about to be deleted) from the pages linking to them.
+
+	The linking pages are rewritten in one CASE update with a new ``content_version``, so
+	open editors reload them. Pages of ``workspace`` are skipped when the whole workspace goes.
+	"""
+	pages = list(pages)
+	condition, values = "", [pages, pages]
+	if workspace:
+		condition, values = "AND p.workspace != %s", [*values, workspace]
+	sources = frappe.db.sql(
+		f"""
+		SELECT p.name, p.content_json
+		FROM `tabNotion Page` p
+		WHERE p.name IN (
+			SELECT l.source_page FROM `tabWB Page Link` l
+			WHERE l.target_page IN %s AND l.source_page NOT IN %s
+		) {condition}
+		""",
+		values,
+	)
+	targets, contents = set(pages), {}
+	for source, content_json in sources:
+		content = load_content(content_json)
+		changed = False
+		for block in content["blocks"]:
+			for key in REF_KEYS:
+				if block.get(key) in targets:
+					del block[key]
+					changed = True
+		if changed:
+			contents[source] = encode(json.dumps(content))
+	if not contents:
+		return
+
+	cases, values = " ".join(["WHEN %s THEN %s"] * len(contents)), []
+	for source, content_json in contents.items():
+		values.extend([source, content_json])
+	frappe.db.sql(
+		f"""
+		UPDATE `tabNotion Page`
+		SET content_json = CASE name {cases} END, content_version = content_version + 1, modified = %s
+		WHERE name IN %s
+		""",
+		[*values, now(), list(contents)],
+	)
+	frappe.db.delete("WB Page Link", {"source_page": ["in", list(contents)], "target_page": ["in", pages]})
+
+
+def get_backlinks(page):
+	return frappe.db.sql(
+		"""
+		SELECT p.name, p.title, p.modified
+		FROM `tabWB Page Link` l
+		JOIN `tabNotion Page` p ON p.name = l.source_page
+		WHERE l.target_page = %s AND p.is_archived = 0
+		ORDER BY p.modified DESC
+		""",
+		(page,),
+		as_dict=True,
+	)
+
+
+def get_forward_links(page):
+	return frappe.db.sql(
+		"""
+		SELECT p.name, p.title, p.modified
+		FROM `tabWB Page Link` l
+		JOIN `tabNotion Page` p ON p.name = l.target_page
+		WHERE l.source_page = %s AND p.is_archived = 0
+		ORDER BY p.title ASC
+		""",
+		(page,),
+		as_dict=True,
+	)
+
+
+def rebuild_link_index(chunk_size=500):
+	"""Rebuild the index for every page, reading content in chunks; returns pages processed."""
+	processed = 0
+	last = ""
+	while True:
+		pages = frappe.db.sql(
+			"""
+			SELECT name, content_json FROM `tabNotion Page`
+			WHERE name > %s ORDER BY name LIMIT %s
+			""",
+			(last, chunk_size),
+			as_dict=True,
+		)
+		if not pages:
+			break
+		for page in pages:
+			try:
+				sync_page_links(page.name, page.content_json)
+			except Exception:
+				frappe.log_error(f"Could not index links for page {page.name}")
+			processed += 1
+		last = pages[-1].name
+		frappe.db.commit()
+	return processed
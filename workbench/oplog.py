@@ -0,0 +1,111 @@
+"""Ordered log of block operations per page (WB Page Op) and their realtime broadcast.
+
+Each content change of a Notion Page is logged under a sequence number equal to the
+page's ``content_version`` after the change, and published on the page's document room
+(``publish_realtime`` with doctype/docname, so only users allowed to open the page
+receive it). A client at version ``n`` applies the entry with ``seq == n + 1`` and,
+after a gap (missed message, reconnect), fetches the entries after ``n`` with
+``ops_since``. Only the last ``OP_LOG_SIZE`` entries of a page are kept; a client that
+fell further behind reloads the page.
+
+Entries of changes that cannot be expressed as operations (content with blocks that
+have no id) carry ``ops = None``, which also tells clients to reload.
+"""
+
+import json
+
+import frappe
+from frappe.utils import cint, now
+
+from workbench.blocks import diff_ops
+
+OP_EVENT = "workbench_page_ops"
+OP_LOG_SIZE = 500
+TRIM_EVERY = 50
+
+
+def entry(page, seq, ops, user=None, client_id=None):
+	return {"page": page, "seq": cint(seq), "ops": ops, "user": user, "client_id": client_id}
+
+
+def append(page, seq, ops, user=None, client_id=None):
+	"""Log ``ops`` as change ``seq`` of ``page`` and broadcast it once the transaction commits."""
+	user = user or frappe.session.user
+	timestamp = now()
+	frappe.db.bulk_insert(
+		"WB Page Op",
+		[
+			"name",
+			"page",
+			"seq",
+			"ops_json",
+			"client_id",
+			"user",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+		],
+		[
+			(
+				frappe.generate_hash(length=10),
+				page,
+				cint(seq),
+				json.dumps(ops),
+				client_id or "",
+				user,
+				timestamp,
+				timestamp,
+				user,
+				user,
+			)
+		],
+	)
+	if cint(seq) % TRIM_EVERY == 0:
+		frappe.db.sql(
+			"DELETE FROM `tabWB Page Op` WHERE page = %s AND seq <= %s",
+			(page, cint(seq) - OP_LOG_SIZE),
+		)
+
+	frappe.publish_realtime(
+		OP_EVENT,
+		entry(page, seq, ops, user, client_id),
+		doctype="Notion Page",
+		docname=page,
+		after_commit=True,
+	)
+
+
+def ops_since(page, since, current):
+	"""Entries of ``page`` after ``since`` up to ``current``, or None when the log no longer reaches back."""
+	since, current = cint(since), cint(current)
+	if since >= current:
+		return []
+	rows = frappe.db.sql(
+		"""
+		SELECT seq, ops_json, user, client_id FROM `tabWB Page Op`
+		WHERE page = %s AND seq > %s AND seq <= %s
+		ORDER BY seq
+		""",
+		(page, since, current),
+		as_dict=True,
+	)
+	# Every sequence number must be present, and no entry may ask for a reload
+	if len(rows) != current - since or rows[0].seq != since + 1:
+		return None
+	entries = [entry(page, row.seq, json.loads(row.ops_json), row.user, row.client_id) for row in rows]
+	if any(e["ops"] is None for e in entries):
+		return None
+	return entries
+
+
+def on_page_update(doc, method=None):
+	# patch_page logs its own operations; this covers saves through the document.
+	# New pages have no viewers yet, so their first content is not logged.
+	previous = doc.get_doc_before_save()
+	if previous and doc.has_value_changed("content_json"):
+		append(doc.name, doc.content_version, diff_ops(previous.content_json, doc.content_json))
+
+
+def on_page_trash(doc, method=None):
+	frappe.db.delete("WB Page Op", {"page": doc.name})
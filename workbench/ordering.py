@@ -0,0 +1,206 @@
+"""Lexicographic order keys for WB Inline Item and Notion Page (``sort_key``).
+
+A key is a fixed-width base-36 integer head, optionally followed by a fractional
+tail. Appending bumps the head; placing between two rows takes the midpoint, so a
+move writes exactly one row. Keys only use ``0-9a-z`` so they sort the same in
+Python and under MariaDB's case-insensitive collations. When tails grow past
+``MAX_KEY_LENGTH`` a background job rewrites the keys of that list evenly.
+"""
+
+import math
+
+import frappe
+from frappe.utils import flt
+
+from workbench.workbench.inline_api.resolver import invalidate_items
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+HEAD_WIDTH = 8
+MAX_KEY_LENGTH = 32
+
+# doctype -> (column grouping one ordered list, extra WHERE)
+ORDERED_LISTS = {
+	"WB Inline Item": ("collection", "is_archived = 0"),
+	"Notion Page": ("workspace", "is_archived = 0"),
+}
+
+
+def encode_head(number):
+	digits = []
+	for _ in range(HEAD_WIDTH):
+		number, rem = divmod(number, BASE)
+		digits.append(DIGITS[rem])
+	return "".join(reversed(digits))
+
+
+def decode_head(key):
+	number = 0
+	for char in key[:HEAD_WIDTH]:
+		number = number * BASE + DIGITS.index(char)
+	return number
+
+
+def midpoint(a, b):
+	"""A fraction strictly between ``a`` and ``b`` (``b=None`` means 1), without trailing zeros."""
+	if b is not None:
+		n = 0
+		while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+			n += 1
+		if n:
+			return b[:n] + midpoint(a[n:], b[n:])
+
+	digit_a = DIGITS.index(a[0]) if a else 0
+	digit_b = DIGITS.index(b[0]) if b is not None else BASE
+	if digit_b - digit_a > 1:
+		return DIGITS[(digit_a + digit_b) // 2]
+	if b is not None and len(b) > 1:
+		return b[:1]
+	return DIGITS[digit_a] + midpoint(a[1:], None)
+
+
+def key_between(a=None, b=None):
+	"""Order key sorting after ``a`` and before ``b``; either may be empty."""
+	if a and b and a >= b:
+		frappe.throw(f"Invalid order: {a} is not before {b}")
+
+	if not a and not b:
+		return encode_head(BASE**HEAD_WIDTH // 2)
+
+	if not b:
+		head = decode_head(a)
+		if head + 1 < BASE**HEAD_WIDTH:
+			return encode_head(head + 1)
+		return a[:HEAD_WIDTH] + midpoint(a[HEAD_WIDTH:], None)
+
+	if not a:
+		head = decode_head(b)
+		if b[HEAD_WIDTH:]:
+			return b[:HEAD_WIDTH]
+		if head == 0:
+			frappe.throw("Order keys are exhausted; rebalance the list first")
+		return encode_head(head - 1)
+
+	head_a, head_b = decode_head(a), decode_head(b)
+	if head_a == head_b:
+		return a[:HEAD_WIDTH] + midpoint(a[HEAD_WIDTH:], b[HEAD_WIDTH:])
+	if head_b - head_a > 1:
+		return encode_head((head_a + head_b) // 2)
+	return a[:HEAD_WIDTH] + midpoint(a[HEAD_WIDTH:], None)
+
+
+def keys_after(a, count):
+	"""``count`` ascending keys after ``a``, for appending several rows at once."""
+	keys = []
+	for _ in range(count):
+		a = key_between(a, None)
+		keys.append(a)
+	return keys
+
+
+def last_key(doctype, group):
+	column, condition = ORDERED_LISTS[doctype]
+	return frappe.db.sql(
+		f"SELECT MAX(sort_key) FROM `tab{doctype}` WHERE `{column}` = %s AND {condition}",
+		(group,),
+	)[0][0]
+
+
+def neighbour_keys(doctype, group, after=None, before=None):
+	"""Order keys of the rows a moved row should land between; both must be in list ``group``."""
+	column, _condition = ORDERED_LISTS[doctype]
+	names = [n for n in (after, before) if n]
+	rows = (
+		frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["name", column, "sort_key"])
+		if names
+		else []
+	)
+	rows = {row.name: row for row in rows}
+	for name in names:
+		if name not in rows:
+			frappe.throw(f"{doctype} {name} not found", frappe.DoesNotExistError)
+		if rows[name][column] != group:
+			frappe.throw(f"{doctype} {name} is not in the same list")
+	return (rows[after].sort_key if after else None), (rows[before].sort_key if before else None)
+
+
+def move_key(doctype, group, after=None, before=None):
+	"""Key placing a row between ``after`` and ``before``; rebalances the list when keys get long."""
+	a, b = neighbour_keys(doctype, group, after, before)
+	if after and not before:
+		# Land directly after ``after``: take the midpoint to its current successor
+		column, condition = ORDERED_LISTS[doctype]
+		b = frappe.db.sql(
+			f"""SELECT MIN(sort_key) FROM `tab{doctype}`
+			WHERE `{column}` = %s AND {condition} AND sort_key > %s""",
+			(group, a),
+		)[0][0]
+	elif before and not after:
+		column, condition = ORDERED_LISTS[doctype]
+		a = frappe.db.sql(
+			f"""SELECT MAX(sort_key) FROM `tab{doctype}`
+			WHERE `{column}` = %s AND {condition} AND sort_key < %s""",
+			(group, b),
+		)[0][0]
+	elif not after and not before:
+		a = last_key(doctype, group)
+
+	key = key_between(a, b)
+	if len(key) > MAX_KEY_LENGTH:
+		frappe.enqueue(
+			"workbench.ordering.rebalance",
+			doctype=doctype,
+			group=group,
+			job_id=f"workbench-rebalance-{doctype}-{group}",
+			deduplicate=True,
+			enqueue_after_commit=True,
+		)
+	return key
+
+
+def position_key(doctype, group, name, position):
+	"""Key placing row ``name`` at index ``position`` of its list, for clients still sending positions.
+
+	A fractional position lands after the row at its integer part (1.5 goes between
+	the second and the third row); positions past the end append.
+	"""
+	column, condition = ORDERED_LISTS[doctype]
+	index = max(math.ceil(flt(position)), 0)
+	neighbours = frappe.db.sql_list(
+		f"""SELECT name FROM `tab{doctype}`
+		WHERE `{column}` = %s AND {condition} AND name != %s
+		ORDER BY sort_key LIMIT %s OFFSET %s""",
+		(group, name, 2 if index else 1, max(index - 1, 0)),
+	)
+	if not index:
+		return move_key(doctype, group, before=neighbours[0] if neighbours else None)
+	if not neighbours:
+		return move_key(doctype, group)
+	return move_key(
+		doctype, group, after=neighbours[0], before=neighbours[1] if len(neighbours) > 1 else None
+	)
+
+
+def rebalance(doctype, group, order_by="sort_key ASC, creation ASC", chunk_size=500):
+	"""Rewrite the keys of one ordered list as evenly spaced integer heads."""
+	column, condition = ORDERED_LISTS[doctype]
+	names = frappe.db.sql_list(
+		f"""SELECT name FROM `tab{doctype}` WHERE `{column}` = %s AND {condition}
+		ORDER BY {order_by}""",
+		(group,),
+	)
+	step = max(1, (BASE**HEAD_WIDTH // 2) // max(len(names), 1))
+	for start in range(0, len(names), chunk_size):
+		chunk = names[start : start + chunk_size]
+		cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+		values = []
+		for i, name in enumerate(chunk, start=start):
+			values.extend([name, encode_head(BASE**HEAD_WIDTH // 4 + i * step)])
+		frappe.db.sql(
+			f"UPDATE `tab{doctype}` SET sort_key = CASE name {cases} END WHERE name IN %s",
+			(*values, chunk),
+		)
+		frappe.db.commit()
+	if doctype == "WB Inline Item":
+		# Cached item lists carry the old keys in their cursors
+		invalidate_items(group)
@@ -0,0 +1,19 @@
+import frappe
+
+# doctype -> columns of a composite index on its hot filters. New sites get them from
+# each controller's on_doctype_update; this backfills sites installed before. The
+# plans these serve are checked by workbench/tests/test_query_plans.py
+INDEXES = (
+	("WB Inline Collection", ["page", "block_id"]),
+	("WB Inline Item", ["collection", "is_archived", "position"]),
+	("Notion Page", ["workspace", "is_archived", "page_order"]),
+	("Notion Comment", ["page_name", "is_resolved", "creation"]),
+	("Workbench Workspace Collaborator", ["parent", "user"]),
+	("Workbench Page Collaborator", ["parent", "user"]),
+)
+
+
+def execute():
+	"""Composite indexes for the collection, item, page, comment and collaborator lookups."""
+	for doctype, columns in INDEXES:
+		frappe.db.add_index(doctype, columns)
@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	"""Backfill the (workspace, import_key) index for sites that had Notion Page before it was declared."""
+	frappe.db.add_index("Notion Page", ["workspace", "import_key"])
@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	"""Add the (page, seq) unique index to op logs created before the doctype declared it."""
+	frappe.db.add_unique("WB Page Op", ["page", "seq"], constraint_name="page_seq")
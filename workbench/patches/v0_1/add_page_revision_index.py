@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	"""Backfill the (page, revision) unique index on sites installed before ``on_doctype_update`` had it."""
+	frappe.db.add_unique("WB Page Revision", ["page", "revision"], constraint_name="page_revision")
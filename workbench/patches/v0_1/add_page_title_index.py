@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	"""Index page titles per workspace on existing sites; new sites get it from the doctype."""
+	frappe.db.add_index("Notion Page", ["workspace", "title"])
@@ -0,0 +1,23 @@
+import frappe
+
+from workbench.ordering import ORDERED_LISTS, rebalance
+
+
+def execute():
+	"""Give existing items and pages order keys that follow their position/page_order.
+
+	The (group, sort_key) indexes are also declared in on_doctype_update for new sites.
+	"""
+	for doctype, order_by in (
+		("WB Inline Item", "position ASC, creation ASC"),
+		("Notion Page", "page_order ASC, creation ASC"),
+	):
+		column, condition = ORDERED_LISTS[doctype]
+		frappe.db.add_index(doctype, [column, "sort_key"])
+
+		groups = frappe.db.sql_list(
+			f"""SELECT DISTINCT `{column}` FROM `tab{doctype}`
+			WHERE {condition} AND IFNULL(sort_key, '') = ''"""
+		)
+		for group in groups:
+			rebalance(doctype, group, order_by=order_by)
@@ -0,0 +1,20 @@
+import frappe
+
+from workbench.workbench.inline_api.prop_index import VALUE_FIELDS, rebuild_collection
+
+
+def execute():
+	"""Build the typed item value index (text, number, checkbox and date values) and fill it once.
+
+	New sites get the indexes from the doctype's on_doctype_update.
+	"""
+	for field in VALUE_FIELDS:
+		frappe.db.add_index("WB Inline Item Value", ["collection", "property", field, "item"])
+	frappe.db.add_index("WB Inline Item Value", ["item", "property"])
+	# Left by an earlier date-only version of this index; covered by the one above
+	frappe.db.sql_ddl(
+		"ALTER TABLE `tabWB Inline Item Value` DROP INDEX IF EXISTS `collection_property_value_datetime_index`"
+	)
+
+	for collection in frappe.get_all("WB Inline Collection", pluck="name"):
+		rebuild_collection(collection)
@@ -0,0 +1,19 @@
+import frappe
+
+
+def execute():
+	"""Move inline item bodies out of `tabWB Inline Item` into WB Inline Item Body."""
+	if not frappe.db.has_column("WB Inline Item", "content_json"):
+		return
+
+	frappe.db.sql(
+		"""
+		INSERT IGNORE INTO `tabWB Inline Item Body`
+			(name, item, content_json, creation, modified, owner, modified_by)
+		SELECT name, name, content_json, creation, modified, owner, modified_by
+		FROM `tabWB Inline Item`
+		WHERE IFNULL(content_json, '') NOT IN ('', '{}', 'null')
+		"""
+	)
+	frappe.db.commit()
+	frappe.db.sql_ddl("ALTER TABLE `tabWB Inline Item` DROP COLUMN `content_json`")
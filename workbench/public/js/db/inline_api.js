@@ -6,6 +6,13 @@
 class InlineCollectionAPI {
   constructor() {
     this.csrfToken = this.getCSRFToken();
+    this.itemsCache = new Map();
+  }
+
+  // Seed collection metadata and first items (from get_bootstrap or
+  // inline_page_collections) so the first load of each block needs no request
+  static prime(page, collections) {
+    (collections || []).forEach(c => InlineCollectionAPI.primed.set(`${page}:${c.block_id}`, c));
   }
 
   getCSRFToken() {
@@ -23,12 +30,20 @@ class InlineCollectionAPI {
       }
     };
 
-    if (data) {
+    let url = `/api/method/workbench.workbench.inline_api.inline_collection.${endpoint}`;
+    if (data && method === 'GET') {
+      // GET requests cannot carry a body; send arguments as query parameters
+      const params = new URLSearchParams();
+      Object.entries(data).forEach(([key, value]) => {
+        params.append(key, typeof value === 'string' ? value : JSON.stringify(value));
+      });
+      url += `?${params}`;
+    } else if (data) {
       options.body = JSON.stringify(data);
     }
 
     try {
-      const response = await fetch(`/api/method/workbench.workbench.inline_api.inline_collection.${endpoint}`, options);
+      const response = await fetch(url, options);
       const result = await response.json();
       
       if (result.exc_type) {
@@ -46,6 +61,11 @@ class InlineCollectionAPI {
   // Collection management
   async upsertCollection(page, blockId, schema = null, config = null, filters = null, sorts = null) {
     console.log('upsertCollection called with:', { page, blockId, schema, config, filters, sorts });
+    const primed = InlineCollectionAPI.primed.get(`${page}:${blockId}`);
+    if (primed && schema === null && config === null && filters === null && sorts === null) {
+      return { message: primed };
+    }
+    InlineCollectionAPI.primed.delete(`${page}:${blockId}`);
     return await this.request('POST', 'inline_col_upsert', {
       page,
       block_id: blockId,
@@ -56,13 +76,48 @@ class InlineCollectionAPI {
     });
   }
 
-  async queryItems(page, blockId, limit = 100, offset = 0) {
-    return await this.request('GET', 'inline_items_query', {
-      page,
-      block_id: blockId,
-      limit,
-      offset
-    });
+  async queryItems(page, blockId, limit = 100, offset = 0, filters = null, sorts = null, properties = null, cursor = null) {
+    // filters/sorts default to the ones stored on the collection;
+    // properties limits the returned props. Bodies come from getItem.
+    // Pass the previous response's next_cursor as cursor to load the following rows.
+    const data = { page, block_id: blockId, limit, offset };
+    const primed = InlineCollectionAPI.primed.get(`${page}:${blockId}`);
+    if (primed && primed.items && !filters && !sorts && !properties && !cursor && limit === 100 && offset === 0) {
+      InlineCollectionAPI.primed.delete(`${page}:${blockId}`);
+      this.itemsCache.set(JSON.stringify(data), { message: primed.items });
+      return { message: primed.items };
+    }
+    if (filters) data.filters = filters;
+    if (sorts) data.sorts = sorts;
+    if (properties) data.properties = properties;
+    if (cursor) data.cursor = cursor;
+    // Repeat queries send the etag of the last result and reuse it while it is current
+    const key = JSON.stringify(data);
+    const held = this.itemsCache.get(key);
+    if (held) data.etag = held.etag;
+    const result = await this.request('GET', 'inline_items_query', data);
+    if (result.message && result.message.not_modified) return held;
+    if (result.message && result.message.etag) {
+      this.itemsCache.delete(key);
+      this.itemsCache.set(key, result);
+      if (this.itemsCache.size > 50) this.itemsCache.delete(this.itemsCache.keys().next().value);
+    }
+    return result;
+  }
+
+  // Board summary: group keys, counts, first items per group and numeric aggregates
+  async aggregateItems(page, blockId, groupBy, perGroup = 10, aggregates = null) {
+    const data = { page, block_id: blockId, group_by: groupBy, per_group: perGroup };
+    if (aggregates) data.aggregates = aggregates;
+    return await this.request('GET', 'inline_items_aggregate', data);
+  }
+
+  // Calendar / timeline window; date props default to the collection config
+  async rangeItems(page, blockId, start, end, dateProp = null, endProp = null) {
+    const data = { page, block_id: blockId, start, end };
+    if (dateProp) data.date_prop = dateProp;
+    if (endProp) data.end_prop = endProp;
+    return await this.request('GET', 'inline_items_in_range', data);
   }
 
   // Item management
@@ -74,6 +129,26 @@ class InlineCollectionAPI {
     });
   }
 
+  // ops: [{op: 'create'|'update', item}, {op: 'archive', id}, {op: 'reorder', id, position}]
+  async bulkItems(page, blockId, ops) {
+    return await this.request('POST', 'inline_items_bulk', {
+      page,
+      block_id: blockId,
+      ops
+    });
+  }
+
+  // Place an item between two siblings; pass null for either end
+  async moveItem(page, blockId, itemId, after = null, before = null) {
+    return await this.request('POST', 'inline_item_move', {
+      page,
+      block_id: blockId,
+      item_id: itemId,
+      after,
+      before
+    });
+  }
+
   async deleteItem(page, blockId, itemId) {
     return await this.request('POST', 'inline_item_delete', {
       page,
@@ -208,5 +283,7 @@ class InlineCollectionAPI {
   }
 }
 
+InlineCollectionAPI.primed = new Map();
+
 // Export for use in other modules
 window.InlineCollectionAPI = InlineCollectionAPI;
@@ -63,7 +63,7 @@ class CollectionBlockRenderer {
     
     try {
       // Load collection data
-      const collectionResult = await this.api.upsertCollection(pageName, blockId, null, null, [], []);
+      const collectionResult = await this.api.upsertCollection(pageName, blockId, null, null, null, null);
       const collectionData = collectionResult.message || collectionResult;
       
       if (!collectionData.success) {
@@ -619,7 +619,7 @@ class CollectionBlockRenderer {
 
   renderItemContentAsBlocks(item) {
     // Use the same block system as the main workbench
-    const content = item.content.body || '';
+    const content = (item.content && item.content.body) || '';
     
     if (content.trim() === '') {
       // Create an empty paragraph block with placeholder
@@ -1147,7 +1147,7 @@ class CollectionBlockRenderer {
     const content = editor.innerHTML;
     
     // Update item content
-    item.content.body = content;
+    item.content = { ...(item.content || {}), body: content };
     
     // Update title if it changed
     const titleElement = modal.querySelector('h2');
@@ -1217,6 +1217,17 @@ class CollectionBlockRenderer {
     const item = data.items.find(i => i.id === itemId);
     if (!item) return;
 
+    // Listed items carry no body; fetch it the first time the item is opened
+    if (!item.content) {
+      try {
+        const result = await this.api.getItem(this.currentPage, data.blockId, itemId);
+        item.content = (result.message || result).item.content || {};
+      } catch (error) {
+        console.error('Failed to load item body:', error);
+        item.content = {};
+      }
+    }
+
     // Open modal editor for the item
     const block = document.querySelector(`[data-block-id="${data.blockId}"]`);
     this.openItemModal(block, item);
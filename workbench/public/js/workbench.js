@@ -9,9 +9,15 @@ window.WorkbenchEditor = null;
       const j = await r.json();
       if(j.exc) throw j.exc; return j.message || [];
     },
+    // Last payload per page; sending its etag back skips the download while it is current
+    _pages: new Map(),
     async get(name){
-      const r = await fetch(`/api/method/workbench.api.get_page?name=${encodeURIComponent(name)}`);
-      const j = await r.json(); if(j.exc) throw j.exc; return j.message;
+      const held = api._pages.get(name);
+      const etag = held ? `&etag=${encodeURIComponent(held.etag)}` : '';
+      const r = await fetch(`/api/method/workbench.api.get_page?name=${encodeURIComponent(name)}${etag}`);
+      const j = await r.json(); if(j.exc) throw j.exc;
+      if(j.message.not_modified) return held;
+      api._pages.set(name, j.message); return j.message;
     },
     async create(title="Untitled"){
       const r = await fetch(`/api/method/workbench.api.create_page`,{
@@ -27,6 +33,19 @@ window.WorkbenchEditor = null;
       });
       const j = await r.json(); if(j.exc) throw j.exc; return j.message;
     },
+    // Tags this tab's ops so it can skip its own realtime echoes
+    clientId: 'c-'+Math.random().toString(36).slice(2),
+    async patch(name, base_version, ops){
+      const r = await fetch(`/api/method/workbench.api.patch_page`,{
+        method:'POST', headers:{'Content-Type':'application/json','X-Frappe-CSRF-Token': frappe.csrf_token},
+        body: JSON.stringify({name, base_version, ops, client_id: api.clientId})
+      });
+      const j = await r.json(); if(j.exc) throw j.exc; return j.message;
+    },
+    async ops(name, since){
+      const r = await fetch(`/api/method/workbench.api.get_page_ops?name=${encodeURIComponent(name)}&since=${since}`);
+      const j = await r.json(); if(j.exc) throw j.exc; return j.message;
+    },
     async del(name){
       const r = await fetch(`/api/method/workbench.api.delete_page`,{
         method:'POST', headers:{'Content-Type':'application/json','X-Frappe-CSRF-Token': frappe.csrf_token},
@@ -170,6 +189,14 @@ window.WorkbenchEditor = null;
     createImage(url=""){ return Editor._block({type:'image', level:1, text:url}); },
     createEmbed(url=""){ return Editor._block({type:'embed', level:1, text:url}); },
 
+    // Element for a stored block, keeping its id so ops from other clients can address it
+    _renderBlock(b){
+      const el = Editor._block(b);
+      if(b.id) el.dataset.id = b.id;
+      el.dataset.level = String(b.level || 1);
+      return el;
+    },
+
     _uuid(){ return 'b-'+(crypto.randomUUID ? crypto.randomUUID() : Math.random().toString(36).slice(2)); },
 
     _block({type, level=1, text="", checked=false}){
@@ -248,11 +275,7 @@ window.WorkbenchEditor = null;
         blocks = {blocks:[{id:this._uuid(), type:'paragraph', level:1, text:''}]};
       }
       this.root.innerHTML = '';
-      blocks.blocks.forEach(b=>{
-        const el = Editor._block(b);
-        el.dataset.level = String(b.level || 1);
-        this.root.appendChild(el);
-      });
+      blocks.blocks.forEach(b=> this.root.appendChild(Editor._renderBlock(b)));
       if(!this.root.children.length){ this.root.appendChild(Editor.createParagraph("")); }
       
       // Auto-focus the first block after rendering
@@ -447,6 +470,68 @@ window.WorkbenchEditor = null;
 
     queueSave(){ clearTimeout(this._t); this._t = setTimeout(()=> this.saveCb && this.saveCb(this.serialize()), 250); },
 
+    // Block-level ops that turn prev.blocks into next.blocks (see workbench/blocks.py)
+    diff(prev, next){
+      const ops = [];
+      const before = new Map((prev.blocks||[]).map(b => [b.id, b]));
+      const after = new Set(next.blocks.map(b => b.id));
+      const order = (prev.blocks||[]).map(b => b.id).filter(id => {
+        if(after.has(id)) return true;
+        ops.push({op:'delete', id}); return false;
+      });
+      next.blocks.forEach((b, i)=>{
+        const anchor = i ? next.blocks[i-1].id : null;
+        if(!before.has(b.id)){
+          ops.push({op:'insert', block:b, after:anchor}); order.splice(i, 0, b.id); return;
+        }
+        if(order[i] !== b.id){
+          ops.push({op:'move', id:b.id, after:anchor});
+          order.splice(order.indexOf(b.id), 1); order.splice(i, 0, b.id);
+        }
+        if(JSON.stringify(before.get(b.id)) !== JSON.stringify(b)) ops.push({op:'update', id:b.id, block:b});
+      });
+      return ops;
+    },
+
+    // JS twin of apply_ops in workbench/blocks.py; returns a new content object
+    applyOps(content, ops){
+      const blocks = (content.blocks || []).map(b => Object.assign({}, b));
+      const at = (id)=> blocks.findIndex(b => b.id === id);
+      const after = (id)=> id ? at(id) + 1 : 0;
+      (ops || []).forEach(op => {
+        if(op.op === 'insert'){ if(at(op.block.id) < 0) blocks.splice(after(op.after), 0, Object.assign({}, op.block)); }
+        else if(op.op === 'update'){ const i = at(op.id); if(i >= 0) blocks[i] = Object.assign({}, op.block, {id: op.id}); }
+        else if(op.op === 'move'){ const i = at(op.id); if(i >= 0){ const [b] = blocks.splice(i, 1); blocks.splice(after(op.after), 0, b); } }
+        else if(op.op === 'delete'){ const i = at(op.id); if(i >= 0) blocks.splice(i, 1); }
+      });
+      return Object.assign({}, content, {blocks});
+    },
+
+    // Apply remote ops to the rendered blocks, leaving blocks in ``skip`` (local unsaved edits) alone
+    applyOpsToDom(ops, content, skip=new Set()){
+      const find = (id)=> id ? this.root.querySelector(`.wb-block[data-id="${CSS.escape(id)}"]`) : null;
+      const place = (el, anchorId)=>{
+        const anchor = find(anchorId);
+        if(anchor) anchor.insertAdjacentElement('afterend', el); else this.root.prepend(el);
+      };
+      const stored = new Map((content.blocks || []).map(b => [b.id, b]));
+      (ops || []).forEach(op => {
+        const id = op.id || (op.block && op.block.id);
+        if(skip.has(id)) return;
+        const el = find(id);
+        if(op.op === 'insert'){ if(!el) place(Editor._renderBlock(op.block), op.after); }
+        else if(op.op === 'update' && el && stored.has(id)){
+          const focused = el.contains(document.activeElement);
+          const next = Editor._renderBlock(stored.get(id));
+          el.replaceWith(next);
+          if(focused) this.focusBlock(next);
+        }
+        else if(op.op === 'move' && el) place(el, op.after);
+        else if(op.op === 'delete' && el) el.remove();
+      });
+      if(!this.root.children.length){ this.root.appendChild(Editor.createParagraph("")); }
+    },
+
     // Slash menu functions
     createSlashMenu(){
       this.slashMenu = document.createElement('div');
@@ -669,7 +754,7 @@ window.WorkbenchEditor = null;
 
   // --- App wiring ---
   const App = {
-    state: { current: null },
+    state: { current: null, inbox: [] },
 
     async boot(){
       console.log('App.boot() starting...');
@@ -702,10 +787,15 @@ window.WorkbenchEditor = null;
       Editor.init(this.$editor);
       console.log('Editor initialized');
       
-      Editor.saveCb = (data)=>{
-        const name = this.state.current; if(!name) return;
-        api.update(name, { content_json: JSON.stringify(data) }).catch(console.error);
-      };
+      Editor.saveCb = ()=> this.flush();
+
+      // Block ops of other editors of the open page (see workbench/oplog.py)
+      if(window.frappe && frappe.realtime){
+        frappe.realtime.on('workbench_page_ops', (entry)=>{
+          if(entry.page !== this.state.current) return;
+          if(this.state.saving) this.state.inbox.push(entry); else this.applyRemote([entry]);
+        });
+      }
 
       this.$new.onclick = async ()=>{
         const {name} = await api.create('Untitled');
@@ -783,14 +873,85 @@ window.WorkbenchEditor = null;
       });
     },
 
+    // Send local changes as ops against the last version seen. On a conflict, take in
+    // the remote changes (keeping blocks with unsaved local edits as they are) and retry.
+    async flush(){
+      const name = this.state.current; if(!name) return;
+      if(this.state.saving){ this.state.dirty = true; return; }
+      this.state.saving = true;
+      try{
+        for(let attempt = 0; attempt < 5; attempt++){
+          const ops = Editor.diff(this.state.saved || {blocks:[]}, Editor.serialize());
+          if(!ops.length) break;
+          const r = await api.patch(name, this.state.version, ops);
+          if(this.state.current !== name) break;
+          const local = new Set(ops.map(op => op.id || op.block.id));
+          if(r.missed) this.takeRemote(r.missed, local);
+          else if(!r.ok){ await this.reload(name); continue; }
+          if(r.ok){ this.state.saved = Editor.applyOps(this.state.saved, ops); this.state.version = r.version; break; }
+          this.state.version = r.version;
+        }
+      }catch(e){ console.error(e); }
+      this.state.saving = false;
+      this.applyRemote(this.state.inbox.splice(0));
+      if(this.state.dirty){ this.state.dirty = false; this.flush(); }
+    },
+
+    takeRemote(entries, skip){
+      entries.forEach(entry => {
+        if(entry.seq <= this.state.version) return;
+        this.state.saved = Editor.applyOps(this.state.saved, entry.ops);
+        Editor.applyOpsToDom(entry.ops, this.state.saved, skip);
+        this.state.version = entry.seq;
+      });
+    },
+
+    async applyRemote(entries){
+      for(const entry of entries){
+        if(entry.page !== this.state.current || entry.seq <= this.state.version) continue;
+        // A gap in the sequence (missed message, reconnect): fetch what is missing
+        if(entry.seq !== this.state.version + 1 || !entry.ops) return this.catchUp();
+        if(entry.client_id === api.clientId){ this.state.version = entry.seq; continue; }
+        const pending = Editor.diff(this.state.saved, Editor.serialize());
+        this.takeRemote([entry], new Set(pending.map(op => op.id || op.block.id)));
+      }
+    },
+
+    async catchUp(){
+      const name = this.state.current;
+      const r = await api.ops(name, this.state.version);
+      if(this.state.current !== name) return;
+      if(r.reset) return this.reload(name);
+      const pending = Editor.diff(this.state.saved, Editor.serialize());
+      this.takeRemote(r.ops, new Set(pending.map(op => op.id || op.block.id)));
+    },
+
+    // Fetch the page again and replay unsaved local edits on top of it
+    async reload(name){
+      const pending = Editor.diff(this.state.saved || {blocks:[]}, Editor.serialize());
+      const data = await api.get(name);
+      let content = null;
+      try{ content = data.content_json ? JSON.parse(data.content_json) : null; }catch(_){ content = null; }
+      this.state.saved = content && Array.isArray(content.blocks) ? content : {blocks:[]};
+      this.state.version = data.content_version || 0;
+      Editor.render(Editor.applyOps(this.state.saved, pending));
+    },
+
     async open(name){
       const data = await api.get(name);
+      if(window.frappe && frappe.realtime){
+        if(this.state.current) frappe.realtime.doc_unsubscribe('Notion Page', this.state.current);
+        frappe.realtime.doc_subscribe('Notion Page', data.name);
+      }
+      this.state.inbox = [];
       this.state.current = data.name;
       this.$title.value = data.title || '';
       this.$crumb.textContent = this.$title.value || 'Untitled';
       let blocks = null;
       try{ blocks = data.content_json ? JSON.parse(data.content_json) : null; }catch(_){ blocks = null; }
       Editor.render(blocks);
+      this.state.saved = Editor.serialize();
+      this.state.version = data.content_version || 0;
       
       // Ensure focus after opening a page
       setTimeout(() => {
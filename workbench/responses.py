@@ -0,0 +1,44 @@
+"""Conditional reads: version tags (ETags) for read endpoints and a response cache keyed by them.
+
+An endpoint derives its tag from cheap version lookups (a primary-key read or Redis
+version tokens) plus its arguments. A client that sends the tag it holds, as the
+``etag`` argument or an ``If-None-Match`` header, gets a small "not modified" answer.
+Otherwise the payload is served from the cache when another request already built it
+for the same tag; entries never need invalidating since any change gives a new tag.
+"""
+
+import frappe
+
+from workbench.cursors import fingerprint
+
+RESPONSE_KEY = "workbench:response:{}:{}"
+RESPONSE_TTL = 15 * 60
+
+
+def make_etag(*parts):
+	return f'W/"{fingerprint(*parts)}"'
+
+
+def client_etag(etag=None):
+	"""Tag the client already holds: the ``etag`` argument, else the If-None-Match header."""
+	if etag:
+		return etag
+	request = getattr(frappe.local, "request", None)
+	return request.headers.get("If-None-Match") if request else None
+
+
+def conditional_response(kind, tag, build, etag=None):
+	"""``{"not_modified": True}`` when the client holds ``tag``, else the (cached) payload of ``build()``."""
+	held = client_etag(etag)
+	if held == tag:
+		if not etag:
+			# A real conditional GET: answer 304 without a body
+			frappe.local.response.http_status_code = 304
+		return {"not_modified": True, "etag": tag}
+
+	key = RESPONSE_KEY.format(kind, tag)
+	payload = frappe.cache().get_value(key)
+	if payload is None:
+		payload = build()
+		frappe.cache().set_value(key, payload, expires_in_sec=RESPONSE_TTL)
+	return {**payload, "etag": tag}
@@ -0,0 +1,339 @@
+"""Inverted index (WB Search Token) over page blocks and inline item props.
+
+Each indexed source (a Notion Page or a WB Inline Item) owns one row per distinct
+token, weighted by how often it occurs; title tokens count extra. Rows are diffed
+on every save so only changed tokens are written.
+"""
+
+import json
+import re
+from collections import Counter
+
+import frappe
+from frappe.utils import cint, now, strip_html
+
+from workbench.access import get_access
+from workbench.blocks import load_content
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+TITLE_WEIGHT = 5
+
+PAGE = "Notion Page"
+ITEM = "WB Inline Item"
+
+
+def tokenize(text):
+	return [
+		t[:MAX_TOKEN_LENGTH]
+		for t in TOKEN.findall(strip_html(text or "").lower())
+		if len(t) >= MIN_TOKEN_LENGTH
+	]
+
+
+def page_tokens(title, content_json):
+	counts = Counter(tokenize(title))
+	for token in counts:
+		counts[token] *= TITLE_WEIGHT
+	for block in load_content(content_json)["blocks"]:
+		counts.update(tokenize(block.get("text") or block.get("content") or ""))
+	return counts
+
+
+def item_tokens(props, schema=None):
+	counts = Counter()
+	for key, value in (props or {}).items():
+		values = value if isinstance(value, list) else [value]
+		text = " ".join(str(v) for v in values if isinstance(v, (str, int, float)))
+		weight = TITLE_WEIGHT if key == "Title" or (schema or {}).get(key, {}).get("type") == "title" else 1
+		for token in tokenize(text):
+			counts[token] += weight
+	return counts
+
+
+def sync_tokens(source_type, source_name, page, workspace, counts):
+	"""Bring the index rows of one source in line with ``counts``."""
+	sync_many(source_type, page, workspace, {source_name: counts})
+
+
+def sync_many(source_type, page, workspace, sources):
+	"""Bring the index rows of several sources of one page in line with their counts.
+
+	``sources`` maps source name to a token Counter; existing rows for all of them are
+	read in one query and new rows go out in one multi-row insert.
+	"""
+	if not sources:
+		return
+
+	current = {}
+	for row in frappe.get_all(
+		"WB Search Token",
+		filters={"source_type": source_type, "source_name": ["in", list(sources)]},
+		fields=["name", "source_name", "token", "weight"],
+	):
+		current[(row.source_name, row.token)] = row
+
+	stale = [row.name for (source, token), row in current.items() if token not in sources[source]]
+	if stale:
+		frappe.db.delete("WB Search Token", {"name": ["in", stale]})
+
+	new = []
+	for source, counts in sources.items():
+		for token, weight in counts.items():
+			row = current.get((source, token))
+			if not row:
+				new.append((source, token, weight))
+			elif cint(row.weight) != weight:
+				frappe.db.set_value("WB Search Token", row.name, "weight", weight, update_modified=False)
+
+	if new:
+		timestamp = now()
+		frappe.db.bulk_insert(
+			"WB Search Token",
+			[
+				"name",
+				"token",
+				"source_type",
+				"source_name",
+				"page",
+				"workspace",
+				"weight",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+			],
+			[
+				(
+					frappe.generate_hash(length=12),
+					token,
+					source_type,
+					source,
+					page,
+					workspace,
+					weight,
+					timestamp,
+					timestamp,
+					"Administrator",
+					"Administrator",
+				)
+				for source, token, weight in new
+			],
+		)
+
+
+def remove_source(source_type, source_name):
+	frappe.db.delete("WB Search Token", {"source_type": source_type, "source_name": source_name})
+
+
+def index_page(page, title, content_json, workspace):
+	sync_tokens(PAGE, page, page, workspace, page_tokens(title, content_json))
+
+
+def reindex_page(page):
+	"""Job body: index the stored content of ``page``, again if it was edited meanwhile."""
+	while True:
+		row = frappe.db.get_value(
+			PAGE, page, ["title", "content_json", "content_version", "workspace", "is_archived"], as_dict=True
+		)
+		if not row or row.is_archived:
+			return
+		index_page(page, row.title, row.content_json, row.workspace)
+		frappe.db.commit()
+		# A patch committed while this ran was deduplicated into this job
+		if cint(frappe.db.get_value(PAGE, page, "content_version")) == cint(row.content_version):
+			return
+
+
+def enqueue_reindex_page(page):
+	"""Index ``page`` after the commit, once per burst of edits instead of on every keystroke."""
+	frappe.enqueue(
+		"workbench.search.reindex_page",
+		page=page,
+		job_id=f"workbench-search-page-{page}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def remove_page(page):
+	"""Drop a page and the items of its collections from the index."""
+	frappe.db.delete("WB Search Token", {"page": page})
+
+
+def index_item(item, page, props, schema=None, workspace=None):
+	index_items(page, {item: props}, schema, workspace)
+
+
+def index_items(page, items, schema=None, workspace=None):
+	"""Index the props of several items (``{name: props}``) of one page."""
+	if page.startswith("temp-page-") or not items:
+		return
+	workspace = workspace or frappe.db.get_value(PAGE, page, "workspace")
+	sync_many(ITEM, page, workspace, {name: item_tokens(props, schema) for name, props in items.items()})
+
+
+def remove_sources(source_type, source_names):
+	if source_names:
+		frappe.db.delete(
+			"WB Search Token", {"source_type": source_type, "source_name": ["in", list(source_names)]}
+		)
+
+
+def on_page_update(doc, method=None):
+	if doc.is_archived:
+		remove_page(doc.name)
+	elif (
+		doc.has_value_changed("content_json")
+		or doc.has_value_changed("title")
+		or doc.has_value_changed("is_archived")
+	):
+		index_page(doc.name, doc.title, doc.content_json, doc.workspace)
+
+
+def on_page_trash(doc, method=None):
+	remove_page(doc.name)
+
+
+def search(query, workspace=None, limit=20, start=0):
+	"""Ranked, prefix-matching search over pages and inline items the user can see.
+
+	Every query term must match (as a token prefix). Results are ranked by summed
+	token weight and filtered by page visibility before being paginated.
+	"""
+	terms = list(dict.fromkeys(tokenize(query)))[:8]
+	limit, start = cint(limit) or 20, cint(start)
+	if not terms:
+		return []
+
+	patterns = [f"{t}%" for t in terms]
+	matched = " + ".join(["MAX(token LIKE %s)"] * len(terms))
+	where = " OR ".join(["token LIKE %s"] * len(terms))
+	conditions, values = [f"({where})", "p.is_archived = 0"], [*patterns]
+	if workspace:
+		conditions.append("t.workspace = %s")
+		values.append(workspace)
+
+	results, offset, batch = [], 0, max(limit * 2, 50)
+	wanted = start + limit
+	while len(results) < wanted:
+		rows = frappe.db.sql(
+			f"""
+			SELECT t.source_type, t.source_name, t.page, p.workspace, p.title AS page_title,
+				p.visibility, p.company, p.created_by, SUM(t.weight) AS score, {matched} AS matched
+			FROM `tabWB Search Token` t
+			JOIN `tabNotion Page` p ON p.name = t.page
+			WHERE {" AND ".join(conditions)}
+			GROUP BY t.source_type, t.source_name
+			HAVING matched = %s
+			ORDER BY score DESC, t.source_name ASC
+			LIMIT %s OFFSET %s
+			""",
+			[*patterns, *values, len(terms), batch, offset],
+			as_dict=True,
+		)
+		for row in rows:
+			page = frappe._dict(
+				name=row.page, visibility=row.visibility, company=row.company, created_by=row.created_by
+			)
+			if get_access(row.workspace).can_view_page(page):
+				results.append(row)
+		if len(rows) < batch:
+			break
+		offset += batch
+
+	results = results[start:wanted]
+	items = (
+		{
+			item.name: item
+			for item in frappe.get_all(
+				ITEM,
+				filters={"name": ["in", [r.source_name for r in results if r.source_type == ITEM]]},
+				fields=["name", "collection", "props_json"],
+			)
+		}
+		if any(r.source_type == ITEM for r in results)
+		else {}
+	)
+	return [format_result(row, items.get(row.source_name)) for row in results]
+
+
+def format_result(row, item=None):
+	result = {
+		"type": "page" if row.source_type == PAGE else "item",
+		"name": row.source_name,
+		"page": row.page,
+		"workspace": row.workspace,
+		"title": row.page_title,
+		"score": row.score,
+	}
+	if item:
+		props = json.loads(item.props_json or "{}")
+		result["title"] = props.get("Title") or row.page_title
+		result["collection"] = item.collection
+	return result
+
+
+def index_page_items(pages, chunk_size=500):
+	"""Index the live items of the collections of ``pages``, reading items in chunks."""
+	for page in pages:
+		workspace = frappe.db.get_value(PAGE, page, "workspace")
+		for collection, schema_json in frappe.db.sql(
+			"SELECT name, schema_json FROM `tabWB Inline Collection` WHERE page = %s", (page,)
+		):
+			schema = json.loads(schema_json or "{}")
+			last = ""
+			while rows := frappe.db.sql(
+				"""
+				SELECT name, props_json FROM `tabWB Inline Item`
+				WHERE collection = %s AND is_archived = 0 AND name > %s ORDER BY name LIMIT %s
+				""",
+				(collection, last, chunk_size),
+			):
+				index_items(
+					page, {name: json.loads(props or "{}") for name, props in rows}, schema, workspace
+				)
+				last = rows[-1][0]
+				frappe.db.commit()
+
+
+def rebuild_search_index(chunk_size=500):
+	"""Re-index every non-archived page and item, reading rows in chunks."""
+	processed = 0
+	for doctype, query in (
+		(
+			PAGE,
+			"""
+			SELECT name, title, content_json, workspace FROM `tabNotion Page`
+			WHERE is_archived = 0 AND name > %s ORDER BY name LIMIT %s
+		""",
+		),
+		(
+			ITEM,
+			"""
+			SELECT i.name, i.props_json, c.page, c.schema_json FROM `tabWB Inline Item` i
+			JOIN `tabWB Inline Collection` c ON c.name = i.collection
+			WHERE i.is_archived = 0 AND i.name > %s ORDER BY i.name LIMIT %s
+		""",
+		),
+	):
+		last = ""
+		while rows := frappe.db.sql(query, (last, chunk_size), as_dict=True):
+			for row in rows:
+				try:
+					if doctype == PAGE:
+						index_page(row.name, row.title, row.content_json, row.workspace)
+					else:
+						index_item(
+							row.name,
+							row.page,
+							json.loads(row.props_json or "{}"),
+							json.loads(row.schema_json or "{}"),
+						)
+				except Exception:
+					frappe.log_error(f"Could not index {doctype} {row.name}")
+				processed += 1
+			last = rows[-1].name
+			frappe.db.commit()
+	return processed
@@ -0,0 +1,66 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.access import WorkspaceAccess
+
+
+def make_access(**overrides):
+	"""A WorkspaceAccess with preloaded state, so the rules can be checked without fixtures."""
+	access = WorkspaceAccess.__new__(WorkspaceAccess)
+	access.user = "member@example.com"
+	access.workspace = frappe._dict(
+		name="WS", owner_user="owner@example.com", visibility="Private", company="ACME"
+	)
+	access.default_company = "ACME"
+	access.company = "ACME"
+	access.role = None
+	access.page_roles = {}
+	access.__dict__.update(overrides)
+	return access
+
+
+def page(**fields):
+	return frappe._dict(
+		{
+			"name": "PAGE-00001",
+			"visibility": "Use Workspace",
+			"company": None,
+			"created_by": "owner@example.com",
+			**fields,
+		}
+	)
+
+
+class TestWorkspaceAccess(FrappeTestCase):
+	def test_workspace_roles(self):
+		self.assertFalse(make_access().can_access_workspace())
+		viewer = make_access(role="Viewer")
+		self.assertTrue(viewer.can_access_workspace())
+		self.assertFalse(viewer.can_access_workspace(write=True))
+		self.assertTrue(make_access(role="Editor").can_access_workspace(write=True))
+		self.assertTrue(make_access(user="owner@example.com").can_access_workspace(write=True))
+
+	def test_company_workspace(self):
+		workspace = frappe._dict(
+			name="WS", owner_user="owner@example.com", visibility="Company", company="ACME"
+		)
+		self.assertTrue(make_access(workspace=workspace).can_access_workspace())
+		self.assertFalse(make_access(workspace=workspace, company="Other").can_access_workspace())
+
+	def test_page_visibility(self):
+		access = make_access(page_roles={"PAGE-00002": "Viewer"})
+		self.assertFalse(access.can_view_page(page()))
+		self.assertFalse(access.can_view_page(page(visibility="Private")))
+		self.assertTrue(access.can_view_page(page(visibility="Private", created_by="member@example.com")))
+		self.assertTrue(access.can_view_page(page(visibility="Company")))
+		self.assertFalse(access.can_view_page(page(visibility="Specific Users")))
+		self.assertTrue(access.can_view_page(page(name="PAGE-00002", visibility="Specific Users")))
+
+	def test_page_editing(self):
+		access = make_access(page_roles={"PAGE-00002": "Editor"})
+		self.assertTrue(access.can_edit_page(page(name="PAGE-00002", visibility="Specific Users")))
+		self.assertFalse(access.can_edit_page(page(visibility="Company")))
+		self.assertTrue(make_access(role="Editor").can_edit_page(page()))
@@ -0,0 +1,74 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.blocks import apply_ops, diff_ops, load_content, touched_blocks
+
+
+def ids(content):
+	return [b["id"] for b in content["blocks"]]
+
+
+class TestBlockOps(FrappeTestCase):
+	def setUp(self):
+		self.content = load_content(
+			'{"blocks": [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}, {"id": "c", "text": "C"}]}'
+		)
+
+	def test_insert(self):
+		apply_ops(
+			self.content,
+			[{"op": "insert", "block": {"id": "x"}, "after": "a"}, {"op": "insert", "block": {"id": "y"}}],
+		)
+		self.assertEqual(ids(self.content), ["y", "a", "x", "b", "c"])
+
+	def test_update_replaces_the_block(self):
+		apply_ops(
+			self.content,
+			[{"op": "update", "id": "b", "block": {"id": "ignored", "text": "B2", "checked": True}}],
+		)
+		self.assertEqual(self.content["blocks"][1], {"id": "b", "text": "B2", "checked": True})
+		apply_ops(self.content, [{"op": "update", "id": "b", "block": {"text": "B3"}}])
+		self.assertEqual(self.content["blocks"][1], {"id": "b", "text": "B3"})
+
+	def test_diff_ops_round_trip_drops_removed_keys(self):
+		old = {
+			"blocks": [
+				{"id": "a", "type": "todo", "text": "A", "checked": True, "url": "https://example.com"}
+			]
+		}
+		new = {"blocks": [{"id": "a", "type": "todo", "text": "A"}]}
+		self.assertEqual(apply_ops(json.loads(json.dumps(old)), diff_ops(old, new)), new)
+
+	def test_move_and_delete(self):
+		apply_ops(self.content, [{"op": "move", "id": "c", "after": None}, {"op": "delete", "id": "a"}])
+		self.assertEqual(ids(self.content), ["c", "b"])
+		apply_ops(self.content, [{"op": "move", "id": "c", "after": "b"}])
+		self.assertEqual(ids(self.content), ["b", "c"])
+
+	def test_invalid_ops_are_rejected(self):
+		for op in (
+			{"op": "update", "id": "missing", "block": {}},
+			{"op": "insert", "block": {"id": "a"}},
+			{"op": "move", "id": "a", "after": "a"},
+			{"op": "replace", "id": "a"},
+		):
+			with self.assertRaises(frappe.ValidationError):
+				apply_ops(self.content, [op])
+
+	def test_diff_ops_round_trip(self):
+		target = {"blocks": [{"id": "c", "text": "C"}, {"id": "x", "text": "X"}, {"id": "a", "text": "A2"}]}
+		ops = diff_ops(self.content, target)
+		self.assertEqual([op["op"] for op in ops], ["delete", "move", "insert", "update"])
+		self.assertEqual(apply_ops(json.loads(json.dumps(self.content)), ops)["blocks"], target["blocks"])
+		self.assertEqual(diff_ops(self.content, self.content), [])
+		self.assertIsNone(diff_ops(self.content, {"blocks": [{"text": "no id"}]}))
+
+	def test_touched_blocks(self):
+		ops = [{"op": "insert", "block": {"id": "x"}, "after": "a"}, {"op": "update", "id": "b", "block": {}}]
+		self.assertEqual(touched_blocks(ops), {"x", "b"})
+		self.assertEqual(touched_blocks(ops, anchors=True), {"x", "b", "a"})
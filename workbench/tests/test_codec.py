@@ -0,0 +1,31 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import json
+
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.blocks import load_content
+from workbench.codec import COMPRESS_THRESHOLD, HEADER, decode, encode
+
+
+class TestCodec(FrappeTestCase):
+	def test_small_payloads_stay_plain(self):
+		value = json.dumps({"blocks": [{"id": "a", "text": "hi"}]})
+		self.assertEqual(encode(value), value)
+		self.assertEqual(decode(value), value)
+		self.assertIsNone(decode(None))
+
+	def test_large_payloads_round_trip(self):
+		content = {
+			"blocks": [{"id": str(i), "type": "paragraph", "text": "lorem ipsum " * 20} for i in range(200)]
+		}
+		value = json.dumps(content)
+		self.assertGreater(len(value), COMPRESS_THRESHOLD)
+
+		stored = encode(value)
+		self.assertTrue(stored.startswith(HEADER))
+		self.assertLess(len(stored), len(value) / 4)
+		self.assertEqual(encode(stored), stored)
+		self.assertEqual(decode(stored), value)
+		self.assertEqual(load_content(stored), content)
@@ -0,0 +1,51 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import random
+import sqlite3
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.cursors import decode_cursor, encode_cursor, keyset_condition
+
+COLUMNS = [("a", [], "DESC"), ("b", [], "ASC"), ("name", [], "ASC")]
+
+
+class TestCursors(FrappeTestCase):
+	def test_round_trip(self):
+		token = encode_cursor(["x", 3, None], "scope")
+		self.assertEqual(decode_cursor(token, "scope"), ["x", 3, None])
+
+	def test_rejects_foreign_or_garbled_tokens(self):
+		token = encode_cursor(["x"], "scope")
+		with self.assertRaises(frappe.ValidationError):
+			decode_cursor(token, "other")
+		with self.assertRaises(frappe.ValidationError):
+			decode_cursor("not a cursor", "scope")
+
+	def test_keyset_pages_cover_the_order_exactly_once(self):
+		# SQLite orders NULLs like MariaDB (first ascending, last descending)
+		db = sqlite3.connect(":memory:")
+		db.execute("CREATE TABLE t (name TEXT, a INTEGER, b TEXT)")
+		rng = random.Random(7)
+		db.executemany(
+			"INSERT INTO t VALUES (?, ?, ?)",
+			[(f"r{i:03}", rng.choice([None, 1, 2, 3]), rng.choice([None, "x", "y"])) for i in range(200)],
+		)
+		order = "a DESC, b ASC, name ASC"
+		expected = [r[0] for r in db.execute(f"SELECT name FROM t ORDER BY {order}")]
+
+		seen, after = [], None
+		while True:
+			where, values = keyset_condition(COLUMNS, after) if after else ("1=1", [])
+			rows = db.execute(
+				f"SELECT name, a, b FROM t WHERE {where.replace('%s', '?')} ORDER BY {order} LIMIT 7", values
+			).fetchall()
+			if not rows:
+				break
+			seen.extend(r[0] for r in rows)
+			name, a, b = rows[-1]
+			after = [a, b, name]
+
+		self.assertEqual(seen, expected)
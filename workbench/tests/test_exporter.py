@@ -0,0 +1,43 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.exporter import blocks_markdown, cell, safe_name, title_property
+from workbench.importer import markdown_blocks
+
+
+class TestExporter(FrappeTestCase):
+	def test_markdown_round_trips_through_the_importer(self):
+		blocks = [
+			{"type": "heading2", "content": "Plan"},
+			{"type": "paragraph", "content": "<b>Ship</b> it"},
+			{"type": "bulleted", "content": "one"},
+			{"type": "checklist", "content": "done", "checked": True},
+			{"type": "numbered", "content": "first"},
+			{"type": "quote", "content": "said"},
+			{"type": "divider", "content": ""},
+			{"type": "code", "content": "x = 1"},
+		]
+		parsed = markdown_blocks(blocks_markdown(blocks))
+		self.assertEqual(
+			[(b["type"], b["content"]) for b in parsed],
+			[(b["type"], b["content"].replace("<b>", "").replace("</b>", "")) for b in blocks],
+		)
+		self.assertTrue(parsed[3]["checked"])
+
+	def test_link_lines_and_empty_blocks(self):
+		blocks = [{"type": "collection", "blockId": "b1"}, {"type": "paragraph", "content": ""}]
+		markdown = blocks_markdown(
+			blocks, lambda block: "[Tasks](Tasks.csv)" if block["type"] == "collection" else None
+		)
+		self.assertEqual(markdown, "[Tasks](Tasks.csv)\n")
+
+	def test_cells_and_names(self):
+		self.assertEqual(cell(None), "")
+		self.assertEqual(cell(["a", "b"]), "a, b")
+		self.assertEqual(cell(3), "3")
+		self.assertEqual(safe_name('a/b: "c"'), "a b c")
+		self.assertEqual(safe_name("  "), "Untitled")
+		self.assertEqual(title_property({"Status": {"type": "select"}, "Name": {"type": "title"}}), "Name")
+		self.assertEqual(title_property({"Status": {"type": "select"}}), "Status")
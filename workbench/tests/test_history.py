@@ -0,0 +1,47 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import json
+from itertools import pairwise
+
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.history import apply_delta, compose, diff, join_content, split_content
+
+
+def page(*blocks, **meta):
+	return {**meta, "blocks": [{"id": b, "type": "paragraph", "text": b.upper()} for b in blocks]}
+
+
+class TestPageHistory(FrappeTestCase):
+	def test_split_and_join_round_trip(self):
+		content = page("a", "b", "c", version=2)
+		self.assertEqual(join_content(*split_content(content)), content)
+		self.assertEqual(join_content(*split_content(json.dumps(content))), content)
+
+	def test_delta_covers_only_the_edit(self):
+		before = page(*[f"b{i}" for i in range(500)])
+		after = json.loads(json.dumps(before))
+		after["blocks"][10]["text"] = "edited"
+		after["blocks"].insert(200, {"id": "new", "type": "paragraph", "text": "hello"})
+
+		delta = diff(split_content(before), split_content(after))
+		self.assertEqual(set(delta["set"]), {"b10", "new"})
+		self.assertEqual(delta["after"], {"new": "b199", "b200": "new"})
+		self.assertNotIn("drop", delta)
+		self.assertEqual(join_content(*apply_delta(split_content(before), delta)), after)
+
+	def test_moves_drops_and_meta(self):
+		before = page("a", "b", "c", "d", time=1)
+		after = page("d", "a", "c", time=2)
+		delta = diff(split_content(before), split_content(after))
+		self.assertEqual(delta["drop"], ["b"])
+		self.assertEqual(join_content(*apply_delta(split_content(before), delta)), after)
+
+	def test_compose_matches_sequential_deltas(self):
+		versions = [page("a", "b", "c"), page("a", "x", "c"), page("c", "a", "b"), page("b", "c", "y")]
+		states = [split_content(v) for v in versions]
+		composed = {}
+		for old, new in pairwise(states):
+			composed = compose(composed, diff(old, new))
+		self.assertEqual(join_content(*apply_delta(split_content(versions[0]), composed)), versions[-1])
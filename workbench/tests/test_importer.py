@@ -0,0 +1,132 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.importer import (
+	ExportLayout,
+	csv_schema,
+	import_key,
+	markdown_blocks,
+	page_blocks,
+	page_names,
+	split_stem,
+)
+
+PAGE_ID = "0123456789abcdef0123456789abcdef"
+CHILD_ID = "fedcba9876543210fedcba9876543210"
+DB_ID = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
+ROOT_DB_ID = "bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb"
+
+
+def kinds(blocks):
+	return [(block["type"], block["content"]) for block in blocks]
+
+
+class TestImporter(FrappeTestCase):
+	def test_split_stem(self):
+		self.assertEqual(split_stem(f"Home {PAGE_ID}.md"), ("Home", PAGE_ID))
+		self.assertEqual(split_stem(f"Home {PAGE_ID}/Tasks {DB_ID}_all.csv"), ("Tasks", DB_ID))
+		self.assertEqual(split_stem("notes/Plain page.md"), ("Plain page", "notes/Plain page"))
+
+	def test_markdown_blocks(self):
+		text = "\n".join(
+			[
+				"# Title",
+				"Some *text* with a [link](https://example.com)",
+				"continued here",
+				"",
+				"## Section",
+				"- item",
+				"- [x] done",
+				"1. first",
+				"> quoted",
+				"---",
+				"```",
+				"code line",
+				"",
+				"```",
+				"![diagram](images/a%20b.png)",
+			]
+		)
+		self.assertEqual(
+			kinds(markdown_blocks(text)),
+			[
+				("heading1", "Title"),
+				("paragraph", "Some *text* with a link continued here"),
+				("heading2", "Section"),
+				("bulleted", "item"),
+				("checklist", "done"),
+				("numbered", "first"),
+				("quote", "quoted"),
+				("divider", ""),
+				("code", "code line\n"),
+				("image", "images/a b.png"),
+			],
+		)
+		self.assertTrue(markdown_blocks("- [x] done")[0]["checked"])
+
+	def test_page_blocks_drop_the_title_heading(self):
+		self.assertEqual(kinds(page_blocks("# Home\n\nHello", "Home")), [("paragraph", "Hello")])
+		self.assertEqual(kinds(page_blocks("# Other\n", "Home")), [("heading1", "Other")])
+
+	def test_link_lines(self):
+		def link(href, label):
+			return {"type": "paragraph", "content": label, "page": href} if href.endswith(".md") else None
+
+		blocks = markdown_blocks("[Child](Child.md)\n[Site](https://example.com)", link)
+		self.assertEqual(blocks[0], {"type": "paragraph", "content": "Child", "page": "Child.md"})
+		self.assertEqual(kinds(blocks[1:]), [("paragraph", "Site")])
+
+	def test_layout(self):
+		layout = ExportLayout(
+			[
+				f"Home {PAGE_ID}.md",
+				f"Home {PAGE_ID}/Child {CHILD_ID}.md",
+				f"Home {PAGE_ID}/Tasks {DB_ID}.csv",
+				f"Home {PAGE_ID}/Tasks {DB_ID}_all.csv",
+				f"Home {PAGE_ID}/Tasks {DB_ID}/Write docs {CHILD_ID[::-1]}.md",
+				f"Contacts {ROOT_DB_ID}.csv",
+				"images/logo.png",
+			]
+		)
+		self.assertEqual(
+			layout.databases, [f"Contacts {ROOT_DB_ID}.csv", f"Home {PAGE_ID}/Tasks {DB_ID}_all.csv"]
+		)
+		self.assertEqual(
+			[(key, title) for key, title, _entry in layout.pages],
+			[(PAGE_ID, "Home"), (CHILD_ID, "Child"), (f"db:{ROOT_DB_ID}", "Contacts")],
+		)
+		self.assertEqual(layout.database_page_key(layout.databases[1]), PAGE_ID)
+		self.assertEqual(layout.database_page_key(layout.databases[0]), f"db:{ROOT_DB_ID}")
+		self.assertEqual(list(layout.row_pages(layout.databases[1])), ["Write docs"])
+		self.assertEqual(
+			layout.resolve(f"Home {PAGE_ID}.md", f"Home%20{PAGE_ID}/Child%20{CHILD_ID}.md"),
+			f"Home {PAGE_ID}/Child {CHILD_ID}.md",
+		)
+		self.assertIsNone(layout.resolve(f"Home {PAGE_ID}.md", "https://example.com/x.md"))
+
+	def test_csv_schema(self):
+		self.assertEqual(
+			csv_schema(["Name", "Status"]),
+			{"Name": {"type": "title"}, "Status": {"type": "text"}},
+		)
+
+	def test_page_names_are_scoped_to_their_import(self):
+		workspace = frappe.get_doc({"doctype": "Workbench Workspace", "title": "Imported twice"}).insert()
+		pages = {}
+		for job in ("import-a", "import-b"):
+			page = frappe.get_doc(
+				{
+					"doctype": "Notion Page",
+					"workspace": workspace.name,
+					"title": "Home",
+					"import_key": import_key(job, PAGE_ID),
+				}
+			).insert()
+			pages[job] = page.name
+
+		# Importing the same export again must not resolve to the pages of the first run
+		for job, page in pages.items():
+			self.assertEqual(page_names(workspace.name, job, [PAGE_ID, CHILD_ID]), {PAGE_ID: page})
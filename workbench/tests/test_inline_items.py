@@ -0,0 +1,65 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.workbench.inline_api.inline_collection import inline_item_upsert
+
+SCHEMA = {"Title": {"type": "title"}}
+
+
+def make_collection(block_id):
+	workspace = frappe.get_doc({"doctype": "Workbench Workspace", "title": "Upsert workspace"}).insert()
+	page = frappe.get_doc(
+		{"doctype": "Notion Page", "workspace": workspace.name, "title": "Upsert page"}
+	).insert()
+	collection = frappe.get_doc(
+		{
+			"doctype": "WB Inline Collection",
+			"page": page.name,
+			"block_id": block_id,
+			"schema_json": json.dumps(SCHEMA),
+		}
+	).insert()
+	return page.name, collection.name
+
+
+class TestItemUpsert(FrappeTestCase):
+	def setUp(self):
+		self.page, self.collection = make_collection(f"blk-{frappe.generate_hash(length=8)}")
+		self.block_id = frappe.db.get_value("WB Inline Collection", self.collection, "block_id")
+		commit = patch.object(frappe.db, "commit")
+		commit.start()
+		self.addCleanup(commit.stop)
+
+	def upsert(self, item, page=None, block_id=None):
+		return inline_item_upsert(page or self.page, block_id or self.block_id, item)["item"]
+
+	def test_creates_items_under_the_client_id(self):
+		client_id = f"item-{frappe.generate_hash(length=12)}"
+		self.upsert({"id": client_id, "props": {"Title": "New row"}, "content": {}, "position": 0})
+		self.assertEqual(frappe.db.get_value("WB Inline Item", client_id, "collection"), self.collection)
+
+		# The editor saves the row again under the same id
+		self.upsert({"id": client_id, "props": {"Title": "Renamed"}})
+		rows = frappe.get_all("WB Inline Item", filters={"collection": self.collection}, pluck="props_json")
+		self.assertEqual([json.loads(r) for r in rows], [{"Title": "Renamed"}])
+
+	def test_creates_items_without_an_id(self):
+		created = self.upsert({"props": {"Title": "Server id"}})
+		self.assertEqual(frappe.db.get_value("WB Inline Item", created["id"], "collection"), self.collection)
+
+	def test_rejects_items_of_another_collection(self):
+		other_page, _other = make_collection("blk-other")
+		foreign = self.upsert({"props": {"Title": "Mine"}})["id"]
+		with self.assertRaises(frappe.PermissionError):
+			self.upsert(
+				{"id": foreign, "props": {"Title": "Taken over"}}, page=other_page, block_id="blk-other"
+			)
+		self.assertEqual(
+			json.loads(frappe.db.get_value("WB Inline Item", foreign, "props_json")), {"Title": "Mine"}
+		)
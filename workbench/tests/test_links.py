@@ -0,0 +1,72 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.blocks import load_content
+from workbench.links import extract_page_refs, sync_page_links, unlink_pages
+
+
+class TestLinkExtraction(FrappeTestCase):
+	def test_refs_from_text_and_link_blocks(self):
+		content = {
+			"blocks": [
+				{"id": "a", "type": "paragraph", "text": "See PAGE-00012 and PAGE-00013."},
+				{"id": "b", "type": "paragraph", "content": "Also PAGE-00012"},
+				{"id": "c", "type": "page_link", "page": "PAGE-00099"},
+				{"id": "d", "type": "paragraph", "text": "NOTAPAGE-1 is not a reference"},
+			]
+		}
+		self.assertEqual(extract_page_refs(content), {"PAGE-00012", "PAGE-00013", "PAGE-00099"})
+
+	def test_empty_content(self):
+		self.assertEqual(extract_page_refs(""), set())
+		self.assertEqual(extract_page_refs('{"blocks": []}'), set())
+
+
+class TestUnlinkPages(FrappeTestCase):
+	def test_references_to_deleted_pages_are_dropped(self):
+		workspace = frappe.get_doc({"doctype": "Workbench Workspace", "title": "Unlink workspace"}).insert()
+
+		def make_page(title, blocks):
+			return frappe.get_doc(
+				{
+					"doctype": "Notion Page",
+					"workspace": workspace.name,
+					"title": title,
+					"content_json": json.dumps({"blocks": blocks}),
+				}
+			).insert()
+
+		target = make_page("Target", [])
+		kept = make_page("Kept", [])
+		source = make_page(
+			"Source",
+			[
+				{"id": "a", "type": "paragraph", "content": "Gone", "page": target.name},
+				{"id": "b", "type": "paragraph", "content": "Stays", "page": kept.name},
+			],
+		)
+		sync_page_links(source.name, source.content_json)
+		version = frappe.db.get_value("Notion Page", source.name, "content_version")
+
+		unlink_pages([target.name])
+
+		row = frappe.db.get_value(
+			"Notion Page", source.name, ["content_json", "content_version"], as_dict=True
+		)
+		self.assertEqual(
+			load_content(row.content_json)["blocks"],
+			[
+				{"id": "a", "type": "paragraph", "content": "Gone"},
+				{"id": "b", "type": "paragraph", "content": "Stays", "page": kept.name},
+			],
+		)
+		self.assertEqual(row.content_version, version + 1)
+		self.assertEqual(
+			frappe.get_all("WB Page Link", filters={"source_page": source.name}, pluck="target_page"),
+			[kept.name],
+		)
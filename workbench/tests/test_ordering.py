@@ -0,0 +1,79 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import random
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.ordering import HEAD_WIDTH, key_between, keys_after, move_key, position_key
+
+
+class TestOrderKeys(FrappeTestCase):
+	def test_append_and_prepend_stay_short(self):
+		keys = keys_after(None, 1000)
+		self.assertEqual(keys, sorted(keys))
+		self.assertTrue(all(len(k) == HEAD_WIDTH for k in keys))
+		self.assertLess(key_between(None, keys[0]), keys[0])
+
+	def test_random_inserts_keep_order(self):
+		rng = random.Random(42)
+		keys = [key_between()]
+		for _ in range(2000):
+			i = rng.randint(0, len(keys))
+			a = keys[i - 1] if i else None
+			b = keys[i] if i < len(keys) else None
+			key = key_between(a, b)
+			self.assertTrue((a is None or a < key) and (b is None or key < b))
+			keys.insert(i, key)
+		self.assertEqual(len(set(keys)), len(keys))
+
+	def test_keys_use_lowercase_alphabet(self):
+		a, b = keys_after(None, 2)
+		for _ in range(50):
+			b = key_between(a, b)
+		self.assertRegex(b, r"^[0-9a-z]+$")
+
+	def test_rejects_inverted_bounds(self):
+		a, b = keys_after(None, 2)
+		with self.assertRaises(frappe.ValidationError):
+			key_between(b, a)
+
+
+class TestItemOrdering(FrappeTestCase):
+	def insert_items(self, collection, count):
+		names = [frappe.generate_hash(length=10) for _ in range(count)]
+		frappe.db.bulk_insert(
+			"WB Inline Item",
+			["name", "collection", "props_json", "position", "sort_key", "is_archived"],
+			[
+				(name, collection, "{}", i, key, 0)
+				for i, (name, key) in enumerate(zip(names, keys_after(None, count), strict=True))
+			],
+		)
+		return names
+
+	def order(self, collection):
+		return frappe.get_all(
+			"WB Inline Item", filters={"collection": collection}, order_by="sort_key asc", pluck="name"
+		)
+
+	def test_position_key_places_the_row_at_its_index(self):
+		collection = frappe.generate_hash(length=10)
+		a, b, c, d = self.insert_items(collection, 4)
+		for position, expected in (
+			(0, [d, a, b, c]),
+			(1.5, [a, b, d, c]),
+			(2, [a, b, d, c]),
+			(99, [a, b, c, d]),
+		):
+			key = position_key("WB Inline Item", collection, d, position)
+			frappe.db.set_value("WB Inline Item", d, "sort_key", key, update_modified=False)
+			self.assertEqual(self.order(collection), expected)
+
+	def test_move_key_rejects_rows_of_another_list(self):
+		(mine,) = self.insert_items(frappe.generate_hash(length=10), 1)
+		(foreign,) = self.insert_items(frappe.generate_hash(length=10), 1)
+		collection = frappe.db.get_value("WB Inline Item", mine, "collection")
+		self.assertRaises(frappe.ValidationError, move_key, "WB Inline Item", collection, after=foreign)
+		self.assertTrue(move_key("WB Inline Item", collection, after=mine))
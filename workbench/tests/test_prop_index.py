@@ -0,0 +1,60 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+from datetime import datetime
+
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.workbench.inline_api.prop_index import build_range_query, extract_values
+
+SCHEMA = {
+	"Title": {"type": "title"},
+	"Start": {"type": "date"},
+	"End": {"type": "date"},
+	"Estimate": {"type": "number"},
+	"Tags": {"type": "multi_select"},
+	"Done": {"type": "checkbox"},
+}
+
+
+class TestPropIndex(FrappeTestCase):
+	def test_values_are_typed(self):
+		values = extract_values(
+			SCHEMA,
+			{
+				"Title": "Launch" * 50,
+				"Start": "2025-03-01",
+				"End": "",
+				"Estimate": "3.5",
+				"Tags": ["a", "b", "a"],
+				"Done": False,
+				"Other": "2025-01-01",
+			},
+		)
+		self.assertEqual(
+			values,
+			[
+				("Title", ("Launch" * 50)[:140], None, None),
+				("Start", None, None, datetime(2025, 3, 1)),
+				("Estimate", None, 3.5, None),
+				("Tags", "a", None, None),
+				("Tags", "b", None, None),
+			],
+		)
+		self.assertEqual(extract_values(SCHEMA, {"Done": True, "Estimate": "n/a"}), [("Done", None, 1, None)])
+
+	def test_range_queries(self):
+		start, end = datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59)
+
+		query, values = build_range_query("abc", "Start", None, start, end, 100)
+		self.assertIn("BETWEEN", query)
+		# Value rows only ever return items of their own collection
+		self.assertIn("i.collection = s.collection", query)
+		self.assertEqual(query.count("%s"), len(values))
+
+		query, values = build_range_query("abc", "Start", "End", start, end, 100, max_span=86400)
+		self.assertIn("LEFT JOIN", query)
+		self.assertEqual(query.count("%s"), len(values))
+		self.assertEqual(values[-1], 100)
+		# Items can only overlap if they start at most the longest span before the window
+		self.assertIn(datetime(2025, 2, 28), values)
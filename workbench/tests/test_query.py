@@ -0,0 +1,183 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.workbench.inline_api.query import (
+	TEXT_INDEX_LENGTH,
+	build_group_items_query,
+	build_group_query,
+	build_items_query,
+	compile_filters,
+	compile_sorts,
+	project_props,
+	value_index,
+)
+
+SCHEMA = {
+	"Title": {"type": "title"},
+	"Status": {"type": "select"},
+	"Estimate": {"type": "number"},
+	"Tags": {"type": "multi_select"},
+	"Due": {"type": "date"},
+	"Done": {"type": "checkbox"},
+}
+
+
+class TestInlineQuery(FrappeTestCase):
+	def test_empty_filters_match_everything(self):
+		self.assertEqual(compile_filters([], SCHEMA), ("1=1", []))
+
+	def test_typed_values_are_coerced(self):
+		_, values = compile_filters(
+			{"property": "Estimate", "operator": "greater_than", "value": "3"}, SCHEMA
+		)
+		self.assertEqual(values, ['$."Estimate"', 3.0])
+
+		_, values = compile_filters(
+			{"property": "Due", "operator": "before", "value": "2024-02-01 10:00:00"}, SCHEMA
+		)
+		self.assertEqual(values, ['$."Due"', "2024-02-01"])
+
+	def test_nested_groups(self):
+		sql, values = compile_filters(
+			[
+				{"property": "Status", "operator": "equals", "value": "Done"},
+				{
+					"or": [
+						{"property": "Tags", "operator": "contains", "value": "Bug"},
+						{"property": "Done", "operator": "equals", "value": False},
+					]
+				},
+			],
+			SCHEMA,
+		)
+		self.assertIn(" AND ", sql)
+		self.assertIn(" OR ", sql)
+		self.assertEqual(sql.count("%s"), len(values))
+
+	def test_like_patterns_are_escaped(self):
+		_, values = compile_filters({"property": "Title", "operator": "contains", "value": "50%_off"}, SCHEMA)
+		self.assertEqual(values[-1], "%50\\%\\_off%")
+
+	def test_unknown_property_and_operator_are_rejected(self):
+		with self.assertRaises(frappe.ValidationError):
+			compile_filters({"property": "Missing", "operator": "equals", "value": 1}, SCHEMA)
+		with self.assertRaises(frappe.ValidationError):
+			compile_filters({"property": "Done", "operator": "contains", "value": 1}, SCHEMA)
+
+	def test_sorts_keep_position_tiebreak(self):
+		sql, values = compile_sorts([{"property": "Estimate", "direction": "descending"}], SCHEMA)
+		self.assertTrue(sql.endswith("i.sort_key ASC, i.name ASC"))
+		self.assertIn("DESC", sql)
+		self.assertEqual(values, ['$."Estimate"'])
+
+	def test_query_placeholders_line_up(self):
+		query, values = build_items_query(
+			"abc",
+			SCHEMA,
+			filters=[{"property": "Status", "operator": "in", "value": ["A", "B"]}],
+			limit=20,
+			offset=40,
+		)
+		self.assertEqual(query.count("%s"), len(values))
+		self.assertEqual(values[-2:], [20, 40])
+
+	def test_projection_selects_only_requested_props(self):
+		query, values = build_items_query("abc", SCHEMA, properties=["Title", "Due"])
+		self.assertNotIn("props_json`", query)
+		self.assertNotIn("content_json", query)
+		self.assertIn("AS prop_1", query)
+		self.assertEqual(query.count("%s"), len(values))
+		self.assertEqual(values[:2], ['$."Title"', '$."Due"'])
+
+		row = {"name": "x", "prop_0": '"Launch"', "prop_1": None}
+		self.assertEqual(project_props(row, ["Title", "Due"]), {"Title": "Launch"})
+		self.assertEqual(row, {"name": "x"})
+
+		with self.assertRaises(frappe.ValidationError):
+			build_items_query("abc", SCHEMA, properties=["Missing"])
+
+	def test_cursor_resumes_instead_of_offset(self):
+		sorts = [{"property": "Estimate", "direction": "descending"}]
+		query, values = build_items_query(
+			"abc", SCHEMA, sorts=sorts, offset=40, after=["3", "a0000000", "x1"]
+		)
+		self.assertIn("AS cursor_2", query)
+		self.assertEqual(query.count("%s"), len(values))
+		self.assertEqual(values[-1], 0)
+
+	def test_indexed_properties_use_the_value_index(self):
+		index = value_index("abc", SCHEMA, {**SCHEMA, "Estimate": {"type": "text"}})
+		self.assertNotIn("Estimate", index.properties)
+
+		sql, values = compile_filters(
+			[
+				{"property": "Status", "operator": "equals", "value": "Done"},
+				{"property": "Estimate", "operator": "greater_than", "value": 3},
+				{"property": "Title", "operator": "contains", "value": "x"},
+			],
+			SCHEMA,
+			index,
+		)
+		self.assertEqual(sql.count("`tabWB Inline Item Value`"), 1)
+		self.assertIn("JSON_VALUE", sql)
+		self.assertEqual(sql.count("%s"), len(values))
+
+		sql, values = compile_filters(
+			{"property": "Due", "operator": "equals", "value": "2025-03-01"}, SCHEMA, index
+		)
+		self.assertEqual(values[-2:], ["2025-03-01", "2025-03-02"])
+
+		query, values = build_items_query(
+			"abc", SCHEMA, sorts=[{"property": "Due"}], index=index, after=[None, "a", "b"]
+		)
+		self.assertIn("LEFT JOIN `tabWB Inline Item Value` s0", query)
+		self.assertIn("s0.value_datetime ASC", query)
+		self.assertEqual(query.count("%s"), len(values))
+
+		query, values = build_group_query("abc", SCHEMA, "Status", aggregates=["Estimate"], index=index)
+		self.assertIn("g.value_text AS group_key", query)
+		self.assertEqual(query.count("%s"), len(values))
+
+		query, values = build_group_items_query(
+			"abc", SCHEMA, "Done", 5, sorts=[{"property": "Due"}], index=index
+		)
+		self.assertIn("COALESCE(g.value_number, 0)", query)
+		self.assertEqual(query.count("%s"), len(values))
+
+	def test_prefix_long_equality_reads_props_json(self):
+		index = value_index("abc", SCHEMA, SCHEMA)
+		for value in ("x" * (TEXT_INDEX_LENGTH - 1), "x" * TEXT_INDEX_LENGTH):
+			long = len(value) == TEXT_INDEX_LENGTH
+			for operator in ("equals", "does_not_equal", "in", "not_in"):
+				sql, _values = compile_filters(
+					{"property": "Status", "operator": operator, "value": value}, SCHEMA, index
+				)
+				# Stored texts are truncated to the prefix: a longer one must not compare equal
+				self.assertEqual("JSON_VALUE" in sql, long, (operator, len(value)))
+			sql, _values = compile_filters(
+				{"property": "Tags", "operator": "contains", "value": value}, SCHEMA, index
+			)
+			self.assertEqual("JSON_CONTAINS" in sql, long)
+		sql, _values = compile_filters(
+			{"property": "Title", "operator": "starts_with", "value": "x" * TEXT_INDEX_LENGTH}, SCHEMA, index
+		)
+		self.assertIn("`tabWB Inline Item Value`", sql)
+
+	def test_group_queries(self):
+		query, values = build_group_query("abc", SCHEMA, "Status", aggregates=["Estimate"])
+		self.assertIn("GROUP BY group_key", query)
+		self.assertEqual(query.count("%s"), len(values))
+
+		query, values = build_group_items_query("abc", SCHEMA, "Status", 5, sorts=[{"property": "Due"}])
+		self.assertIn("ROW_NUMBER() OVER (PARTITION BY", query)
+		self.assertEqual(query.count("%s"), len(values))
+		self.assertEqual(values[-1], 5)
+
+	def test_group_rejects_multi_select_and_non_numeric_aggregates(self):
+		with self.assertRaises(frappe.ValidationError):
+			build_group_query("abc", SCHEMA, "Tags")
+		with self.assertRaises(frappe.ValidationError):
+			build_group_query("abc", SCHEMA, "Status", aggregates=["Title"])
@@ -0,0 +1,406 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+"""Query-plan regression tests: EXPLAIN every query the whitelisted endpoints run.
+
+A workspace tree is seeded with enough rows that a missing index shows as a full
+table scan, each endpoint is called once while ``frappe.db.sql`` is recorded, and
+every SELECT, UPDATE and DELETE it issued is run again under EXPLAIN. A plan that
+reads a whole table of ``FULL_SCAN_ROWS`` rows or more fails the test. Commits and
+enqueues are switched off while recording, so everything is rolled back afterwards.
+
+A new endpoint must be added to ``calls`` (or to ``UNCHECKED`` with the reason).
+"""
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, get_datetime, now, nowdate
+
+from workbench import api, search
+from workbench.workbench.inline_api import inline_collection
+from workbench.workbench.inline_api.prop_index import build_range_query, max_range_span, sync_item_values
+
+FULL_SCAN_ROWS = 200
+MODULES = ("workbench.api", "workbench.workbench.inline_api.inline_collection")
+EXPLAINED = ("select", "update", "delete")
+
+WORKSPACES = 20
+PAGES_PER_WORKSPACE = 60
+COLLECTIONS = 400
+ITEMS_PER_COLLECTION = 10
+COMMENTS_PER_PAGE = 3
+WORKSPACE_COLLABORATORS = 20
+TIMELINE_ITEMS = 1000
+TIMELINE_START = "2020-01-01"
+
+SCHEMA = {"Title": {"type": "title"}, "Status": {"type": "select"}, "Due": {"type": "date"}}
+
+UNCHECKED = {
+	"import_workspace": "needs an uploaded File; the import itself runs in a job",
+}
+
+
+def hash_name(prefix):
+	return f"{prefix}-{frappe.generate_hash(length=10)}"
+
+
+def insert(doctype, fields, rows):
+	timestamp, user = now(), frappe.session.user
+	frappe.db.bulk_insert(
+		doctype,
+		[*fields, "creation", "modified", "owner", "modified_by"],
+		[(*row, timestamp, timestamp, user, user) for row in rows],
+	)
+
+
+def block(text):
+	return {"id": frappe.generate_hash(length=8), "type": "paragraph", "content": text}
+
+
+class TestQueryPlans(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.seed()
+
+	@classmethod
+	def seed(cls):
+		user = frappe.session.user
+		cls.workspaces = [hash_name("plan-ws") for _ in range(WORKSPACES)]
+		insert(
+			"Workbench Workspace",
+			["name", "title", "owner_user", "visibility"],
+			[(name, f"Plan workspace {i}", user, "Private") for i, name in enumerate(cls.workspaces)],
+		)
+		insert(
+			"Workbench Workspace Collaborator",
+			["name", "parent", "parenttype", "parentfield", "idx", "user", "access"],
+			[
+				(hash_name("wsc"), workspace, "Workbench Workspace", "collaborators", i, "Guest", "Viewer")
+				for workspace in cls.workspaces
+				for i in range(WORKSPACE_COLLABORATORS)
+			],
+		)
+
+		cls.pages = []
+		rows = []
+		for w, workspace in enumerate(cls.workspaces):
+			for i in range(PAGES_PER_WORKSPACE):
+				name = hash_name("plan-page")
+				cls.pages.append(name)
+				content = {"blocks": [block(f"alpha page {w} {i}")]}
+				rows.append(
+					(
+						name,
+						workspace,
+						f"Page {i}",
+						i + 1,
+						f"{i + 1:08d}",
+						0,
+						"Use Workspace",
+						json.dumps(content),
+						0,
+						user,
+						user,
+					)
+				)
+		insert(
+			"Notion Page",
+			[
+				"name",
+				"workspace",
+				"title",
+				"page_order",
+				"sort_key",
+				"is_archived",
+				"visibility",
+				"content_json",
+				"content_version",
+				"created_by",
+				"last_edited_by",
+			],
+			rows,
+		)
+		insert(
+			"Workbench Page Collaborator",
+			["name", "parent", "parenttype", "parentfield", "idx", "user", "access"],
+			[
+				(hash_name("pc"), page, "Notion Page", "collaborators", 1, "Guest", "Viewer")
+				for page in cls.pages
+			],
+		)
+		cls.comments = [hash_name("comment") for _ in range(len(cls.pages) * COMMENTS_PER_PAGE)]
+		insert(
+			"Notion Comment",
+			["name", "page_name", "block_id", "comment_text", "author", "is_resolved"],
+			[
+				(name, cls.pages[i // COMMENTS_PER_PAGE], "", "Looks good", user, 0)
+				for i, name in enumerate(cls.comments)
+			],
+		)
+
+		# Collections on the first pages, with items and their typed values
+		cls.collections, cls.items = [], []
+		for i, page in enumerate(cls.pages[:COLLECTIONS]):
+			collection = hash_name("plan-col")
+			cls.collections.append((page, f"blk-{collection}", collection))
+			insert(
+				"WB Inline Collection",
+				[
+					"name",
+					"page",
+					"block_id",
+					"schema_json",
+					"config_json",
+					"filters_json",
+					"sorts_json",
+					"indexed_schema_json",
+				],
+				[
+					(
+						collection,
+						page,
+						f"blk-{collection}",
+						json.dumps(SCHEMA),
+						json.dumps({"dateProp": "Due"}),
+						"[]",
+						"[]",
+						json.dumps(SCHEMA),
+					)
+				],
+			)
+			props = {
+				hash_name("item"): {
+					"Title": f"Item {n}",
+					"Status": "Open" if n % 2 else "Done",
+					"Due": add_days(nowdate(), n),
+				}
+				for n in range(ITEMS_PER_COLLECTION)
+			}
+			insert(
+				"WB Inline Item",
+				["name", "collection", "props_json", "position", "sort_key", "is_archived"],
+				[
+					(name, collection, json.dumps(p), n, f"{n + 1:08d}", 0)
+					for n, (name, p) in enumerate(props.items())
+				],
+			)
+			sync_item_values(collection, SCHEMA, props)
+			if i == 0:
+				cls.items = list(props)
+
+		# A timeline collection whose items span a few days each, spread over years
+		cls.timeline = hash_name("plan-col")
+		cls.timeline_block = f"blk-{cls.timeline}"
+		timeline_schema = {"Title": {"type": "title"}, "Start": {"type": "date"}, "End": {"type": "date"}}
+		insert(
+			"WB Inline Collection",
+			[
+				"name",
+				"page",
+				"block_id",
+				"schema_json",
+				"config_json",
+				"filters_json",
+				"sorts_json",
+				"indexed_schema_json",
+			],
+			[
+				(
+					cls.timeline,
+					cls.pages[0],
+					cls.timeline_block,
+					json.dumps(timeline_schema),
+					json.dumps({"startProp": "Start", "endProp": "End"}),
+					"[]",
+					"[]",
+					json.dumps(timeline_schema),
+				)
+			],
+		)
+		props = {
+			hash_name("item"): {
+				"Title": f"Task {n}",
+				"Start": add_days(TIMELINE_START, n),
+				"End": add_days(TIMELINE_START, n + n % 5),
+			}
+			for n in range(TIMELINE_ITEMS)
+		}
+		insert(
+			"WB Inline Item",
+			["name", "collection", "props_json", "position", "sort_key", "is_archived"],
+			[
+				(name, cls.timeline, json.dumps(p), n, f"{n + 1:08d}", 0)
+				for n, (name, p) in enumerate(props.items())
+			],
+		)
+		sync_item_values(cls.timeline, timeline_schema, props)
+
+		# Search tokens and links for the pages of the first workspaces
+		for i, page in enumerate(cls.pages[: 2 * PAGES_PER_WORKSPACE]):
+			search.index_page(
+				page,
+				"Page",
+				{"blocks": [block("alpha beta gamma")]},
+				cls.workspaces[i // PAGES_PER_WORKSPACE],
+			)
+		insert(
+			"WB Page Link",
+			["name", "source_page", "target_page"],
+			[(hash_name("link"), page, cls.pages[0]) for page in cls.pages[1:PAGES_PER_WORKSPACE]],
+		)
+		cls.import_name = hash_name("import")
+		insert(
+			"WB Import",
+			["name", "workspace", "source", "status"],
+			[(cls.import_name, cls.workspaces[0], "/tmp/x.zip", "Completed")],
+		)
+
+		# Revisions and op log entries through the patch endpoint
+		with patch.object(frappe.db, "commit"), patch("frappe.enqueue"):
+			page = cls.pages[0]
+			for n in range(3):
+				version = frappe.db.get_value("Notion Page", page, "content_version")
+				api.patch_page(page, version, [{"op": "insert", "block": block(f"edit {n}"), "after": None}])
+
+	def calls(self):
+		"""``(endpoint, kwargs)`` for every whitelisted endpoint, reads first."""
+		pages, workspace = self.pages, self.workspaces[0]
+		page, (_page, block_id, _collection) = pages[0], self.collections[0]
+		items = self.items
+		return [
+			("get_company_users", {}),
+			("get_user_workspaces", {}),
+			("get_workspace_pages", {"workspace": workspace}),
+			("get_workspace_pages", {"workspace": workspace, "limit": 20}),
+			("list_pages", {"search": "Page", "workspace": workspace}),
+			("search_content", {"query": "alpha", "workspace": workspace}),
+			("get_all_workspace_pages", {"workspace": workspace}),
+			("get_page", {"name": page}),
+			("get_workspace", {"name": workspace}),
+			("get_page_ops", {"name": page, "since": 1}),
+			("get_page_revisions", {"name": page}),
+			("get_page_revision", {"name": page, "revision": 1}),
+			("get_backlinks", {"name": page}),
+			("get_forward_links", {"name": pages[1]}),
+			("get_comments", {"page_name": page}),
+			("get_workspace_settings", {"workspace_name": workspace}),
+			("get_bootstrap", {"workspace": workspace, "page": page}),
+			("get_delete_status", {"kind": "page", "name": page}),
+			("get_import_status", {"name": self.import_name}),
+			("inline_items_query", {"page": page, "block_id": block_id}),
+			("inline_page_collections", {"page": page}),
+			("inline_items_aggregate", {"page": page, "block_id": block_id, "group_by": "Status"}),
+			(
+				"inline_items_in_range",
+				{"page": page, "block_id": block_id, "start": nowdate(), "end": add_days(nowdate(), 5)},
+			),
+			(
+				"inline_items_in_range",
+				{
+					"page": page,
+					"block_id": self.timeline_block,
+					"start": add_days(TIMELINE_START, TIMELINE_ITEMS - 10),
+					"end": add_days(TIMELINE_START, TIMELINE_ITEMS),
+				},
+			),
+			("inline_item_get", {"page": page, "block_id": block_id, "item_id": items[0]}),
+			("create_workspace", {"title": "Plan workspace"}),
+			("create_page", {"workspace": workspace, "title": "Page 1"}),
+			("update_page_settings", {"name": pages[1], "title": "Renamed"}),
+			("update_workspace_settings", {"name": workspace, "description": "Seeded"}),
+			("update_page", {"name": pages[1], "content_json": json.dumps({"blocks": [block("updated")]})}),
+			(
+				"patch_page",
+				{
+					"name": page,
+					"base_version": frappe.db.get_value("Notion Page", page, "content_version"),
+					"ops": [{"op": "insert", "block": block("patched"), "after": None}],
+				},
+			),
+			("add_comment", {"page_name": page, "comment_text": "Another"}),
+			("resolve_comment", {"comment_name": self.comments[0]}),
+			("move_page", {"name": pages[2], "after": pages[3]}),
+			("move_page_to_workspace", {"page_name": pages[4], "workspace_name": self.workspaces[1]}),
+			("bulk_page_action", {"pages": pages[5:7], "action": "archive"}),
+			("bulk_page_action", {"pages": pages[5:7], "action": "restore"}),
+			("bulk_page_action", {"pages": pages[7:9], "action": "move", "workspace": self.workspaces[2]}),
+			("delete_page", {"name": pages[9]}),
+			("delete_page", {"name": pages[10], "hard": 1}),
+			("delete_workspace", {"workspace_name": self.workspaces[-1], "cascade": 1}),
+			("export_workspace", {"workspace": workspace}),
+			("inline_col_upsert", {"page": page, "block_id": f"{block_id}-new", "schema": SCHEMA}),
+			("inline_item_upsert", {"page": page, "block_id": block_id, "item": {"props": {"Title": "New"}}}),
+			(
+				"inline_items_bulk",
+				{
+					"page": page,
+					"block_id": block_id,
+					"ops": [
+						{"op": "create", "item": {"props": {"Title": "Bulk"}}},
+						{"op": "update", "item": {"id": items[1], "props": {"Title": "Changed"}}},
+					],
+				},
+			),
+			(
+				"inline_item_move",
+				{"page": page, "block_id": block_id, "item_id": items[2], "after": items[3]},
+			),
+			(
+				"inline_item_save_body",
+				{
+					"page": page,
+					"block_id": block_id,
+					"item_id": items[2],
+					"content_json": json.dumps({"blocks": [block("body")]}),
+				},
+			),
+			("inline_item_delete", {"page": page, "block_id": block_id, "item_id": items[4]}),
+			("promote_collection", {"page": page, "block_id": block_id}),
+			("delete_page_collections", {"page": self.collections[1][0]}),
+		]
+
+	def test_every_endpoint_is_covered(self):
+		whitelisted = {fn.__name__ for fn in frappe.whitelisted if fn.__module__ in MODULES}
+		covered = {name for name, _kwargs in self.calls()} | set(UNCHECKED)
+		self.assertEqual(whitelisted - covered, set(), "Add the new endpoints to TestQueryPlans.calls")
+
+	def test_range_scan_is_bounded(self):
+		"""A window at the end of a long timeline reads the window plus the longest span, not its past."""
+		start, end = add_days(TIMELINE_START, TIMELINE_ITEMS - 10), add_days(TIMELINE_START, TIMELINE_ITEMS)
+		span = max_range_span(self.timeline, "Start", "End")
+		self.assertEqual(span, 4 * 24 * 60 * 60)
+		query, values = build_range_query(
+			self.timeline, "Start", "End", get_datetime(start), get_datetime(end), 1000, max_span=span
+		)
+		plan = {row.table: row for row in frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True)}
+		self.assertNotEqual(plan["s"].type, "ALL")
+		self.assertLess(plan["s"].rows or 0, TIMELINE_ITEMS // 10)
+
+	def test_no_full_table_scans(self):
+		sql = frappe.db.sql
+		offenders = []
+		for name, kwargs in self.calls():
+			endpoint = getattr(api, name, None) or getattr(inline_collection, name)
+			with (
+				patch.object(frappe.db, "sql", wraps=sql) as recorder,
+				patch.object(frappe.db, "commit"),
+				patch("frappe.enqueue"),
+			):
+				endpoint(**kwargs)
+
+			for call in recorder.call_args_list:
+				query = str(call.args[0]).strip()
+				if not query.lower().startswith(EXPLAINED):
+					continue
+				values = call.args[1] if len(call.args) > 1 else call.kwargs.get("values", ())
+				for row in sql(f"EXPLAIN {query}", values, as_dict=True):
+					if row.type == "ALL" and (row.rows or 0) >= FULL_SCAN_ROWS:
+						offenders.append(
+							f"{name}: full scan of {row.table} ({row.rows} rows) in {' '.join(query.split())[:300]}"
+						)
+
+		self.assertEqual(offenders, [], "\n".join(offenders))
@@ -0,0 +1,28 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.responses import conditional_response, make_etag
+
+
+class TestConditionalResponse(FrappeTestCase):
+	def test_etag_follows_version(self):
+		self.assertEqual(make_etag("page", "P-1", 3), make_etag("page", "P-1", 3))
+		self.assertNotEqual(make_etag("page", "P-1", 3), make_etag("page", "P-1", 4))
+
+	def test_not_modified_and_cached_payload(self):
+		builds = []
+
+		def build():
+			builds.append(1)
+			return {"content": "x" * 100}
+
+		tag = make_etag("test", self.id())
+		first = conditional_response("test", tag, build)
+		self.assertEqual(first, {"content": "x" * 100, "etag": tag})
+		self.assertEqual(conditional_response("test", tag, build), first)
+		self.assertEqual(len(builds), 1)
+		self.assertEqual(
+			conditional_response("test", tag, build, etag=tag), {"not_modified": True, "etag": tag}
+		)
@@ -0,0 +1,27 @@
+# Copyright (c) 2025, You and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from workbench.search import TITLE_WEIGHT, item_tokens, page_tokens, tokenize
+
+
+class TestSearchTokens(FrappeTestCase):
+	def test_tokenize_strips_markup_and_short_tokens(self):
+		self.assertEqual(
+			tokenize("<b>Quarterly</b> plan: Q3 a roadmap"), ["quarterly", "plan", "q3", "roadmap"]
+		)
+
+	def test_page_title_tokens_weigh_more(self):
+		counts = page_tokens(
+			"Roadmap",
+			{"blocks": [{"id": "a", "text": "roadmap for launch"}, {"id": "b", "content": "launch"}]},
+		)
+		self.assertEqual(counts["roadmap"], TITLE_WEIGHT + 1)
+		self.assertEqual(counts["launch"], 2)
+
+	def test_item_props(self):
+		counts = item_tokens({"Title": "Fix login", "Tags": ["Bug", "Backend"], "Estimate": 3, "Done": None})
+		self.assertEqual(counts["login"], TITLE_WEIGHT)
+		self.assertEqual(counts["bug"], 1)
+		self.assertNotIn("none", counts)
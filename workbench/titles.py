@@ -0,0 +1,61 @@
+"""Unique page titles within a workspace: ``Title``, then ``Title 1``, ``Title 2``, ...
+
+``allocate_title`` reads whether the base title is taken and the highest numeric
+suffix in use for it with one range query over the (workspace, title) index. The
+workspace row is locked first, so concurrent creates in one workspace take turns
+until their transaction commits and never pick the same title. ``allocate_titles``
+does the same for a batch of pages joining a workspace.
+"""
+
+import frappe
+
+from workbench.workbench.inline_api.query import escape_like
+
+
+def title_usage(workspace, base, exclude=None):
+	"""``(taken, suffix)``: whether ``base`` is used in ``workspace`` and its highest numeric suffix."""
+	frappe.db.sql("SELECT name FROM `tabWorkbench Workspace` WHERE name = %s FOR UPDATE", (workspace,))
+	taken, suffix = frappe.db.sql(
+		"""
+		SELECT MAX(title = %(base)s),
+			MAX(IF(SUBSTRING(title, %(start)s) REGEXP '^ [1-9][0-9]{0,8}$',
+				CAST(SUBSTRING(title, %(start)s + 1) AS UNSIGNED), NULL))
+		FROM `tabNotion Page`
+		WHERE workspace = %(workspace)s AND title LIKE %(prefix)s AND name != %(exclude)s
+		""",
+		{
+			"workspace": workspace,
+			"base": base,
+			"start": len(base) + 1,
+			"prefix": f"{escape_like(base)}%",
+			"exclude": exclude or "",
+		},
+	)[0]
+	return bool(taken), int(suffix or 0)
+
+
+def allocate_title(workspace, title, exclude=None):
+	"""A title based on ``title`` that no other page of ``workspace`` (``exclude`` aside) uses."""
+	base = (title or "").strip() or "Untitled"
+	taken, suffix = title_usage(workspace, base, exclude)
+	if not taken:
+		return base
+	return f"{base} {suffix + 1}"
+
+
+def allocate_titles(workspace, titles):
+	"""Unique titles for several pages joining ``workspace``, in order.
+
+	Each distinct title is looked up once; later repeats of it count up from there.
+	"""
+	allocated, next_suffix = [], {}
+	for title in titles:
+		base = (title or "").strip() or "Untitled"
+		if base in next_suffix:
+			allocated.append(f"{base} {next_suffix[base]}")
+			next_suffix[base] += 1
+			continue
+		taken, suffix = title_usage(workspace, base)
+		allocated.append(f"{base} {suffix + 1}" if taken else base)
+		next_suffix[base] = suffix + (2 if taken else 1)
+	return allocated
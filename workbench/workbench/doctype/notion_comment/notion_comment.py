@@ -3,3 +3,8 @@ from frappe.model.document import Document
 
 class NotionComment(Document):
     pass
+
+
+def on_doctype_update():
+    # Comment threads of a page, open ones first, in creation order
+    frappe.db.add_index("Notion Comment", ["page_name", "is_resolved", "creation"])
@@ -1,5 +1,27 @@
 import frappe
 from frappe.model.document import Document
+from frappe.utils import cint
 
-class NotionPage(Document):
-    pass
+from workbench.codec import CompressedFieldsMixin
+from workbench.ordering import key_between, last_key
+
+class NotionPage(CompressedFieldsMixin, Document):
+    def before_insert(self):
+        # New pages go to the end of their workspace's sidebar
+        if not self.sort_key:
+            self.sort_key = key_between(last_key("Notion Page", self.workspace), None)
+
+    def before_save(self):
+        # Bump the version block-level patches are checked against
+        if not self.is_new() and self.has_value_changed("content_json"):
+            self.content_version = cint(self.content_version) + 1
+
+
+def on_doctype_update():
+    # The sidebar reads and appends in sort_key order per workspace
+    frappe.db.add_index("Notion Page", ["workspace", "sort_key"])
+    # Unique-title allocation locks and scans (workspace, title)
+    frappe.db.add_index("Notion Page", ["workspace", "title"])
+    # Import resume and link resolution look pages up by their export key
+    frappe.db.add_index("Notion Page", ["workspace", "import_key"])
+    frappe.db.add_index("Notion Page", ["workspace", "is_archived", "page_order"])
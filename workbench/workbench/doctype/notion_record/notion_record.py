@@ -4,6 +4,8 @@
 # import frappe
 from frappe.model.document import Document
 
+from workbench.codec import CompressedFieldsMixin
 
-class NotionRecord(Document):
+
+class NotionRecord(CompressedFieldsMixin, Document):
 	pass
@@ -17,6 +17,7 @@ class WBInlineCollection(Document):
 		block_id: DF.Data
 		config_json: DF.LongText | None
 		filters_json: DF.LongText | None
+		indexed_schema_json: DF.LongText | None
 		modified: DF.Datetime | None
 		modified_by: DF.Link | None
 		owner: DF.Link | None
@@ -49,3 +50,8 @@ class WBInlineCollection(Document):
 			self.filters_json = "[]"
 		if not self.sorts_json:
 			self.sorts_json = "[]"
+
+
+def on_doctype_update():
+	# Every inline API call resolves its collection by (page, block_id)
+	frappe.db.add_index("WB Inline Collection", ["page", "block_id"])
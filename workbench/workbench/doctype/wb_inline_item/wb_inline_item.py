@@ -4,6 +4,8 @@
 import frappe
 from frappe.model.document import Document
 
+from workbench.workbench.inline_api.resolver import has_page_permission, is_temp_page
+
 
 class WBInlineItem(Document):
 	# begin: auto-generated types
@@ -15,48 +17,37 @@ class WBInlineItem(Document):
 		from frappe.types import DF
 
 		collection: DF.Link
-		content_json: DF.LongText | None
 		is_archived: DF.Check
 		modified: DF.Datetime | None
 		modified_by: DF.Link | None
 		owner: DF.Link | None
 		position: DF.Float
 		props_json: DF.LongText | None
+		sort_key: DF.Data | None
 	# end: auto-generated types
 
 	def validate(self):
-		# Skip validation entirely for temporary pages
-		if self.collection:
-			try:
-				collection = frappe.get_doc("WB Inline Collection", self.collection)
-				# Skip all validation for temporary pages
-				if collection.page.startswith('temp-page-'):
-					return
-			except frappe.DoesNotExistError:
-				# Collection doesn't exist, skip validation
-				return
-		
+		if not self.collection:
+			return
+
+		page = frappe.db.get_value("WB Inline Collection", self.collection, "page")
+		# Missing collections and temporary pages skip validation entirely
+		if not page or is_temp_page(page):
+			return
+
 		# Only validate for real pages
-		if self.collection:
-			try:
-				collection = frappe.get_doc("WB Inline Collection", self.collection)
-				# Check if user has access to the page
-				try:
-					page = frappe.get_doc("Notion Page", collection.page)
-					if not frappe.has_permission("Notion Page", "read", page.name):
-						frappe.throw("You don't have permission to access this collection")
-				except frappe.DoesNotExistError:
-					# Page doesn't exist, skip validation
-					pass
-			except frappe.DoesNotExistError:
-				# Collection doesn't exist, skip validation
-				pass
+		if frappe.db.exists("Notion Page", page) and not has_page_permission(page, "read"):
+			frappe.throw("You don't have permission to access this collection")
 
 	def before_save(self):
 		# Set default values for JSON fields if empty
 		if not self.props_json:
 			self.props_json = "{}"
-		if not self.content_json:
-			self.content_json = "{}"
 		if self.position is None:
 			self.position = 0
+
+
+def on_doctype_update():
+	# Lists are read and appended to in sort_key order per collection
+	frappe.db.add_index("WB Inline Item", ["collection", "sort_key"])
+	frappe.db.add_index("WB Inline Item", ["collection", "is_archived", "position"])
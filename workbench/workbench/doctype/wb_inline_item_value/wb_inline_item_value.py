@@ -0,0 +1,18 @@
+# Copyright (c) 2025, You and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+from workbench.workbench.inline_api.prop_index import VALUE_FIELDS
+
+
+class WBInlineItemValue(Document):
+	pass
+
+
+def on_doctype_update():
+	# (collection, property, value, item) per value column serves filters, sorts and windows
+	for field in VALUE_FIELDS:
+		frappe.db.add_index("WB Inline Item Value", ["collection", "property", field, "item"])
+	frappe.db.add_index("WB Inline Item Value", ["item", "property"])
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, You and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class WBPageOp(Document):
+	pass
+
+
+def on_doctype_update():
+	# Two writers appending the same seq conflict here instead of both landing in the log
+	frappe.db.add_unique("WB Page Op", ["page", "seq"], constraint_name="page_seq")
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, You and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class WBPageRevision(Document):
+	pass
+
+
+def on_doctype_update():
+	# One row per (page, revision); also serves the range reads that materialize a revision
+	frappe.db.add_unique("WB Page Revision", ["page", "revision"], constraint_name="page_revision")
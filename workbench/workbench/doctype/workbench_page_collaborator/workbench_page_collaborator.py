@@ -3,3 +3,8 @@ from frappe.model.document import Document
 
 class WorkbenchPageCollaborator(Document):
 	pass
+
+
+def on_doctype_update():
+	# Access checks look up one user among a page's collaborators
+	frappe.db.add_index("Workbench Page Collaborator", ["parent", "user"])
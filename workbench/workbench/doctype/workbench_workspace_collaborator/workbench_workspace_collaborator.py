@@ -1,9 +1,13 @@
 # Copyright (c) 2025, You and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class WorkbenchWorkspaceCollaborator(Document):
 	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Workbench Workspace Collaborator", ["parent", "user"])
@@ -3,40 +3,83 @@
 
 import frappe
 from frappe import _
+from frappe.utils import cint, flt, get_datetime, now
 import json
 
+from workbench import search
+from workbench.cascade import Cascade
+from workbench.responses import conditional_response, make_etag
+from workbench.cursors import decode_cursor, encode_cursor, fingerprint
+from workbench.ordering import key_between, keys_after, last_key, move_key, position_key
+from workbench.workbench.inline_api.item_body import (
+	load_body,
+	remove_bodies,
+	save_bodies,
+)
+from workbench.workbench.inline_api.prop_index import (
+	build_range_query,
+	max_range_span,
+	remove_item_values,
+	sync_item_values,
+)
+from workbench.workbench.inline_api.query import (
+	build_group_items_query,
+	build_group_query,
+	build_items_query,
+	numeric_properties,
+	parse_spec,
+	project_props,
+	row_cursor,
+	value_index,
+)
+from workbench.workbench.inline_api.resolver import (
+	check_page_permission,
+	get_page_collections,
+	invalidate_items,
+	invalidate_page,
+	items_version,
+	page_version,
+	resolve,
+)
+
 
 @frappe.whitelist()
 def inline_col_upsert(page, block_id, schema=None, config=None, filters=None, sorts=None):
 	"""Create or update an inline collection block"""
 	
-	# Debug logging
-	frappe.log_error(f"inline_col_upsert called with page={page}, block_id={block_id}")
-	
 	# Check if page is provided
 	if not page:
 		frappe.throw("Page parameter is required")
 	
-	# Check if user has access to the page
-	if not frappe.has_permission("Notion Page", "write", page):
-		frappe.throw("You don't have permission to edit this page")
+	# Check access and get the existing collection, if any
+	existing = resolve(page, block_id, "write")
 	
-	# Try to get existing collection
-	existing = frappe.get_all(
-		"WB Inline Collection",
-		filters={"page": page, "block_id": block_id},
-		limit=1
-	)
+	# Arguments left as None keep what the collection already has
+	current = existing or frappe._dict()
+	schema_json = json.dumps(schema) if isinstance(schema, dict) else (schema or current.schema_json or "{}")
+	config_json = json.dumps(config) if isinstance(config, dict) else (config or current.config_json or "{}")
+	filters_json = json.dumps(filters) if isinstance(filters, list) else (filters or current.filters_json or "[]")
+	sorts_json = json.dumps(sorts) if isinstance(sorts, list) else (sorts or current.sorts_json or "[]")
 	
-	# Use direct SQL operations to bypass validation entirely
-	schema_json = json.dumps(schema) if isinstance(schema, dict) else (schema or "{}")
-	config_json = json.dumps(config) if isinstance(config, dict) else (config or "{}")
-	filters_json = json.dumps(filters) if isinstance(filters, list) else (filters or "[]")
-	sorts_json = json.dumps(sorts) if isinstance(sorts, list) else (sorts or "[]")
+	unchanged = existing and (schema_json, config_json, filters_json, sorts_json) == (
+		current.schema_json, current.config_json, current.filters_json, current.sorts_json
+	)
 	
-	if existing:
+	if unchanged:
+		# Plain load of an existing block: nothing to write
+		collection_name = existing.name
+	elif existing:
 		# Update existing collection
-		collection_name = existing[0].name
+		collection_name = existing.name
+		if json.loads(schema_json) != parse_spec(current.schema_json, {}):
+			# Property types may have changed: re-extract the typed index off the request
+			frappe.enqueue(
+				"workbench.workbench.inline_api.prop_index.rebuild_collection",
+				collection=collection_name,
+				job_id=f"workbench-prop-index-{collection_name}",
+				deduplicate=True,
+				enqueue_after_commit=True
+			)
 		frappe.db.sql("""
 			UPDATE `tabWB Inline Collection` 
 			SET schema_json = %s, config_json = %s, filters_json = %s, sorts_json = %s, modified = NOW(), modified_by = %s
@@ -47,11 +90,13 @@ def inline_col_upsert(page, block_id, schema=None, config=None, filters=None, so
 		collection_name = frappe.generate_hash(length=10)
 		frappe.db.sql("""
 			INSERT INTO `tabWB Inline Collection` 
-			(name, page, block_id, schema_json, config_json, filters_json, sorts_json, creation, modified, owner, modified_by)
-			VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s, %s)
-		""", (collection_name, page, block_id, schema_json, config_json, filters_json, sorts_json, frappe.session.user, frappe.session.user))
+			(name, page, block_id, schema_json, config_json, filters_json, sorts_json, indexed_schema_json, creation, modified, owner, modified_by)
+			VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s, %s)
+		""", (collection_name, page, block_id, schema_json, config_json, filters_json, sorts_json, schema_json, frappe.session.user, frappe.session.user))
 	
-	frappe.db.commit()
+	if not unchanged:
+		frappe.db.commit()
+		invalidate_page(page)
 	
 	return {
 		"success": True,
@@ -64,44 +109,202 @@ def inline_col_upsert(page, block_id, schema=None, config=None, filters=None, so
 
 
 @frappe.whitelist()
-def inline_items_query(page, block_id, limit=100, offset=0):
-	"""Query items for an inline collection"""
-	
-	# Skip permission check for temporary pages
-	if not page.startswith('temp-page-'):
-		# Check if user has access to the page
-		if not frappe.has_permission("Notion Page", "read", page):
-			frappe.throw("You don't have permission to read this page")
-	
-	# Get collection
-	collection = frappe.get_all(
-		"WB Inline Collection",
-		filters={"page": page, "block_id": block_id},
-		limit=1
-	)
+def inline_items_query(page, block_id, limit=100, offset=0, filters=None, sorts=None, properties=None, cursor=None, etag=None):
+	"""Query items for an inline collection.
+
+	The collection's stored filters/sorts are applied in SQL; ``filters`` and ``sorts``
+	override them for this call only (e.g. an unsaved view tweak). ``properties``
+	limits the returned props to those keys. Item bodies are never included; they
+	are loaded one item at a time with ``inline_item_get``.
+
+	``next_cursor`` in the response continues the list after the last item returned
+	(pass it back as ``cursor``; ``offset`` is then ignored). It is None on the last page.
+
+	The response carries an ``etag`` built from the page and item version tokens and
+	the arguments; sending it back as ``etag`` returns ``{"not_modified": True}`` while
+	nothing changed, and identical queries share one cached response.
+	"""
+	
+	# Check access and get collection
+	collection = resolve(page, block_id, "read")
 	
 	if not collection:
 		return {"success": True, "items": []}
 	
-	# Get items
-	items = frappe.get_all(
-		"WB Inline Item",
-		filters={
-			"collection": collection[0].name,
-			"is_archived": 0
-		},
-		fields=["name", "props_json", "content_json", "position", "creation", "modified"],
-		order_by="position asc, creation asc",
-		limit=limit,
-		start=offset
+	tag = make_etag(
+		"items", collection.name, page_version(page), items_version(collection.name),
+		cint(limit), cint(offset), filters, sorts, properties, cursor
+	)
+	return conditional_response(
+		"items", tag, lambda: query_items(collection, limit, offset, filters, sorts, properties, cursor), etag
+	)
+
+
+def query_items(collection, limit=100, offset=0, filters=None, sorts=None, properties=None, cursor=None):
+	schema = parse_spec(collection.schema_json, {})
+	filters = parse_spec(filters if filters is not None else collection.filters_json, [])
+	sorts = parse_spec(sorts if sorts is not None else collection.sorts_json, [])
+	properties = parse_spec(properties, None)
+	limit = cint(limit) or 100
+	
+	# A cursor only resumes the query (collection, filters, sorts) it was issued for
+	scope = fingerprint(collection.name, filters, sorts)
+	after = decode_cursor(cursor, scope) if cursor else None
+	
+	# Get only the matching page of items, plus one to tell whether more follow
+	query, values = build_items_query(
+		collection.name, schema, filters=filters, sorts=sorts, limit=limit + 1, offset=offset,
+		properties=properties, after=after,
+		index=value_index(collection.name, schema, collection.indexed_schema_json)
 	)
+	items = frappe.db.sql(query, values, as_dict=True)
+	has_more = len(items) > limit
+	items = items[:limit]
 	
 	# Parse JSON fields
+	last = None
 	for item in items:
-		item["props"] = json.loads(item["props_json"] or "{}")
-		item["content"] = json.loads(item["content_json"] or "{}")
-		del item["props_json"]
-		del item["content_json"]
+		last = row_cursor(item, sorts)
+		if properties is not None:
+			item["props"] = project_props(item, properties)
+		else:
+			item["props"] = json.loads(item.pop("props_json") or "{}")
+	
+	return {
+		"success": True,
+		"items": items,
+		"next_cursor": encode_cursor(last, scope) if has_more else None
+	}
+
+
+@frappe.whitelist()
+def inline_page_collections(page, items_limit=100):
+	"""Metadata and first items of every collection on ``page``.
+
+	Each entry has the shape ``inline_col_upsert`` returns, plus ``block_id`` and
+	``items`` (an ``inline_items_query`` response), so a page's collection blocks can
+	render without a request of their own.
+	"""
+	check_page_permission(page, "read")
+	return [
+		{
+			"success": True,
+			"block_id": collection.block_id,
+			"collection": collection.name,
+			"schema": parse_spec(collection.schema_json, {}),
+			"config": parse_spec(collection.config_json, {}),
+			"filters": parse_spec(collection.filters_json, []),
+			"sorts": parse_spec(collection.sorts_json, []),
+			"items": inline_items_query(page, collection.block_id, limit=items_limit),
+		}
+		for collection in get_page_collections(page)
+	]
+
+
+@frappe.whitelist()
+def inline_items_aggregate(page, block_id, group_by, per_group=10, aggregates=None, filters=None, sorts=None):
+	"""Group items by a property for board views.
+
+	Returns each group's key and count, its first ``per_group`` items (props only)
+	and count/sum/avg/min/max for the numeric properties in ``aggregates`` (all numeric
+	properties when omitted), plus collection-wide totals for column footers. Further
+	items of a column are loaded with ``inline_items_query`` filtered on the group key.
+	"""
+	
+	# Check access and get collection
+	collection = resolve(page, block_id, "read")
+	
+	if not collection:
+		return {"success": True, "groups": [], "totals": {}}
+	
+	schema = parse_spec(collection.schema_json, {})
+	filters = parse_spec(filters if filters is not None else collection.filters_json, [])
+	sorts = parse_spec(sorts if sorts is not None else collection.sorts_json, [])
+	aggregates = parse_spec(aggregates, None)
+	if aggregates is None:
+		aggregates = numeric_properties(schema)
+	
+	index = value_index(collection.name, schema, collection.indexed_schema_json)
+	query, values = build_group_query(
+		collection.name, schema, group_by, filters=filters, aggregates=aggregates, index=index
+	)
+	rows = frappe.db.sql(query, values, as_dict=True)
+	
+	query, values = build_group_items_query(
+		collection.name, schema, group_by, cint(per_group), filters=filters, sorts=sorts, index=index
+	)
+	items_by_group = {}
+	for item in frappe.db.sql(query, values, as_dict=True):
+		item["props"] = json.loads(item.pop("props_json") or "{}")
+		items_by_group.setdefault(item.pop("group_key"), []).append(item)
+	
+	groups, totals = [], {prop: {"count": 0, "sum": 0, "min": None, "max": None} for prop in aggregates}
+	for row in rows:
+		group = {"key": row.group_key, "count": row.count, "items": items_by_group.get(row.group_key, []), "aggregates": {}}
+		for i, prop in enumerate(aggregates):
+			n, total = row[f"n_{i}"], flt(row[f"sum_{i}"])
+			group["aggregates"][prop] = {
+				"count": n,
+				"sum": total,
+				"avg": total / n if n else None,
+				"min": row[f"min_{i}"],
+				"max": row[f"max_{i}"],
+			}
+			summary = totals[prop]
+			summary["count"] += n
+			summary["sum"] += total
+			for fn, pick in (("min", min), ("max", max)):
+				if row[f"{fn}_{i}"] is not None:
+					current = summary[fn]
+					summary[fn] = row[f"{fn}_{i}"] if current is None else pick(current, row[f"{fn}_{i}"])
+		groups.append(group)
+	
+	for summary in totals.values():
+		summary["avg"] = summary["sum"] / summary["count"] if summary["count"] else None
+	
+	return {
+		"success": True,
+		"group_by": group_by,
+		"groups": groups,
+		"totals": totals
+	}
+
+
+@frappe.whitelist()
+def inline_items_in_range(page, block_id, start, end, date_prop=None, end_prop=None, limit=1000):
+	"""Items whose date property (or start/end pair) overlaps the [start, end] window.
+
+	Calendar views pass ``date_prop`` (defaults to config ``dateProp``); timelines pass
+	a start/end pair (defaults to config ``startProp``/``endProp``). Served from the
+	WB Inline Item Value index, so the cost follows the number of items in the window.
+	"""
+	
+	# Check access and get collection
+	collection = resolve(page, block_id, "read")
+	
+	if not collection:
+		return {"success": True, "items": []}
+	
+	config = parse_spec(collection.config_json, {})
+	start_prop = date_prop or config.get("dateProp") or config.get("startProp")
+	if not start_prop:
+		frappe.throw("No date property configured for this collection")
+	if not date_prop:
+		end_prop = end_prop or config.get("endProp")
+	
+	window_start = get_datetime(start)
+	window_end = get_datetime(end)
+	if len(str(end)) <= 10:
+		# A bare date means the whole day
+		window_end = window_end.replace(hour=23, minute=59, second=59, microsecond=999999)
+	
+	max_span = max_range_span(collection.name, start_prop, end_prop) if end_prop else 0
+	query, values = build_range_query(
+		collection.name, start_prop, end_prop, window_start, window_end, limit, max_span=max_span
+	)
+	items = frappe.db.sql(query, values, as_dict=True)
+	for item in items:
+		item["props"] = json.loads(item.pop("props_json") or "{}")
 	
 	return {
 		"success": True,
@@ -113,22 +316,12 @@ def inline_items_query(page, block_id, limit=100, offset=0):
 def inline_item_upsert(page, block_id, item):
 	"""Create or update an inline item"""
 	
-	# Skip permission check for temporary pages
-	if not page.startswith('temp-page-'):
-		# Check if user has access to the page
-		if not frappe.has_permission("Notion Page", "write", page):
-			frappe.throw("You don't have permission to edit this page")
-	
 	# Parse item data
 	if isinstance(item, str):
 		item = json.loads(item)
 	
-	# Get collection
-	collection = frappe.get_all(
-		"WB Inline Collection",
-		filters={"page": page, "block_id": block_id},
-		limit=1
-	)
+	# Check access and get collection
+	collection = resolve(page, block_id, "write")
 	
 	if not collection:
 		frappe.throw("Collection not found")
@@ -138,26 +331,45 @@ def inline_item_upsert(page, block_id, item):
 	content = item.get("content", {})
 	position = item.get("position", 0)
 	
+	# The body, search and value writes below trust doc_name: it must be this collection's
+	stored = item_id and frappe.db.get_value("WB Inline Item", item_id, ["collection", "position"], as_dict=True)
+	if stored and stored.collection != collection.name:
+		frappe.throw("Item not found in this collection", frappe.PermissionError)
+	
 	# Use direct SQL operations to bypass validation entirely
-	if item_id:
+	if stored:
 		# Update existing item
+		sort_key = None
+		if "position" in item and flt(position) != flt(stored.position):
+			# Lists are ordered by sort_key; move the row to where the new position puts it
+			sort_key = position_key("WB Inline Item", collection.name, item_id, position)
+		# The collection condition keeps the write inside this collection
 		frappe.db.sql("""
 			UPDATE `tabWB Inline Item` 
-			SET props_json = %s, content_json = %s, position = %s, is_archived = %s
-			WHERE name = %s
-		""", (json.dumps(props), json.dumps(content), position, 0, item_id))
+			SET props_json = %s, position = %s, sort_key = COALESCE(%s, sort_key), is_archived = %s
+			WHERE name = %s AND collection = %s
+		""", (json.dumps(props), position, sort_key, 0, item_id, collection.name))
 		doc_name = item_id
 	else:
-		# Create new item with auto-generated ID
-		doc_name = frappe.generate_hash(length=10)
+		# Create new item; the editor keeps the client-generated id it sends and saves under it later
+		doc_name = item_id or frappe.generate_hash(length=10)
+		sort_key = key_between(last_key("WB Inline Item", collection.name), None)
 		frappe.db.sql("""
 			INSERT INTO `tabWB Inline Item` 
-			(name, collection, props_json, content_json, position, is_archived, creation, modified, owner, modified_by)
+			(name, collection, props_json, position, sort_key, is_archived, creation, modified, owner, modified_by)
 			VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW(), %s, %s)
-		""", (doc_name, collection[0].name, json.dumps(props), json.dumps(content), position, 0, frappe.session.user, frappe.session.user))
+		""", (doc_name, collection.name, json.dumps(props), position, sort_key, 0, frappe.session.user, frappe.session.user))
+	
+	if "content" in item:
+		# Items listed without their body come back without "content"; keep the stored one
+		save_bodies({doc_name: content})
+	
+	search.index_item(doc_name, page, props, workspace=collection.workspace)
+	sync_item_values(collection.name, parse_spec(collection.schema_json, {}), {doc_name: props})
 	
 	# Commit the transaction
 	frappe.db.commit()
+	invalidate_items(collection.name)
 	
 	return {
 		"success": True,
@@ -170,22 +382,195 @@ def inline_item_upsert(page, block_id, item):
 	}
 
 
+ITEM_BULK_OPS = ("create", "update", "archive", "reorder")
+BULK_CHUNK_SIZE = 500
+
+
 @frappe.whitelist()
-def inline_item_delete(page, block_id, item_id):
-	"""Delete an inline item"""
+def inline_items_bulk(page, block_id, ops):
+	"""Apply a batch of item operations to one collection in a single transaction.
+
+	Operations::
+
+		{"op": "create", "item": {"id": <client id>, "props": {}, "content": {}, "position": 0}}
+		{"op": "update", "item": {"id": ..., "props"?: {}, "content"?: {}, "position"?: 0}}
+		{"op": "archive", "id": ...}
+		{"op": "reorder", "id": ..., "after"?: <item id>, "before"?: <item id>}
+		{"op": "reorder", "id": ..., "position": 1.5}  (legacy)
+
+	Positions are translated into order keys: a legacy reorder always moves the row,
+	an update only when its position changed. Created rows go out as multi-row INSERTs and changed rows as CASE-based multi-row
+	UPDATEs. The response maps client ids of created items to their new names.
+	"""
 	
-	# Skip permission check for temporary pages
-	if not page.startswith('temp-page-'):
-		# Check if user has access to the page
-		if not frappe.has_permission("Notion Page", "write", page):
-			frappe.throw("You don't have permission to edit this page")
+	if isinstance(ops, str):
+		ops = json.loads(ops)
 	
-	# Get collection
-	collection = frappe.get_all(
-		"WB Inline Collection",
-		filters={"page": page, "block_id": block_id},
-		limit=1
+	# Check access and get collection
+	collection = resolve(page, block_id, "write")
+	
+	if not collection:
+		frappe.throw("Collection not found")
+	
+	schema = parse_spec(collection.schema_json, {})
+	workspace = collection.workspace
+	collection = collection.name
+	user = frappe.session.user
+	timestamp = now()
+	
+	ops = ops or []
+	new_keys = iter(keys_after(
+		last_key("WB Inline Item", collection),
+		sum(1 for op in ops if op.get("op") == "create")
+	))
+	
+	inserts, created, updates, indexed, bodies, positions = [], {}, {}, {}, {}, {}
+	for op in ops:
+		kind = op.get("op")
+		if kind not in ITEM_BULK_OPS:
+			frappe.throw(f"Unsupported item operation '{kind}'")
+		
+		if kind == "create":
+			item = op.get("item") or {}
+			name = frappe.generate_hash(length=10)
+			props = item.get("props", {})
+			inserts.append((
+				name, collection, json.dumps(props),
+				item.get("position", 0), next(new_keys), 0, timestamp, timestamp, user, user
+			))
+			created[item.get("id") or name] = name
+			indexed[name] = props
+			bodies[name] = item.get("content", {})
+			continue
+		
+		if kind == "update":
+			item = op.get("item") or {}
+			changes = updates.setdefault(item.get("id"), {})
+			if "props" in item:
+				changes["props_json"] = json.dumps(item["props"])
+				indexed[item.get("id")] = item["props"]
+			if "content" in item:
+				bodies[item.get("id")] = item["content"]
+			if "position" in item:
+				changes["position"] = item["position"]
+				positions[item.get("id")] = False
+		elif kind == "archive":
+			updates.setdefault(op.get("id"), {})["is_archived"] = 1
+		elif kind == "reorder":
+			changes = updates.setdefault(op.get("id"), {})
+			if op.get("after") or op.get("before"):
+				# Written straight away so later reorders in the batch see the new key
+				changes["sort_key"] = move_key("WB Inline Item", collection, after=op.get("after"), before=op.get("before"))
+				frappe.db.set_value("WB Inline Item", op.get("id"), "sort_key", changes["sort_key"], update_modified=False)
+			else:
+				changes["position"] = op.get("position", 0)
+				positions[op.get("id")] = True
+	
+	# Every existing item touched must belong to this collection
+	if updates:
+		found = set(frappe.get_all(
+			"WB Inline Item",
+			filters={"collection": collection, "name": ["in", list(updates)]},
+			pluck="name"
+		))
+		missing = set(updates) - found
+		if missing:
+			frappe.throw(f"Items not found in this collection: {', '.join(sorted(map(str, missing)))}")
+	
+	if positions:
+		stored = dict(frappe.get_all(
+			"WB Inline Item",
+			filters={"name": ["in", list(positions)]},
+			fields=["name", "position"],
+			as_list=True
+		))
+		for name, reorder in positions.items():
+			changes = updates[name]
+			if reorder or flt(changes["position"]) != flt(stored.get(name)):
+				changes["sort_key"] = position_key("WB Inline Item", collection, name, changes["position"])
+				frappe.db.set_value("WB Inline Item", name, "sort_key", changes["sort_key"], update_modified=False)
+	
+	if inserts:
+		frappe.db.bulk_insert(
+			"WB Inline Item",
+			["name", "collection", "props_json", "position", "sort_key", "is_archived",
+				"creation", "modified", "owner", "modified_by"],
+			inserts,
+			chunk_size=BULK_CHUNK_SIZE
+		)
+	
+	bulk_update_items(updates, timestamp, user)
+	save_bodies(bodies, user)
+	
+	archived = [name for name, changes in updates.items() if changes.get("is_archived")]
+	search.remove_sources(search.ITEM, archived)
+	search.index_items(
+		page, {name: props for name, props in indexed.items() if name not in archived}, workspace=workspace
 	)
+	sync_item_values(collection, schema, indexed)
+	
+	frappe.db.commit()
+	invalidate_items(collection)
+	
+	return {
+		"success": True,
+		"created": created,
+		"updated": len(updates)
+	}
+
+
+def bulk_update_items(updates, timestamp, user):
+	"""Write ``{name: {column: value}}`` as multi-row CASE updates, one per chunk."""
+	names = list(updates)
+	for start in range(0, len(names), BULK_CHUNK_SIZE):
+		chunk = names[start:start + BULK_CHUNK_SIZE]
+		assignments, values = [], []
+		for column in ("props_json", "position", "sort_key", "is_archived"):
+			rows = [name for name in chunk if column in updates[name]]
+			if not rows:
+				continue
+			cases = " ".join(["WHEN %s THEN %s"] * len(rows))
+			assignments.append(f"`{column}` = CASE name {cases} ELSE `{column}` END")
+			for name in rows:
+				values.extend([name, updates[name][column]])
+		
+		if not assignments:
+			continue
+		
+		frappe.db.sql(f"""
+			UPDATE `tabWB Inline Item`
+			SET {", ".join(assignments)}, modified = %s, modified_by = %s
+			WHERE name IN %s
+		""", (*values, timestamp, user, chunk))
+
+
+@frappe.whitelist()
+def inline_item_move(page, block_id, item_id, after=None, before=None):
+	"""Place an item between two siblings (by id); only the moved row is written"""
+	
+	# Check access and get collection
+	collection = resolve(page, block_id, "write")
+	
+	if not collection:
+		frappe.throw("Collection not found")
+	
+	if not frappe.db.exists("WB Inline Item", {"collection": collection.name, "name": item_id}):
+		frappe.throw("Item not found")
+	
+	sort_key = move_key("WB Inline Item", collection.name, after=after, before=before)
+	frappe.db.set_value("WB Inline Item", item_id, "sort_key", sort_key, update_modified=False)
+	frappe.db.commit()
+	invalidate_items(collection.name)
+	
+	return {"success": True, "sort_key": sort_key}
+
+
+@frappe.whitelist()
+def inline_item_delete(page, block_id, item_id):
+	"""Delete an inline item"""
+	
+	# Check access and get collection
+	collection = resolve(page, block_id, "write")
 	
 	if not collection:
 		frappe.throw("Collection not found")
@@ -193,7 +578,7 @@ def inline_item_delete(page, block_id, item_id):
 	# Get item
 	item = frappe.get_all(
 		"WB Inline Item",
-		filters={"collection": collection[0].name, "name": item_id},
+		filters={"collection": collection.name, "name": item_id},
 		limit=1
 	)
 	
@@ -202,6 +587,11 @@ def inline_item_delete(page, block_id, item_id):
 	
 	# Delete item
 	frappe.delete_doc("WB Inline Item", item[0].name)
+	search.remove_source(search.ITEM, item[0].name)
+	remove_item_values([item[0].name])
+	remove_bodies([item[0].name])
+	frappe.db.commit()
+	invalidate_items(collection.name)
 	
 	return {"success": True}
 
@@ -210,18 +600,8 @@ def inline_item_delete(page, block_id, item_id):
 def inline_item_get(page, block_id, item_id):
 	"""Get a specific inline item with full data"""
 	
-	# Skip permission check for temporary pages
-	if not page.startswith('temp-page-'):
-		# Check if user has access to the page
-		if not frappe.has_permission("Notion Page", "read", page):
-			frappe.throw("You don't have permission to read this page")
-	
-	# Get collection
-	collection = frappe.get_all(
-		"WB Inline Collection",
-		filters={"page": page, "block_id": block_id},
-		limit=1
-	)
+	# Check access and get collection
+	collection = resolve(page, block_id, "read")
 	
 	if not collection:
 		frappe.throw("Collection not found")
@@ -229,8 +609,8 @@ def inline_item_get(page, block_id, item_id):
 	# Get item
 	item = frappe.get_all(
 		"WB Inline Item",
-		filters={"collection": collection[0].name, "name": item_id},
-		fields=["name", "props_json", "content_json", "position", "creation", "modified"],
+		filters={"collection": collection.name, "name": item_id},
+		fields=["name", "props_json", "position", "sort_key", "creation", "modified"],
 		limit=1
 	)
 	
@@ -238,10 +618,8 @@ def inline_item_get(page, block_id, item_id):
 		frappe.throw("Item not found")
 	
 	item = item[0]
-	item["props"] = json.loads(item["props_json"] or "{}")
-	item["content"] = json.loads(item["content_json"] or "{}")
-	del item["props_json"]
-	del item["content_json"]
+	item["props"] = json.loads(item.pop("props_json") or "{}")
+	item["content"] = load_body(item.name)
 	
 	return {
 		"success": True,
@@ -253,18 +631,8 @@ def inline_item_get(page, block_id, item_id):
 def inline_item_save_body(page, block_id, item_id, content_json):
 	"""Save the body content of an inline item"""
 	
-	# Skip permission check for temporary pages
-	if not page.startswith('temp-page-'):
-		# Check if user has access to the page
-		if not frappe.has_permission("Notion Page", "write", page):
-			frappe.throw("You don't have permission to edit this page")
-	
-	# Get collection
-	collection = frappe.get_all(
-		"WB Inline Collection",
-		filters={"page": page, "block_id": block_id},
-		limit=1
-	)
+	# Check access and get collection
+	collection = resolve(page, block_id, "write")
 	
 	if not collection:
 		frappe.throw("Collection not found")
@@ -272,7 +640,7 @@ def inline_item_save_body(page, block_id, item_id, content_json):
 	# Get item
 	item = frappe.get_all(
 		"WB Inline Item",
-		filters={"collection": collection[0].name, "name": item_id},
+		filters={"collection": collection.name, "name": item_id},
 		limit=1
 	)
 	
@@ -280,13 +648,14 @@ def inline_item_save_body(page, block_id, item_id, content_json):
 		frappe.throw("Item not found")
 	
 	# Update content using direct SQL to bypass validation
-	content_json_str = content_json if isinstance(content_json, str) else json.dumps(content_json)
+	save_bodies({item_id: content_json})
 	frappe.db.sql("""
 		UPDATE `tabWB Inline Item` 
-		SET content_json = %s, modified = NOW(), modified_by = %s
+		SET modified = NOW(), modified_by = %s
 		WHERE name = %s
-	""", (content_json_str, frappe.session.user, item_id))
+	""", (frappe.session.user, item_id))
 	frappe.db.commit()
+	invalidate_items(collection.name)
 	
 	return {"success": True}
 
@@ -310,65 +679,22 @@ def promote_collection(page, block_id):
 @frappe.whitelist()
 def delete_page_collections(page):
 	"""Delete all collections and items for a specific page"""
-	try:
-		# Get all collections for this page
-		collections = frappe.get_all(
-			"WB Inline Collection",
-			filters={"page": page}
-		)
-		
-		frappe.log_error(f"Found {len(collections)} collections for page {page}: {[c.name for c in collections]}")
-		
-		deleted_collections = 0
-		deleted_items = 0
-		
-		for collection in collections:
-			# Delete all items in this collection using direct SQL
-			items = frappe.get_all(
-				"WB Inline Item",
-				filters={"collection": collection.name}
-			)
-			
-			frappe.log_error(f"Found {len(items)} items in collection {collection.name}")
-			
-			# Delete items using direct SQL to bypass validation
-			if items:
-				item_names = [item.name for item in items]
-				frappe.db.sql("DELETE FROM `tabWB Inline Item` WHERE name IN %s", (item_names,))
-				deleted_items += len(items)
-				frappe.log_error(f"Deleted {len(items)} items using direct SQL")
-			
-			# Delete the collection using direct SQL
-			try:
-				frappe.db.sql("DELETE FROM `tabWB Inline Collection` WHERE name = %s", (collection.name,))
-				deleted_collections += 1
-				frappe.log_error(f"Deleted collection {collection.name} using direct SQL")
-			except Exception as collection_error:
-				frappe.log_error(f"Error deleting collection {collection.name}: {str(collection_error)}")
-		
-		frappe.db.commit()
-		
-		return {
-			"success": True,
-			"message": f"Deleted {deleted_collections} collections and {deleted_items} items for page {page}",
-			"deleted_collections": deleted_collections,
-			"deleted_items": deleted_items
-		}
-	except Exception as e:
-		frappe.log_error(f"Error deleting page collections: {str(e)}")
-		return {
-			"success": False,
-			"error": str(e)
-		}
+	check_page_permission(page, "write")
+	cascade = Cascade()
+	cascade.delete_collections(frappe.get_all("WB Inline Collection", filters={"page": page}, pluck="name"))
+	frappe.db.commit()
+	invalidate_page(page)
+	
+	counts = cascade.counts
+	return {
+		"success": True,
+		"message": f"Deleted {counts['collections']} collections and {counts['items']} items for page {page}",
+		"deleted_collections": counts["collections"],
+		"deleted_items": counts["items"]
+	}
 
 def cleanup_collection_items(doc, method):
 	"""Clean up items when a collection is deleted"""
-	
-	# Delete all items in this collection
-	items = frappe.get_all(
-		"WB Inline Item",
-		filters={"collection": doc.name}
-	)
-	
-	for item in items:
-		frappe.delete_doc("WB Inline Item", item.name)
+	cascade = Cascade()
+	cascade.delete_items([doc.name])
+	cascade.delete_rows("WB Inline Item Value", "collection", [doc.name])
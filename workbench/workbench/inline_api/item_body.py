@@ -0,0 +1,83 @@
+# Copyright (c) 2024, Workbench and contributors
+# For license information, please see license.txt
+
+"""Inline item bodies (WB Inline Item Body), stored apart from the item rows.
+
+List, board and gallery queries scan ``tabWB Inline Item`` and never touch the
+bodies; a body is read only when one item is opened. Body rows are named after
+their item and only exist for items whose body is not empty. Large bodies are
+stored compressed (see ``workbench.codec``).
+"""
+
+import json
+
+import frappe
+from frappe.utils import now
+
+from workbench.codec import decode, encode
+
+BODY_CHUNK_SIZE = 500
+EMPTY_BODIES = ("", "{}", "null")
+
+
+def dump_body(content):
+	if content is None:
+		return "{}"
+	return content if isinstance(content, str) else json.dumps(content)
+
+
+def load_bodies(items):
+	"""``{item: content_json}`` for the given item names; items without a body are left out."""
+	if not items:
+		return {}
+	return {
+		name: decode(content_json)
+		for name, content_json in frappe.db.sql(
+			"SELECT name, content_json FROM `tabWB Inline Item Body` WHERE name IN %s",
+			(list(items),),
+		)
+	}
+
+
+def load_body(item):
+	return json.loads(load_bodies([item]).get(item) or "{}")
+
+
+def save_bodies(bodies, user=None):
+	"""Upsert ``{item: content}`` in multi-row statements; empty bodies drop their row."""
+	empty = [name for name, content in bodies.items() if dump_body(content) in EMPTY_BODIES]
+	remove_bodies(empty)
+
+	timestamp, user = now(), user or frappe.session.user
+	rows = [(name, encode(dump_body(content))) for name, content in bodies.items() if name not in empty]
+	for start in range(0, len(rows), BODY_CHUNK_SIZE):
+		chunk = rows[start : start + BODY_CHUNK_SIZE]
+		values = []
+		for name, content_json in chunk:
+			values.extend([name, name, content_json, timestamp, timestamp, user, user])
+		frappe.db.sql(
+			f"""
+			INSERT INTO `tabWB Inline Item Body`
+				(name, item, content_json, creation, modified, owner, modified_by)
+			VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(chunk))}
+			ON DUPLICATE KEY UPDATE content_json = VALUES(content_json),
+				modified = VALUES(modified), modified_by = VALUES(modified_by)
+			""",
+			values,
+		)
+
+
+def remove_bodies(items):
+	if items:
+		frappe.db.delete("WB Inline Item Body", {"name": ["in", list(items)]})
+
+
+def remove_collection_bodies(collection):
+	frappe.db.sql(
+		"""
+		DELETE b FROM `tabWB Inline Item Body` b
+		JOIN `tabWB Inline Item` i ON i.name = b.item
+		WHERE i.collection = %s
+		""",
+		(collection,),
+	)
@@ -0,0 +1,207 @@
+# Copyright (c) 2024, Workbench and contributors
+# For license information, please see license.txt
+
+"""Typed side index of WB Inline Item props (WB Inline Item Value).
+
+One row per (item, property) holding the extracted value in a text, number or
+datetime column (one row per option for multi-selects), indexed on
+(collection, property, value, item). Filters, sorts, group-bys and date windows
+over item properties use these B-tree indexes instead of parsing props_json row
+by row; see ``query.value_index`` for which properties qualify.
+"""
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import get_datetime, now
+
+from workbench.workbench.inline_api.query import TEXT_INDEX_LENGTH, parse_spec, property_kind, text_value
+from workbench.workbench.inline_api.resolver import invalidate_page, items_version
+
+INDEX_CHUNK_SIZE = 500
+VALUE_FIELDS = ["value_text", "value_number", "value_datetime"]
+RANGE_SPAN_KEY = "workbench:range_span:{}:{}:{}:{}"
+RANGE_SPAN_TTL = 6 * 60 * 60
+
+
+def extract_values(schema, props):
+	"""``[(property, value_text, value_number, value_datetime)]`` for the props in the schema."""
+	values = []
+	for prop, value in (props or {}).items():
+		if prop not in schema or value in (None, "", []):
+			continue
+		kind = property_kind(schema, prop)
+		if kind == "multi_select":
+			options = value if isinstance(value, list) else [value]
+			for option in dict.fromkeys(text_value(o) for o in options if isinstance(o, (str, int, float))):
+				values.append((prop, option[:TEXT_INDEX_LENGTH], None, None))
+		elif kind == "checkbox":
+			# Unchecked boxes have no row, like empty values
+			if value in (True, 1, "1", "true", "True"):
+				values.append((prop, None, 1, None))
+		elif isinstance(value, (list, dict)):
+			continue
+		elif kind == "number":
+			try:
+				values.append((prop, None, float(value), None))
+			except ValueError:
+				continue
+		elif kind == "date":
+			try:
+				values.append((prop, None, None, get_datetime(value)))
+			except Exception:
+				continue
+		else:
+			values.append((prop, text_value(value)[:TEXT_INDEX_LENGTH], None, None))
+	return values
+
+
+def sync_item_values(collection, schema, items):
+	"""Replace the index rows of ``items`` (``{name: props}``) of one collection."""
+	if not items:
+		return
+	# Without a schema nothing is indexed, but rows of an earlier schema must still go
+	remove_item_values(list(items))
+	if not schema:
+		return
+
+	timestamp = now()
+	rows = [
+		(
+			frappe.generate_hash(length=12),
+			collection,
+			name,
+			*value,
+			timestamp,
+			timestamp,
+			"Administrator",
+			"Administrator",
+		)
+		for name, props in items.items()
+		for value in extract_values(schema, props)
+	]
+	if rows:
+		frappe.db.bulk_insert(
+			"WB Inline Item Value",
+			[
+				"name",
+				"collection",
+				"item",
+				"property",
+				*VALUE_FIELDS,
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+			],
+			rows,
+			chunk_size=INDEX_CHUNK_SIZE,
+		)
+
+
+def remove_item_values(items):
+	if items:
+		frappe.db.delete("WB Inline Item Value", {"item": ["in", list(items)]})
+
+
+def remove_collection_values(collection):
+	frappe.db.delete("WB Inline Item Value", {"collection": collection})
+
+
+def rebuild_collection(collection):
+	"""Rebuild the index of one collection from its items, reading them in chunks.
+
+	Records the schema it was built for in ``indexed_schema_json``; until then queries
+	read properties whose type changed from props_json. Runs again if the schema
+	changed while it was running.
+	"""
+	while True:
+		row = frappe.db.get_value("WB Inline Collection", collection, ["page", "schema_json"])
+		if not row:
+			# Deleted after the rebuild was enqueued; its values went with it
+			return
+		page, schema_json = row
+		schema = parse_spec(schema_json, {})
+		remove_collection_values(collection)
+
+		last = ""
+		while rows := frappe.db.sql(
+			"""
+			SELECT name, props_json FROM `tabWB Inline Item`
+			WHERE collection = %s AND name > %s ORDER BY name LIMIT %s
+			""",
+			(collection, last, INDEX_CHUNK_SIZE),
+			as_dict=True,
+		):
+			sync_item_values(collection, schema, {row.name: parse_spec(row.props_json, {}) for row in rows})
+			last = rows[-1].name
+
+		frappe.db.set_value(
+			"WB Inline Collection", collection, "indexed_schema_json", schema_json, update_modified=False
+		)
+		frappe.db.commit()
+		invalidate_page(page)
+		if frappe.db.get_value("WB Inline Collection", collection, "schema_json") == schema_json:
+			break
+
+
+def max_range_span(collection, start_prop, end_prop):
+	"""Longest ``start_prop`` to ``end_prop`` span of the collection's items, in seconds.
+
+	Bounds how far before a window an overlapping item can start. Read once per items
+	version of the collection, not per window.
+	"""
+	key = RANGE_SPAN_KEY.format(collection, start_prop, end_prop, items_version(collection))
+	span = frappe.cache().get_value(key)
+	if span is None:
+		span = frappe.db.sql(
+			"""
+			SELECT MAX(TIMESTAMPDIFF(SECOND, s.value_datetime, e.value_datetime))
+			FROM `tabWB Inline Item Value` s
+			JOIN `tabWB Inline Item Value` e
+				ON e.item = s.item AND e.collection = s.collection AND e.property = %s
+			WHERE s.collection = %s AND s.property = %s AND s.value_datetime IS NOT NULL
+			""",
+			(end_prop, collection, start_prop),
+		)[0][0]
+		span = max(int(span or 0), 0)
+		frappe.cache().set_value(key, span, expires_in_sec=RANGE_SPAN_TTL)
+	return span
+
+
+def build_range_query(collection, start_prop, end_prop, window_start, window_end, limit, max_span=0):
+	"""Items whose ``start_prop`` (to ``end_prop``, if given) overlaps the window.
+
+	With ``end_prop``, ``max_span`` (seconds, see ``max_range_span``) bounds the start
+	side, so the scan stays within the window plus the longest span.
+	"""
+	if end_prop:
+		query = """
+			SELECT i.name, i.props_json, i.position, i.sort_key, i.creation, i.modified,
+				s.value_datetime AS range_start, COALESCE(e.value_datetime, s.value_datetime) AS range_end
+			FROM `tabWB Inline Item Value` s
+			LEFT JOIN `tabWB Inline Item Value` e
+				ON e.item = s.item AND e.collection = s.collection AND e.property = %s
+			JOIN `tabWB Inline Item` i ON i.name = s.item AND i.collection = s.collection
+			WHERE s.collection = %s AND s.property = %s
+				AND s.value_datetime BETWEEN %s AND %s
+				AND COALESCE(e.value_datetime, s.value_datetime) >= %s
+				AND i.is_archived = 0
+			ORDER BY s.value_datetime, i.sort_key
+			LIMIT %s
+		"""
+		earliest = window_start - timedelta(seconds=max_span)
+		return query, [end_prop, collection, start_prop, earliest, window_end, window_start, int(limit)]
+
+	query = """
+		SELECT i.name, i.props_json, i.position, i.sort_key, i.creation, i.modified,
+			s.value_datetime AS range_start, s.value_datetime AS range_end
+		FROM `tabWB Inline Item Value` s
+		JOIN `tabWB Inline Item` i ON i.name = s.item AND i.collection = s.collection
+		WHERE s.collection = %s AND s.property = %s
+			AND s.value_datetime BETWEEN %s AND %s
+			AND i.is_archived = 0
+		ORDER BY s.value_datetime, i.sort_key
+		LIMIT %s
+	"""
+	return query, [collection, start_prop, window_start, window_end, int(limit)]
@@ -0,0 +1,551 @@
+# Copyright (c) 2024, Workbench and contributors
+# For license information, please see license.txt
+
+"""Compile the filters_json / sorts_json stored on a WB Inline Collection into SQL.
+
+Filters use the shape ``{"property": "Status", "operator": "equals", "value": "Done"}``
+and may be nested with ``{"and": [...]}`` / ``{"or": [...]}``. A top level list is an
+implicit AND. Sorts use ``{"property": "Priority", "direction": "ascending"}``.
+
+Properties covered by the typed WB Inline Item Value index (see ``value_index``) are
+filtered, sorted and grouped through its B-tree indexes; the rest fall back to
+reading props_json row by row.
+"""
+
+import json
+
+import frappe
+from frappe.utils import add_days, flt, getdate
+
+from workbench.cursors import keyset_condition
+
+TEXT_TYPES = ("title", "text", "rich_text", "url", "email", "phone", "file", "person")
+NUMBER_TYPES = ("number",)
+SELECT_TYPES = ("select", "status")
+MULTI_SELECT_TYPES = ("multi_select",)
+DATE_TYPES = ("date",)
+CHECKBOX_TYPES = ("checkbox",)
+
+OPERATORS = {
+	"text": (
+		"equals",
+		"does_not_equal",
+		"contains",
+		"does_not_contain",
+		"starts_with",
+		"ends_with",
+		"is_empty",
+		"is_not_empty",
+	),
+	"number": (
+		"equals",
+		"does_not_equal",
+		"greater_than",
+		"less_than",
+		"greater_than_or_equal_to",
+		"less_than_or_equal_to",
+		"is_empty",
+		"is_not_empty",
+	),
+	"select": ("equals", "does_not_equal", "in", "not_in", "is_empty", "is_not_empty"),
+	"multi_select": ("contains", "does_not_contain", "is_empty", "is_not_empty"),
+	"date": ("equals", "before", "after", "on_or_before", "on_or_after", "is_empty", "is_not_empty"),
+	"checkbox": ("equals", "does_not_equal"),
+}
+
+COMPARATORS = {
+	"equals": "=",
+	"does_not_equal": "!=",
+	"greater_than": ">",
+	"less_than": "<",
+	"greater_than_or_equal_to": ">=",
+	"less_than_or_equal_to": "<=",
+	"before": "<",
+	"after": ">",
+	"on_or_before": "<=",
+	"on_or_after": ">=",
+}
+
+VALUE_TABLE = "`tabWB Inline Item Value`"
+# value_text is a Data column; longer texts are indexed truncated
+TEXT_INDEX_LENGTH = 140
+VALUE_COLUMNS = {
+	"text": "value_text",
+	"select": "value_text",
+	"multi_select": "value_text",
+	"number": "value_number",
+	"checkbox": "value_number",
+	"date": "value_datetime",
+}
+
+
+def parse_spec(value, default):
+	"""Accept a list/dict or its JSON text, as stored on the collection."""
+	if value in (None, ""):
+		return default
+	if isinstance(value, str):
+		try:
+			value = json.loads(value)
+		except ValueError:
+			frappe.throw("Invalid filter or sort specification")
+	return value
+
+
+def property_kind(schema, prop):
+	"""Map a schema property type onto one of the comparison families above."""
+	if prop not in schema:
+		frappe.throw(f"Unknown property '{prop}'")
+
+	prop_type = (schema[prop] or {}).get("type") or "text"
+	if prop_type in NUMBER_TYPES:
+		return "number"
+	if prop_type in SELECT_TYPES:
+		return "select"
+	if prop_type in MULTI_SELECT_TYPES:
+		return "multi_select"
+	if prop_type in DATE_TYPES:
+		return "date"
+	if prop_type in CHECKBOX_TYPES:
+		return "checkbox"
+	return "text"
+
+
+def json_path(prop):
+	"""JSON path for a top level key of props_json, quoted so any key name is safe."""
+	return '$."{}"'.format(prop.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def escape_like(value):
+	return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def scalar_expr(kind):
+	"""SQL expression (with a single path placeholder) for a scalar property value."""
+	if kind == "number":
+		return "CAST(JSON_VALUE(props_json, %s) AS DECIMAL(65, 10))"
+	if kind == "date":
+		return "LEFT(JSON_VALUE(props_json, %s), 10)"
+	if kind == "checkbox":
+		return "(COALESCE(JSON_VALUE(props_json, %s), 'false') IN ('true', '1'))"
+	return "JSON_VALUE(props_json, %s)"
+
+
+def empty_expr(kind):
+	if kind == "multi_select":
+		return "COALESCE(JSON_LENGTH(JSON_EXTRACT(props_json, %s)), 0) = 0"
+	return "COALESCE(JSON_VALUE(props_json, %s), '') IN ('', 'null')"
+
+
+def coerce_value(kind, value):
+	if kind == "number":
+		return flt(value)
+	if kind == "date":
+		return getdate(value).isoformat()
+	if kind == "checkbox":
+		return value in (True, 1, "1", "true", "True")
+	return "" if value is None else str(value)
+
+
+def text_value(value):
+	"""Text form of a scalar prop value, matching what JSON_VALUE returns for it."""
+	if isinstance(value, bool):
+		return "true" if value else "false"
+	return str(value)
+
+
+def value_index(collection, schema, indexed_schema):
+	"""Which properties of ``schema`` the value index of ``collection`` can answer for.
+
+	Only properties whose type is unchanged since the index was last built (see
+	``prop_index.rebuild_collection``) qualify; the others are read from props_json.
+	"""
+	indexed_schema = parse_spec(indexed_schema, {})
+	return frappe._dict(
+		collection=collection,
+		properties={
+			prop
+			for prop in schema
+			if prop in indexed_schema
+			and ((schema[prop] or {}).get("type") or "text")
+			== ((indexed_schema[prop] or {}).get("type") or "text")
+		},
+	)
+
+
+def is_indexed(index, prop):
+	return bool(index) and prop in index.properties
+
+
+def indexed_items(index, prop, condition="1=1", values=(), negate=False):
+	"""``i.name [NOT] IN`` the items whose index rows for ``prop`` match ``condition``."""
+	return (
+		f"""i.name {"NOT " if negate else ""}IN (SELECT item FROM {VALUE_TABLE}
+			WHERE collection = %s AND property = %s AND {condition})""",
+		[index.collection, prop, *values],
+	)
+
+
+def compile_indexed_condition(condition, kind, operator, index):
+	"""Compile a condition against the value index, or None when it cannot answer it.
+
+	Substring matches (contains/ends_with) and texts longer than the indexed prefix
+	are left to the props_json path, and so are equality matches on texts as long as
+	the prefix: stored values are truncated to it, so a longer stored value would
+	compare equal.
+	"""
+	prop = condition.get("property")
+	value = condition.get("value")
+	column = VALUE_COLUMNS[kind]
+
+	if operator in ("is_empty", "is_not_empty"):
+		# Empty values have no index rows
+		return indexed_items(index, prop, negate=operator == "is_empty")
+
+	if kind == "checkbox":
+		wanted = coerce_value(kind, value)
+		if operator == "does_not_equal":
+			wanted = not wanted
+		return indexed_items(index, prop, "value_number = 1", negate=not wanted)
+
+	if kind == "number":
+		if operator in ("equals", "does_not_equal"):
+			return indexed_items(
+				index, prop, "value_number = %s", [flt(value)], negate=operator == "does_not_equal"
+			)
+		return indexed_items(index, prop, f"value_number {COMPARATORS[operator]} %s", [flt(value)])
+
+	if kind == "date":
+		day = getdate(value)
+		next_day = add_days(day, 1)
+		condition_sql, bounds = {
+			"equals": ("value_datetime >= %s AND value_datetime < %s", [day, next_day]),
+			"before": ("value_datetime < %s", [day]),
+			"after": ("value_datetime >= %s", [next_day]),
+			"on_or_before": ("value_datetime < %s", [next_day]),
+			"on_or_after": ("value_datetime >= %s", [day]),
+		}[operator]
+		return indexed_items(index, prop, condition_sql, [str(b) for b in bounds])
+
+	# text, select and multi_select compare against value_text
+	if operator in ("contains", "does_not_contain") and kind == "multi_select":
+		if len(text_value(value)) >= TEXT_INDEX_LENGTH:
+			return None
+		return indexed_items(
+			index, prop, f"{column} = %s", [text_value(value)], negate=operator == "does_not_contain"
+		)
+	if operator in ("equals", "does_not_equal", "starts_with"):
+		text = "" if value is None else text_value(value)
+		if len(text) > TEXT_INDEX_LENGTH or (operator != "starts_with" and len(text) == TEXT_INDEX_LENGTH):
+			return None
+		if operator == "starts_with":
+			return indexed_items(index, prop, f"{column} LIKE %s", [f"{escape_like(text)}%"])
+		return indexed_items(index, prop, f"{column} = %s", [text], negate=operator == "does_not_equal")
+	if operator in ("in", "not_in"):
+		options = [text_value(o) for o in (value if isinstance(value, list) else [value]) if o is not None]
+		if not options or any(len(o) >= TEXT_INDEX_LENGTH for o in options):
+			return None
+		placeholders = ", ".join(["%s"] * len(options))
+		return indexed_items(
+			index, prop, f"{column} IN ({placeholders})", options, negate=operator == "not_in"
+		)
+	return None
+
+
+def compile_condition(condition, schema, index=None):
+	"""Compile a single filter condition into ``(sql, values)``."""
+	prop = condition.get("property")
+	operator = condition.get("operator") or "equals"
+	kind = property_kind(schema, prop)
+	path = json_path(prop)
+
+	if operator not in OPERATORS[kind]:
+		frappe.throw(f"Operator '{operator}' is not supported for property '{prop}'")
+
+	if is_indexed(index, prop):
+		compiled = compile_indexed_condition(condition, kind, operator, index)
+		if compiled:
+			return compiled
+
+	if operator == "is_empty":
+		return empty_expr(kind), [path]
+	if operator == "is_not_empty":
+		return f"NOT ({empty_expr(kind)})", [path]
+
+	value = condition.get("value")
+
+	if kind == "multi_select":
+		sql = "JSON_CONTAINS(COALESCE(JSON_EXTRACT(props_json, %s), '[]'), JSON_QUOTE(%s))"
+		if operator == "does_not_contain":
+			sql = f"NOT {sql}"
+		return sql, [path, "" if value is None else str(value)]
+
+	if kind == "checkbox":
+		wanted = coerce_value(kind, value)
+		if operator == "does_not_equal":
+			wanted = not wanted
+		sql = scalar_expr(kind)
+		return (sql if wanted else f"NOT {sql}"), [path]
+
+	if operator in ("in", "not_in"):
+		options = value if isinstance(value, list) else [value]
+		if not options:
+			return ("1=0" if operator == "in" else "1=1"), []
+		placeholders = ", ".join(["%s"] * len(options))
+		negate = "NOT " if operator == "not_in" else ""
+		return (
+			f"COALESCE({scalar_expr(kind)}, '') {negate}IN ({placeholders})",
+			[path, *[coerce_value(kind, o) for o in options]],
+		)
+
+	if operator in ("contains", "does_not_contain", "starts_with", "ends_with"):
+		pattern = escape_like(coerce_value(kind, value))
+		if operator in ("contains", "does_not_contain"):
+			pattern = f"%{pattern}%"
+		elif operator == "starts_with":
+			pattern = f"{pattern}%"
+		else:
+			pattern = f"%{pattern}"
+		negate = "NOT " if operator == "does_not_contain" else ""
+		return f"COALESCE({scalar_expr(kind)}, '') {negate}LIKE %s", [path, pattern]
+
+	comparator = COMPARATORS[operator]
+	if operator == "does_not_equal":
+		# Rows without the property should still count as "not equal"
+		return f"COALESCE({scalar_expr(kind)}, '') != %s", [path, coerce_value(kind, value)]
+	return f"{scalar_expr(kind)} {comparator} %s", [path, coerce_value(kind, value)]
+
+
+def compile_filters(filters, schema, index=None):
+	"""Compile a filter tree into ``(sql, values)``; an empty tree compiles to ``1=1``."""
+	if not filters:
+		return "1=1", []
+
+	if isinstance(filters, list):
+		filters = {"and": filters}
+
+	for conjunction in ("and", "or"):
+		if conjunction in filters:
+			parts, values = [], []
+			for child in filters[conjunction] or []:
+				sql, child_values = compile_filters(child, schema, index)
+				parts.append(f"({sql})")
+				values.extend(child_values)
+			if not parts:
+				return "1=1", []
+			return f" {conjunction.upper()} ".join(parts), values
+
+	return compile_condition(filters, schema, index)
+
+
+def value_join(alias, prop):
+	"""LEFT JOIN of the index row of ``prop`` for each item, as ``(sql, values)``."""
+	return (
+		f"LEFT JOIN {VALUE_TABLE} {alias} ON {alias}.item = i.name AND {alias}.collection = i.collection AND {alias}.property = %s",
+		[prop],
+	)
+
+
+def indexed_expr(alias, kind):
+	"""Value of an index row joined as ``alias``, comparable like ``scalar_expr(kind)``."""
+	if kind == "checkbox":
+		return f"COALESCE({alias}.value_number, 0)"
+	return f"{alias}.{VALUE_COLUMNS[kind]}"
+
+
+def join_sql(joins):
+	return " ".join(sql for sql, _ in joins), [v for _, values in joins for v in values]
+
+
+def sort_columns(sorts, schema, index=None):
+	"""``([(expr, expr_values, direction)], joins)`` making up the item order.
+
+	The manual order (sort_key) breaks ties between property sorts and ``name`` makes
+	the order total, so it can be resumed from a cursor (see ``workbench.cursors``).
+	Sorts on indexed properties read a joined index row instead of props_json.
+	"""
+	columns, joins = [], []
+	for i, sort in enumerate(sorts or []):
+		prop = sort.get("property")
+		kind = property_kind(schema, prop)
+		direction = "DESC" if (sort.get("direction") or "").lower() in ("desc", "descending") else "ASC"
+		if kind != "multi_select" and is_indexed(index, prop):
+			joins.append(value_join(f"s{i}", prop))
+			columns.append((indexed_expr(f"s{i}", kind), [], direction))
+			continue
+		expr = "JSON_EXTRACT(props_json, %s)" if kind == "multi_select" else scalar_expr(kind)
+		columns.append((expr, [json_path(prop)], direction))
+
+	columns.extend([("i.sort_key", [], "ASC"), ("i.name", [], "ASC")])
+	return columns, joins
+
+
+def compile_sorts(sorts, schema, index=None):
+	"""Compile sorts into an ORDER BY clause; the manual order (sort_key) breaks ties.
+
+	Index joins the clause relies on come from ``sort_columns``.
+	"""
+	clauses, values = [], []
+	for expr, expr_values, direction in sort_columns(sorts, schema, index)[0]:
+		clauses.append(f"{expr} {direction}")
+		values.extend(expr_values)
+	return ", ".join(clauses), values
+
+
+def projection(schema, properties):
+	"""Columns (and their path values) selecting only ``properties`` out of props_json.
+
+	Each property comes back as JSON text in a ``prop_<i>`` column; see ``project_props``.
+	"""
+	columns, values = [], []
+	for i, prop in enumerate(properties):
+		property_kind(schema, prop)
+		columns.append(f"JSON_EXTRACT(props_json, %s) AS prop_{i}")
+		values.append(json_path(prop))
+	return columns, values
+
+
+def project_props(row, properties):
+	"""Fold the ``prop_<i>`` columns of a projected row back into a props dict."""
+	props = {}
+	for i, prop in enumerate(properties):
+		value = row.pop(f"prop_{i}", None)
+		if value is not None:
+			props[prop] = json.loads(value)
+	return props
+
+
+def build_items_query(
+	collection,
+	schema,
+	filters=None,
+	sorts=None,
+	fields=None,
+	limit=100,
+	offset=0,
+	properties=None,
+	after=None,
+	index=None,
+):
+	"""Build the SELECT for one page of matching, non-archived items of a collection.
+
+	With ``properties`` only those keys of props_json are selected (see ``projection``)
+	instead of the whole document. Every row also carries its order values as
+	``cursor_<i>`` columns (see ``row_cursor``); passing those of the last row seen as
+	``after`` continues from there instead of skipping ``offset`` rows. ``index`` (from
+	``value_index``) lets filters and sorts use the typed value index.
+	"""
+	where_sql, where_values = compile_filters(filters, schema, index)
+	order_sql, order_values = compile_sorts(sorts, schema, index)
+	order_columns, joins = sort_columns(sorts, schema, index)
+	joins_sql, join_values = join_sql(joins)
+	fields = fields or ["name", "props_json", "position", "sort_key", "creation", "modified"]
+
+	columns, column_values = [f"i.`{f}`" for f in fields], []
+	if properties is not None:
+		columns = [c for c in columns if c != "i.`props_json`"]
+		extracted, column_values = projection(schema, properties)
+		columns.extend(extracted)
+	for i, (expr, expr_values, _) in enumerate(order_columns):
+		columns.append(f"{expr} AS cursor_{i}")
+		column_values.extend(expr_values)
+
+	if after is not None:
+		keyset_sql, keyset_values = keyset_condition(order_columns, after)
+		where_sql, where_values = f"({where_sql}) AND {keyset_sql}", [*where_values, *keyset_values]
+		offset = 0
+
+	query = f"""
+		SELECT {", ".join(columns)}
+		FROM `tabWB Inline Item` i {joins_sql}
+		WHERE i.collection = %s AND i.is_archived = 0 AND ({where_sql})
+		ORDER BY {order_sql}
+		LIMIT %s OFFSET %s
+	"""
+	values = [*column_values, *join_values, collection, *where_values, *order_values, int(limit), int(offset)]
+	return query, values
+
+
+def row_cursor(row, sorts):
+	"""Pop the ``cursor_<i>`` columns of a row built by ``build_items_query``."""
+	return [row.pop(f"cursor_{i}", None) for i in range(len(sorts or []) + 2)]
+
+
+def numeric_properties(schema):
+	return [prop for prop in schema if property_kind(schema, prop) == "number"]
+
+
+def group_expr(schema, group_by, index=None):
+	"""``(expr, values, joins)`` for the group key; free text is never grouped from the
+	index, whose values are truncated."""
+	kind = property_kind(schema, group_by)
+	if kind == "multi_select":
+		frappe.throw(f"Cannot group by multi-select property '{group_by}'")
+	if kind != "text" and is_indexed(index, group_by):
+		expr = "DATE(g.value_datetime)" if kind == "date" else indexed_expr("g", kind)
+		return expr, [], [value_join("g", group_by)]
+	return scalar_expr(kind), [json_path(group_by)], []
+
+
+def build_group_query(collection, schema, group_by, filters=None, aggregates=None, index=None):
+	"""Per-group counts plus COUNT/SUM/MIN/MAX of numeric properties, in one GROUP BY.
+
+	Each aggregate ``prop`` yields ``n_<i>``, ``sum_<i>``, ``min_<i>`` and ``max_<i>``
+	columns, ``i`` being its index in ``aggregates``.
+	"""
+	key_sql, key_values, joins = group_expr(schema, group_by, index)
+	where_sql, where_values = compile_filters(filters, schema, index)
+
+	columns, column_values = [], []
+	for i, prop in enumerate(aggregates or []):
+		if property_kind(schema, prop) != "number":
+			frappe.throw(f"Property '{prop}' is not numeric")
+		if is_indexed(index, prop):
+			joins.append(value_join(f"a{i}", prop))
+			value_sql, value_values = f"a{i}.value_number", []
+		else:
+			value_sql, value_values = scalar_expr("number"), [json_path(prop)]
+		for fn in ("COUNT", "SUM", "MIN", "MAX"):
+			columns.append(f"{fn}({value_sql}) AS {fn.lower() if fn != 'COUNT' else 'n'}_{i}")
+			column_values.extend(value_values)
+
+	joins_sql, join_values = join_sql(joins)
+	query = f"""
+		SELECT {key_sql} AS group_key, COUNT(*) AS count{"".join(", " + c for c in columns)}
+		FROM `tabWB Inline Item` i {joins_sql}
+		WHERE i.collection = %s AND i.is_archived = 0 AND ({where_sql})
+		GROUP BY group_key
+		ORDER BY group_key
+	"""
+	return query, [*key_values, *column_values, *join_values, collection, *where_values]
+
+
+def build_group_items_query(
+	collection, schema, group_by, per_group, filters=None, sorts=None, fields=None, index=None
+):
+	"""First ``per_group`` items of every group, ranked with ROW_NUMBER() in one pass."""
+	key_sql, key_values, joins = group_expr(schema, group_by, index)
+	where_sql, where_values = compile_filters(filters, schema, index)
+	order_sql, order_values = compile_sorts(sorts, schema, index)
+	joins_sql, join_values = join_sql(joins + sort_columns(sorts, schema, index)[1])
+	fields = fields or ["name", "props_json", "position", "sort_key", "creation", "modified"]
+
+	query = f"""
+		SELECT {", ".join(f"`{f}`" for f in fields)}, group_key
+		FROM (
+			SELECT {", ".join(f"i.`{f}`" for f in fields)}, {key_sql} AS group_key,
+				ROW_NUMBER() OVER (PARTITION BY {key_sql} ORDER BY {order_sql}) AS group_row
+			FROM `tabWB Inline Item` i {joins_sql}
+			WHERE i.collection = %s AND i.is_archived = 0 AND ({where_sql})
+		) ranked
+		WHERE group_row <= %s
+		ORDER BY group_key, group_row
+	"""
+	return query, [
+		*key_values,
+		*key_values,
+		*order_values,
+		*join_values,
+		collection,
+		*where_values,
+		int(per_group),
+	]
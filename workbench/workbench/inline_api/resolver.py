@@ -0,0 +1,150 @@
+# Copyright (c) 2024, Workbench and contributors
+# For license information, please see license.txt
+
+"""Resolve ``(page, block_id)`` to its WB Inline Collection and the caller's access to the page.
+
+Both answers are cached for the request and in Redis. Cache keys carry a per-page
+version that is bumped when a collection of the page is created, changed or deleted
+and when the page's sharing settings change; permission keys also carry the user's
+workspace-membership version (see ``workbench.access``) and expire after
+``PERMISSION_TTL`` so role changes are picked up. Within one request the first
+answer is reused.
+
+``items_version`` is a similar token for the items of a collection, bumped by every
+item write; read endpoints build their ETags from it.
+"""
+
+import frappe
+from frappe.utils.caching import request_cache
+
+from workbench.access import USER_VERSION_KEY, bump_version, cache_version
+
+PAGE_VERSION_KEY = "workbench:page_version:{}"
+ITEMS_VERSION_KEY = "workbench:collection_items_version:{}"
+COLLECTION_KEY = "workbench:inline_collection:{}:{}:{}"
+PAGE_COLLECTIONS_KEY = "workbench:page_collections:{}:{}"
+PERMISSION_KEY = "workbench:page_permission:{}:{}:{}:{}:{}"
+PERMISSION_TTL = 300
+COLLECTION_TTL = 6 * 60 * 60
+
+# Page fields whose change can alter who may read or edit the page
+ACCESS_FIELDS = ("workspace", "visibility", "company", "created_by", "is_archived")
+
+PERMISSION_ERRORS = {
+	"read": "You don't have permission to read this page",
+	"write": "You don't have permission to edit this page",
+}
+
+
+def is_temp_page(page):
+	return page.startswith("temp-page-")
+
+
+def page_version(page):
+	return cache_version(PAGE_VERSION_KEY.format(page))
+
+
+def invalidate_page(page):
+	"""Drop the cached collections and permissions of ``page``."""
+	bump_version(PAGE_VERSION_KEY.format(page))
+
+
+def items_version(collection):
+	"""Token that changes whenever an item of ``collection`` is added, changed, moved or removed."""
+	return cache_version(ITEMS_VERSION_KEY.format(collection))
+
+
+def invalidate_items(collection):
+	bump_version(ITEMS_VERSION_KEY.format(collection))
+
+
+@request_cache
+def get_collection(page, block_id):
+	"""The collection row (with the page's workspace), or None when there is none."""
+	key = COLLECTION_KEY.format(page, block_id, page_version(page))
+	collection = frappe.cache().get_value(key)
+	if collection is None:
+		rows = frappe.db.sql(
+			"""
+			SELECT c.name, c.page, c.block_id, c.schema_json, c.config_json,
+				c.filters_json, c.sorts_json, c.indexed_schema_json, p.workspace
+			FROM `tabWB Inline Collection` c
+			LEFT JOIN `tabNotion Page` p ON p.name = c.page
+			WHERE c.page = %s AND c.block_id = %s
+			LIMIT 1
+			""",
+			(page, block_id),
+			as_dict=True,
+		)
+		# An empty dict caches "no collection" until one is created
+		collection = dict(rows[0]) if rows else {}
+		frappe.cache().set_value(key, collection, expires_in_sec=COLLECTION_TTL)
+	return frappe._dict(collection) if collection else None
+
+
+@request_cache
+def get_page_collections(page):
+	"""Every collection row of ``page``, oldest first."""
+	key = PAGE_COLLECTIONS_KEY.format(page, page_version(page))
+	collections = frappe.cache().get_value(key)
+	if collections is None:
+		collections = [
+			dict(row)
+			for row in frappe.db.sql(
+				"""
+				SELECT name, page, block_id, schema_json, config_json, filters_json, sorts_json,
+					indexed_schema_json
+				FROM `tabWB Inline Collection`
+				WHERE page = %s
+				ORDER BY creation
+				""",
+				(page,),
+				as_dict=True,
+			)
+		]
+		frappe.cache().set_value(key, collections, expires_in_sec=COLLECTION_TTL)
+	return [frappe._dict(c) for c in collections]
+
+
+@request_cache
+def has_page_permission(page, ptype="read", user=None):
+	user = user or frappe.session.user
+	key = PERMISSION_KEY.format(
+		user, page, ptype, cache_version(USER_VERSION_KEY.format(user)), page_version(page)
+	)
+	allowed = frappe.cache().get_value(key)
+	if allowed is None:
+		allowed = bool(frappe.has_permission("Notion Page", ptype, page, user=user))
+		frappe.cache().set_value(key, allowed, expires_in_sec=PERMISSION_TTL)
+	return allowed
+
+
+def check_page_permission(page, ptype="read"):
+	# Temporary pages are not saved yet and have nothing to check against
+	if not is_temp_page(page) and not has_page_permission(page, ptype):
+		frappe.throw(PERMISSION_ERRORS[ptype])
+
+
+def resolve(page, block_id, ptype="read"):
+	"""Check ``ptype`` access to ``page`` and return the collection of ``block_id`` (or None)."""
+	check_page_permission(page, ptype)
+	return get_collection(page, block_id)
+
+
+def on_collection_change(doc, method=None):
+	invalidate_page(doc.page)
+
+
+def on_item_change(doc, method=None):
+	# Bump once the write is visible, so no reader caches the old rows under the new token
+	collection = doc.collection
+	frappe.db.after_commit.add(lambda: invalidate_items(collection))
+
+
+def on_page_update(doc, method=None):
+	if any(doc.has_value_changed(field) for field in ACCESS_FIELDS):
+		invalidate_page(doc.name)
+
+
+def on_page_trash(doc, method=None):
+	invalidate_page(doc.name)